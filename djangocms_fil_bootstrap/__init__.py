@@ -1,21 +1,34 @@
 __version__ = "1.1.0"
 
-__all__ = ["bootstrap"]
+__all__ = ["bootstrap", "plan"]
 
 
-def bootstrap(file_):
-    from factory.random import reseed_random
-
-    reseed_random(0)
-    from .bootstrapper import Bootstrap
+def get_components():
     from .components import (
         Collections,
         Groups,
+        History,
         Pages,
         Permissions,
         Users,
         Workflows,
     )
 
-    bootstrap = Bootstrap(file_)
-    bootstrap(Users, Groups, Permissions, Pages, Workflows, Collections)
+    return [Users, Groups, Permissions, Pages, Workflows, Collections, History]
+
+
+def bootstrap(file_, **options):
+    from factory.random import reseed_random
+
+    reseed_random(0)
+    from .bootstrapper import Bootstrap
+
+    bootstrap = Bootstrap(file_, **options)
+    bootstrap(*get_components())
+
+
+def plan(file_, **options):
+    """Return what `bootstrap` would create or skip, by component."""
+    from .bootstrapper import Bootstrap
+
+    return Bootstrap(file_, **options).plan(*get_components())
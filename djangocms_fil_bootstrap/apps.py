@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class BootstrapConfig(AppConfig):
+    name = "djangocms_fil_bootstrap"
+    verbose_name = "django CMS bootstrap"
+    # Same as the primary keys of the migrations, regardless of
+    # DEFAULT_AUTO_FIELD of the project
+    default_auto_field = "django.db.models.AutoField"
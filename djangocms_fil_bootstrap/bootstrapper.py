@@ -1,27 +1,228 @@
 import json
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+from django.db import connection, transaction
+
+from .checkpoints import Checkpoints, get_chunk
+from .fingerprints import Ledger, get_digest
+from .loaders import StreamingSource, open_source
+from .utils import VersionRegistry
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_dependencies(components):
+    """Return dict of components each of `components` depends on.
+    Dependencies which aren't in `components` are ignored, their data
+    has to be there from an earlier run."""
+    by_name = {component.field_name: component for component in components}
+    return {
+        component: [
+            by_name[name]
+            for name in getattr(component, "depends_on", ())
+            if name in by_name and by_name[name] is not component
+        ]
+        for component in components
+    }
+
+
+def sort_components(components):
+    """Return `components` in topological order of their dependencies.
+    Components which don't depend on each other keep their order."""
+    dependencies = get_dependencies(components)
+    dependants = {component: [] for component in components}
+    remaining = {}
+    for component, depends_on in dependencies.items():
+        remaining[component] = len(depends_on)
+        for dependency in depends_on:
+            dependants[dependency].append(component)
+    ready = deque(component for component in components if not remaining[component])
+    order = []
+    while ready:
+        component = ready.popleft()
+        order.append(component)
+        for dependant in dependants[component]:
+            remaining[dependant] -= 1
+            if not remaining[dependant]:
+                ready.append(dependant)
+    if len(order) != len(components):
+        raise ValueError(
+            "Circular dependency between components: {}.".format(
+                ", ".join(
+                    component.field_name for component in components if remaining[component]
+                )
+            )
+        )
+    return order
 
 
 class Bootstrap:
-    def __init__(self, file):
+    def __init__(self, file, **options):
+        self.options = options
+        self.versions = VersionRegistry()
+        self.ledger = None
+        self.digest = None
+        self.source = source = getattr(file, "name", None)
+        if options.get("fingerprint") and source:
+            self.ledger = Ledger(source, force=options.get("force", False))
         self.load(file)
 
     @classmethod
-    def from_file(cls, filename):
+    def from_file(cls, filename, **options):
+        if options.get("stream"):
+            # Sections are read while components run, the source
+            # closes the file once it's been read to the end
+            return Bootstrap(open_source(filename), **options)
         with open(filename) as f:
-            return Bootstrap(f)
+            return Bootstrap(f, **options)
 
     def __call__(self, *components):
-        for component in components:
+        order = sort_components(components)
+        if self.ledger is not None and self.digest:
+            # Source digest depends on which components run
+            digest = get_digest(self.digest, [component.field_name for component in order])
+            if self.ledger.is_unchanged("", digest):
+                logger.info("Skipping unchanged %s", self.ledger.source)
+                return
+        self.run(order)
+        if self.ledger is not None and self.digest:
+            self.ledger.save("", digest)
+
+    def run(self, order):
+        if self.options.get("chunk_size"):
+            self.run_chunked(order)
+            return
+        if self.options.get("concurrent"):
+            if self.can_run_concurrently():
+                self.run_concurrently(order)
+                return
+            logger.warning(
+                "Components can't run concurrently with %s backend or inside "
+                "a transaction, running them one by one.",
+                connection.vendor,
+            )
+        for component in order:
             self.each(component)
 
+    def plan(self, *components):
+        """Return what `components` would create or skip (see
+        `Component.plan`) by field name, without writing anything."""
+        report = {}
+        for component_class in sort_components(components):
+            component = component_class(self, **self.options)
+            name = component.field_name
+            setattr(self, name, component)
+            component.load(self.data(name))
+            report[name] = component.plan()
+        return report
+
+    def can_run_concurrently(self):
+        """Each thread uses its own connection, which doesn't see
+        uncommitted data of other connections, and SQLite allows
+        only one writer at a time."""
+        return connection.vendor != "sqlite" and not connection.in_atomic_block
+
+    def run_concurrently(self, components):
+        """Run components in threads as soon as components they depend on
+        are done. Each component runs in its own transaction."""
+        dependencies = get_dependencies(components)
+        done = set()
+        running = {}
+        with ThreadPoolExecutor() as executor:
+            while len(done) < len(components):
+                for component in components:
+                    if (
+                        component not in done
+                        and component not in running.values()
+                        and all(dependency in done for dependency in dependencies[component])
+                    ):
+                        running[executor.submit(self.each_in_thread, component)] = component
+                finished = wait(running, return_when=FIRST_COMPLETED).done
+                for future in finished:
+                    # Re-raise errors of components
+                    future.result()
+                    done.add(running.pop(future))
+
+    def each_in_thread(self, component_class):
+        try:
+            with transaction.atomic():
+                self.each(component_class)
+        finally:
+            connection.close()
+
+    def run_chunked(self, order):
+        """Run components on `chunk_size` entries of their data at a time,
+        each chunk in its own transaction. Progress is saved with each
+        chunk, with `resume` a failed run continues after the last
+        committed chunk."""
+        checkpoints = Checkpoints(
+            self.source, self.digest, resume=self.options.get("resume", False)
+        )
+        for component_class in order:
+            with self.profile(component_class):
+                self.each_chunked(component_class, checkpoints)
+        checkpoints.finish()
+
+    def each_chunked(self, component_class, checkpoints):
+        component = component_class(self, **self.options)
+        name = component.field_name
+        setattr(self, name, component)
+        component.load(self.data(name))
+        entries = component.raw_data
+        offset = checkpoints.restore(component)
+        if offset is None:
+            logger.info("Skipping %s of %s, done in an earlier run", name, self.source)
+            return
+        if not component.chunked:
+            with transaction.atomic():
+                component(entries)
+                checkpoints.save(component)
+            return
+        size = self.options["chunk_size"]
+        for start in range(offset, len(entries), size):
+            with transaction.atomic():
+                component(get_chunk(entries, start, size))
+                end = start + size
+                checkpoints.save(component, end if end < len(entries) else None)
+        if offset >= len(entries):
+            checkpoints.save(component)
+        component.raw_data = entries
+
+    def profile(self, component_class):
+        profiler = self.options.get("profiler")
+        if profiler is None:
+            return nullcontext()
+        return profiler.measure(self.source or "-", component_class.field_name)
+
     def each(self, component_class):
-        component = component_class(self)
+        component = component_class(self, **self.options)
         name = component.field_name
         setattr(self, name, component)
-        component(self.data(name))
+        raw_data = self.data(name)
+        # Fingerprint bookkeeping isn't part of the component's profile
+        if self.ledger is None or not self.ledger.restore(self, component, raw_data):
+            with self.profile(component_class):
+                component(raw_data)
+            if self.ledger is not None:
+                self.ledger.record(component)
+        if self.options.get("stream"):
+            # Only the objects created by the component are needed now
+            component.raw_data = None
+            self.raw_data.discard(name)
 
     def load(self, file):
-        self.raw_data = json.load(file)
+        if self.options.get("stream"):
+            self.raw_data = StreamingSource(file)
+        elif self.ledger or self.options.get("chunk_size"):
+            text = file.read()
+            self.digest = get_digest(text)
+            self.raw_data = json.loads(text)
+        else:
+            self.raw_data = json.load(file)
 
     def data(self, name):
         return self.raw_data.get(name)
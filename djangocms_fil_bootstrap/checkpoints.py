@@ -0,0 +1,68 @@
+import logging
+from itertools import islice
+
+from .fingerprints import get_registry, load_registry
+from .models import Checkpoint
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_chunk(entries, start, size):
+    """Return `size` entries of a list or dict from `start`."""
+    if isinstance(entries, dict):
+        return dict(islice(entries.items(), start, start + size))
+    return entries[start:start + size]
+
+
+class Checkpoints:
+    """Progress of a chunked run of a data source, saved in the same
+    transaction as each chunk, so that a failed run can be resumed
+    from the last committed chunk.
+
+    With `resume`, the checkpoint of an earlier run of the same source
+    is used, if the source hasn't changed since. Otherwise the run
+    starts over.
+    """
+
+    def __init__(self, source, digest, resume=False):
+        if not source:
+            raise ValueError("Chunked runs need a data source with a name.")
+        self.source = source
+        self.digest = digest
+        checkpoint = Checkpoint.objects.filter(source=source).first()
+        if checkpoint is not None and resume and checkpoint.digest != digest:
+            logger.warning("%s changed since the last run, starting over.", source)
+        if checkpoint is None or not resume or checkpoint.digest != digest:
+            self.progress = {}
+        else:
+            self.progress = checkpoint.progress
+
+    def restore(self, component):
+        """Set `component.data` to the objects created by an earlier
+        run. Returns offset of the first entry to create, or None if
+        the section is done."""
+        progress = self.progress.get(component.field_name)
+        if progress is None or progress["registry"] is None:
+            # Objects can't be restored, start the section over
+            return 0
+        data = load_registry(progress["registry"])
+        if data is None:
+            return 0
+        component.data = data
+        return progress["offset"]
+
+    def save(self, component, offset=None):
+        """Record that entries of the component up to `offset` (all of
+        them, if None) have been created."""
+        self.progress[component.field_name] = {
+            "registry": get_registry(component.data),
+            "offset": offset,
+        }
+        Checkpoint.objects.update_or_create(
+            source=self.source,
+            defaults={"digest": self.digest, "progress": self.progress},
+        )
+
+    def finish(self):
+        Checkpoint.objects.filter(source=self.source).delete()
@@ -1,6 +1,7 @@
 from .base import Component
 from .collections import Collections
 from .groups import Groups
+from .history import History
 from .pages import Pages
 from .permissions import Permissions
 from .users import Users
@@ -15,4 +16,5 @@ __all__ = [
     "Users",
     "Workflows",
     "Collections",
+    "History",
 ]
@@ -1,6 +1,16 @@
 from abc import ABCMeta, abstractmethod
 
 
+def diff(names, existing):
+    """Split `names` into the ones to create and the ones that exist
+    already (skipped), as returned by `Component.plan`."""
+    names = list(dict.fromkeys(names))
+    return {
+        "create": [name for name in names if name not in existing],
+        "skip": [name for name in names if name in existing],
+    }
+
+
 class Component(metaclass=ABCMeta):
     """
     This class should be extended for each model processor
@@ -21,16 +31,45 @@ class Component(metaclass=ABCMeta):
     """
     default_factory = None
 
-    def __init__(self, bootstrap):
+    """Field names of components whose data this component uses.
+    Components run after the ones they depend on, components which
+    don't depend on each other can run concurrently.
+    """
+    depends_on = ()
+
+    """Other keys of the data source the component reads
+    with `self.bootstrap.data`.
+    """
+    data_fields = ()
+
+    """Whether entries of the data are independent of earlier entries
+    (other than through `self.data`), so the component can run on
+    chunks of them, each in its own transaction.
+    """
+    chunked = False
+
+    """Whether `parse` always creates new objects instead of reusing
+    existing ones, so running it again duplicates them. With
+    fingerprints, such components aren't run again when only components
+    they depend on have changed, and a change of their own section
+    is an error unless forced.
+    """
+    creates_only = False
+
+    def __init__(self, bootstrap, **options):
         self.bootstrap = bootstrap
+        self.options = options
         self.data = {}
         self.raw_data = None
 
     def __call__(self, raw_data):
+        self.load(raw_data)
+        self.parse()
+
+    def load(self, raw_data):
         if raw_data is None and self.default_factory:
             raw_data = self.default_factory()
         self.raw_data = raw_data
-        self.parse()
 
     def __getitem__(self, name):
         return self.data[name]
@@ -40,5 +79,17 @@ class Component(metaclass=ABCMeta):
         """Component logic goes here.
 
         `self.raw_data` contains data from `self.field_name`
-        key in the data source.
+        key in the data source. `self.options` contains run options
+        passed to the bootstrap (e.g. `bulk=True`).
+        """
+
+    def plan(self):
+        """Return objects and links `parse` would create or skip,
+        without writing to the database, as a dict of
+        `{kind: {"create": [...], "skip": [...]}}` (see `diff`).
+
+        Components of the plan run don't create objects, so other
+        components can only be used through their `raw_data`.
+        Returns None if the component doesn't support planning.
         """
+        return None
@@ -1,26 +1,150 @@
-from djangocms_moderation.models import ModerationCollection
+from djangocms_moderation.models import (
+    ModerationCollection,
+    ModerationRequest,
+    ModerationRequestTreeNode,
+)
 
-from ..utils import get_version
-from .base import Component
+from ..utils import bulk_create, iter_in
+from .base import Component, diff
 
 
 class Collections(Component):
     field_name = "collections"
     default_factory = dict
+    chunked = True
+    depends_on = ("users", "workflows", "pages")
 
     def parse(self):
         """Create ModerationCollection objects from the dict data. If
         a ModerationCollection object with the specified name attribute
         already exists in the db, do not change it.
         """
+        if self.options.get("bulk"):
+            self.bulk()
+            return
+        created_collections = []
         for name, data in self.raw_data.items():
-            collection_data = {
-                "author": self.bootstrap.users[data["user"]],
-                "workflow": self.bootstrap.workflows[data["workflow"]],
-            }
             collection, created = ModerationCollection.objects.get_or_create(
-                name=data["name"], defaults=collection_data)
+                name=data["name"], defaults=self.get_collection_data(data))
             if created:
-                for page in data.get("pages", []):
-                    collection.add_version(get_version(self.bootstrap.pages[page]))
+                created_collections.append((collection, self.get_pages(data)))
             self.data[name] = collection
+        self.add_versions(created_collections)
+
+    def get_collection_data(self, data):
+        return {
+            "author": self.bootstrap.users[data["user"]],
+            "workflow": self.bootstrap.workflows[data["workflow"]],
+        }
+
+    def get_pages(self, data):
+        return [self.bootstrap.pages[page] for page in data.get("pages", [])]
+
+    def add_versions(self, collections):
+        """Add versions of pages to newly created collections.
+
+        Versions of pages created in this run come from the version
+        registry, the rest is loaded in one batch.
+        """
+        versions = self.bootstrap.versions
+        versions.prefetch(page for collection, pages in collections for page in pages)
+        for collection, pages in collections:
+            for page in pages:
+                collection.add_version(versions.get(page))
+
+    def bulk(self):
+        """Same as `parse`, with bulk queries. Existing collections are
+        fetched with one lookup, missing ones are inserted with one insert
+        and their moderation requests with `bulk_add_versions`."""
+        names = {data["name"] for data in self.raw_data.values()}
+        collections = {
+            collection.name: collection
+            for collection in ModerationCollection.objects.filter(name__in=names)
+        }
+        new = {}
+        for data in self.raw_data.values():
+            if data["name"] not in collections and data["name"] not in new:
+                new[data["name"]] = (
+                    ModerationCollection(name=data["name"], **self.get_collection_data(data)),
+                    self.get_pages(data),
+                )
+        created = bulk_create(
+            ModerationCollection, [collection for collection, pages in new.values()], "name"
+        )
+        collections.update(created)
+        self.bulk_add_versions(new.values())
+        for name, data in self.raw_data.items():
+            self.data[name] = collections[data["name"]]
+
+    def bulk_add_versions(self, collections):
+        """Same as `add_versions`, with bulk inserts.
+
+        Creates the moderation requests, same as
+        `ModerationCollection.add_version`, with one insert and their
+        (root) tree nodes with another one.
+        """
+        versions = self.bootstrap.versions
+        versions.prefetch(page for collection, pages in collections for page in pages)
+        requests = {}
+        for collection, pages in collections:
+            for page in pages:
+                version = versions.get(page)
+                key = (collection.pk, version.pk)
+                if key not in requests:
+                    requests[key] = ModerationRequest(
+                        collection=collection,
+                        version=version,
+                        author=collection.author,
+                        is_active=True,
+                    )
+        if not requests:
+            return
+        ModerationRequest.objects.bulk_create(requests.values())
+        if any(request.pk is None for request in requests.values()):
+            ids = iter_in(
+                ModerationRequest.objects.values_list("collection_id", "version_id", "pk"),
+                "collection_id",
+                {collection.pk for collection, pages in collections},
+            )
+            for collection_id, version_id, pk in ids:
+                if (collection_id, version_id) in requests:
+                    requests[collection_id, version_id].pk = pk
+        self.add_root_nodes(requests.values())
+
+    def add_root_nodes(self, requests):
+        last = ModerationRequestTreeNode.get_last_root_node()
+        step = 0
+        if last is not None:
+            step = ModerationRequestTreeNode._str2int(
+                last.path[-ModerationRequestTreeNode.steplen:]
+            )
+        nodes = []
+        for step, request in enumerate(requests, start=step + 1):
+            nodes.append(
+                ModerationRequestTreeNode(
+                    moderation_request=request,
+                    path=ModerationRequestTreeNode._get_path(None, 1, step),
+                    depth=1,
+                    numchild=0,
+                )
+            )
+        ModerationRequestTreeNode.objects.bulk_create(nodes)
+
+    def plan(self):
+        names = [data["name"] for data in self.raw_data.values()]
+        existing = set(
+            ModerationCollection.objects.filter(name__in=names).values_list("name", flat=True)
+        )
+        return {
+            "collections": diff(names, existing),
+            # Pages are only added to new collections
+            "requests": {
+                "create": [
+                    "{} -> {}".format(data["name"], page)
+                    for data in self.raw_data.values()
+                    if data["name"] not in existing
+                    for page in data.get("pages", [])
+                ],
+                "skip": [],
+            },
+        }
@@ -1,19 +1,73 @@
 from django.contrib.auth.models import Group
 
-from .base import Component
+from ..utils import bulk_create
+from .base import Component, diff
 
 
 class Groups(Component):
     field_name = "groups"
     default_factory = dict
+    chunked = True
+    depends_on = ("users",)
 
     def parse(self):
+        groups = self.get_groups([data["name"] for data in self.raw_data.values()])
+        memberships = set()
         for name, data in self.raw_data.items():
-            group, created = Group.objects.get_or_create(name=data["name"])
+            group = groups[data["name"]]
             for username in data.get("users", []):
-                self.add_user_to_group(group, username)
+                memberships.add((self.bootstrap.users[username].pk, group.pk))
             self.data[name] = group
+        self.add_memberships(memberships)
 
-    def add_user_to_group(self, group, username):
-        user = self.bootstrap.users[username]
-        user.groups.add(group)
+    def get_groups(self, names):
+        """Return groups keyed by name. Missing groups are created
+        with a single insert."""
+        groups = Group.objects.in_bulk(names, field_name="name")
+        missing = [
+            Group(name=name) for name in dict.fromkeys(names) if name not in groups
+        ]
+        groups.update(bulk_create(Group, missing, "name"))
+        return groups
+
+    def add_memberships(self, memberships):
+        """Add users to groups with a single insert. `memberships`
+        is a set of (user pk, group pk) pairs, pairs that already
+        exist in the db are ignored."""
+        field = Group.user_set.field
+        through = field.remote_field.through
+        user_field = field.m2m_field_name()
+        group_field = field.m2m_reverse_field_name()
+        through.objects.bulk_create(
+            [
+                through(**{user_field + "_id": user_pk, group_field + "_id": group_pk})
+                for user_pk, group_pk in memberships
+            ],
+            ignore_conflicts=True,
+        )
+
+    def plan(self):
+        names = [data["name"] for data in self.raw_data.values()]
+        memberships = [
+            (username, data["name"])
+            for data in self.raw_data.values()
+            for username in data.get("users", [])
+        ]
+        field = Group.user_set.field
+        user_field = field.m2m_field_name()
+        group_field = field.m2m_reverse_field_name()
+        existing = field.remote_field.through.objects.filter(
+            **{
+                user_field + "__username__in": {user for user, group in memberships},
+                group_field + "__name__in": names,
+            }
+        ).values_list(user_field + "__username", group_field + "__name")
+        return {
+            "groups": diff(
+                names, set(Group.objects.filter(name__in=names).values_list("name", flat=True))
+            ),
+            "memberships": diff(
+                ["{} -> {}".format(*membership) for membership in memberships],
+                {"{} -> {}".format(*membership) for membership in existing},
+            ),
+        }
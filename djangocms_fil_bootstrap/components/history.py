@@ -0,0 +1,200 @@
+from collections import defaultdict
+from itertools import cycle
+
+from djangocms_moderation.constants import (
+    ACTION_APPROVED,
+    ACTION_REJECTED,
+    ACTION_STARTED,
+    IN_REVIEW,
+)
+from djangocms_moderation.models import (
+    CollectionComment,
+    ModerationCollection,
+    ModerationRequest,
+    ModerationRequestAction,
+    WorkflowStep,
+)
+
+from .base import Component, diff
+
+
+class History(Component):
+    """Moderation history of collections created by `Collections`.
+
+    Each entry is keyed by collection name and describes the history
+    in numbers rather than listing each action:
+
+        "history": {
+            "collection1": {
+                "submitted_by": "publisher",
+                "approvals": 50,
+                "rejections": 5,
+                "comments": 10,
+                "comment_authors": ["reviewer", "publisher"]
+            }
+        }
+
+    Collections are submitted for review (moved to IN_REVIEW with a
+    start action for each request). Approvals are spread over requests
+    round-robin and approve the workflow steps of each request in order,
+    so they are spread across the workflow roles; approvals beyond the
+    last step of every request are dropped. Rejections are made by
+    the role of the next step of each request. Comments are authored
+    in turns by `comment_authors`.
+
+    All actions and comments are written with one insert per model.
+    Collections which already have actions are left unchanged.
+    """
+
+    field_name = "history"
+    default_factory = dict
+    chunked = True
+    depends_on = ("users", "collections")
+
+    def __init__(self, bootstrap, **options):
+        super().__init__(bootstrap, **options)
+        self.reviewers = {}
+
+    def parse(self):
+        collections = {name: self.bootstrap.collections[name] for name in self.raw_data}
+        seeded = set(
+            ModerationRequestAction.objects.filter(
+                moderation_request__collection__in=collections.values()
+            ).values_list("moderation_request__collection_id", flat=True)
+        )
+        new = {
+            name: collection
+            for name, collection in collections.items()
+            if collection.pk not in seeded
+        }
+        requests = defaultdict(list)
+        for request in ModerationRequest.objects.filter(
+            collection__in=new.values()
+        ).order_by("pk"):
+            requests[request.collection_id].append(request)
+        steps = self.get_steps({collection.workflow_id for collection in new.values()})
+        actions = []
+        comments = []
+        for name, collection in new.items():
+            data = self.raw_data[name]
+            submitted_by = collection.author
+            if "submitted_by" in data:
+                submitted_by = self.bootstrap.users[data["submitted_by"]]
+            collection_requests = requests[collection.pk]
+            actions.extend(
+                self.get_submit_actions(
+                    collection_requests, submitted_by, steps[collection.workflow_id]
+                )
+            )
+            actions.extend(
+                self.get_review_actions(
+                    collection,
+                    collection_requests,
+                    steps[collection.workflow_id],
+                    data.get("approvals", 0),
+                    data.get("rejections", 0),
+                )
+            )
+            authors = [
+                self.bootstrap.users[author] for author in data.get("comment_authors", [])
+            ] or [submitted_by]
+            comments.extend(
+                self.get_comments(collection, authors, data.get("comments", 0))
+            )
+        ModerationCollection.objects.filter(
+            pk__in=[collection.pk for collection in new.values()]
+        ).update(status=IN_REVIEW)
+        ModerationRequestAction.objects.bulk_create(actions)
+        CollectionComment.objects.bulk_create(comments)
+        for name, collection in collections.items():
+            if name in new:
+                collection.status = IN_REVIEW
+            self.data[name] = collection
+
+    def get_steps(self, workflow_ids):
+        """Return workflow steps, in order, by workflow pk."""
+        steps = defaultdict(list)
+        for step in (
+            WorkflowStep.objects.filter(workflow__in=workflow_ids)
+            .select_related("role__user", "role__group")
+            .order_by("order", "pk")
+        ):
+            steps[step.workflow_id].append(step)
+        return steps
+
+    def get_reviewer(self, role, default):
+        """User acting on behalf of `role`: its user, the first member
+        of its group, or `default` if the role has neither."""
+        if role.pk not in self.reviewers:
+            reviewer = role.user
+            if reviewer is None and role.group is not None:
+                reviewer = role.group.user_set.order_by("pk").first()
+            self.reviewers[role.pk] = reviewer or default
+        return self.reviewers[role.pk]
+
+    def get_submit_actions(self, requests, user, steps):
+        # Submitted requests go to the role of the first step, same as
+        # `ModerationRequestAction.save` sets it
+        to_role = steps[0].role if steps else None
+        return [
+            ModerationRequestAction(
+                moderation_request=request,
+                by_user=user,
+                to_role=to_role,
+                action=ACTION_STARTED,
+            )
+            for request in requests
+        ]
+
+    def get_review_actions(self, collection, requests, steps, approvals, rejections):
+        actions = []
+        if not requests or not steps:
+            return actions
+        approved = defaultdict(int)
+        approvals = min(approvals, len(requests) * len(steps))
+        for index, request in zip(range(approvals), cycle(requests)):
+            step = steps[approved[request.pk]]
+            approved[request.pk] += 1
+            next_step = None
+            if approved[request.pk] < len(steps):
+                next_step = steps[approved[request.pk]]
+            actions.append(
+                ModerationRequestAction(
+                    moderation_request=request,
+                    by_user=self.get_reviewer(step.role, collection.author),
+                    to_role=next_step.role if next_step else None,
+                    step_approved=step,
+                    action=ACTION_APPROVED,
+                    message="Approved",
+                )
+            )
+        for index, request in zip(range(rejections), cycle(requests)):
+            step = steps[min(approved[request.pk], len(steps) - 1)]
+            actions.append(
+                ModerationRequestAction(
+                    moderation_request=request,
+                    by_user=self.get_reviewer(step.role, collection.author),
+                    to_user=collection.author,
+                    action=ACTION_REJECTED,
+                    message="Rejected",
+                )
+            )
+        return actions
+
+    def get_comments(self, collection, authors, count):
+        return [
+            CollectionComment(
+                collection=collection,
+                author=author,
+                message="Comment {}".format(index + 1),
+            )
+            for index, author in zip(range(count), cycle(authors))
+        ]
+
+    def plan(self):
+        collections = self.bootstrap.collections.raw_data or {}
+        names = [collections[name]["name"] for name in self.raw_data]
+        seeded = ModerationRequestAction.objects.filter(
+            moderation_request__collection__name__in=names
+        ).values_list("moderation_request__collection__name", flat=True)
+        return {"history": diff(names, set(seeded))}
@@ -1,37 +1,310 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, transaction
+from django.utils.text import slugify
+
 from cms.api import add_plugin, assign_user_to_page, create_page
+from cms.cache.permissions import clear_permission_cache
+from cms.models import ACCESS_PAGE_AND_DESCENDANTS, Page, PagePermission
+
+from ..page_builder import PageTreeBuilder, get_order
+from ..plugins import PluginTreeBuilder
+from ..profiling import QueryCounter
+from ..publishing import Publisher
+from ..utils import capture_versions
+from .base import Component, diff
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_subtree_key(name, pages):
+    """Return what the subtree of page `name` conflicts with: the slug
+    of its new root page, or the existing page it's created under."""
+    seen = {name}
+    parent = pages[name].get("parent")
+    while isinstance(parent, str) and parent in pages and parent not in seen:
+        name = parent
+        seen.add(name)
+        parent = pages[name].get("parent")
+    if parent is None:
+        return "root", pages[name].get("slug") or slugify(pages[name]["title"])
+    if isinstance(parent, str):
+        return "parent", parent
+    return "page", parent.pk
+
+
+def split_pages(pages, workers):
+    """Split names of `pages` into at most `workers` lists of independent
+    subtrees of similar size, keeping the order of the pages."""
+    subtrees = defaultdict(list)
+    for name in pages:
+        subtrees[get_subtree_key(name, pages)].append(name)
+    shares = [[] for i in range(workers)]
+    for names in sorted(subtrees.values(), key=len, reverse=True):
+        min(shares, key=len).extend(names)
+    order = {name: index for index, name in enumerate(pages)}
+    return [sorted(share, key=order.get) for share in shares if share]
+
+
+def create_pages(entries, root_steps):
+    """Create pages in a worker process, with `PageTreeBuilder` and
+    `PluginTreeBuilder`. `created_by` of `entries` is a user pk and
+    `content` the plugins of the page. Returns page pks by name and
+    the number of queries, their time and inserted rows."""
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        ids = _create_pages(entries, root_steps)
+    return ids, (counter.queries, counter.time, counter.rows)
 
-from ..utils import get_version
-from .base import Component
+
+def _create_pages(entries, root_steps):
+    users = get_user_model()._base_manager.in_bulk(
+        {data["created_by"] for data in entries.values()}
+    )
+    with transaction.atomic():
+        builder = PageTreeBuilder(root_steps=root_steps)
+        contents = {}
+        for name, data in entries.items():
+            data = dict(data, created_by=users[data["created_by"]])
+            contents[name] = data.pop("content")
+            builder.add(name, data)
+        pages = builder.save()
+        plugins = PluginTreeBuilder()
+        for name, content in contents.items():
+            if content:
+                placeholder = builder.placeholders[name]["content"]
+                plugins.add(placeholder, content, entries[name]["language"])
+        plugins.save()
+    return {name: page.pk for name, page in pages.items()}
 
 
 class Pages(Component):
     field_name = "pages"
     default_factory = dict
+    chunked = True
+    creates_only = True
+    depends_on = ("users",)
+
+    def __init__(self, bootstrap, **options):
+        super().__init__(bootstrap, **options)
+        self.publisher = Publisher(signals=not options.get("skip_publish_signals"))
+        # Skipping publish signals needs the deferred stage
+        self.defer_publish = bool(
+            options.get("defer_publish") or options.get("skip_publish_signals")
+        )
+        self.permissions = []
+
+    def load(self, raw_data):
+        super().load(raw_data)
+        if self.options.get("bulk") or self.options.get("workers"):
+            # Chunks are created one after another, parents have to be
+            # in the same chunk as their children or an earlier one
+            order = get_order(self.raw_data, self.data)
+            self.raw_data = {name: self.raw_data[name] for name in order}
 
     def parse(self):
-        for name, data in self.raw_data.items():
-            self.each(name, data)
+        workers = self.options.get("workers") or 1
+        if workers > 1 and not self.bootstrap.can_run_concurrently():
+            logger.warning(
+                "Pages can't be created by workers with %s backend or inside "
+                "a transaction, creating them in this process.",
+                connection.vendor,
+            )
+            workers = 1
+        if workers > 1:
+            self.parallel(workers)
+        elif self.options.get("bulk") or self.options.get("workers"):
+            self.bulk()
+        else:
+            for name, data in self.raw_data.items():
+                self.each(name, data)
+        self.save_assignments()
+        if self.defer_publish:
+            # Pages are published once all of them exist
+            self.publisher.publish()
+
+    def prepare_each(self, data):
+        """Take out data that isn't passed to `create_page`."""
+        extra = {
+            "is_home": data.pop("is_home", False),
+            "publish": data.pop("publish", False),
+            "assignments": data.pop("assignments", []),
+            "content": data.pop("content", []),
+        }
+        data["created_by"] = self.bootstrap.users[data["created_by"]]
+        return extra
 
     def each(self, name, data):
-        is_home = data.pop("is_home", False)
+        extra = self.prepare_each(data)
         language = data["language"]
-        publish = data.pop("publish", False)
-        assignments = data.pop("assignments", [])
-        content = data.pop("content", [])
-        data["created_by"] = self.bootstrap.users[data["created_by"]]
-        page = create_page(**data)
-        if is_home:
+        if "parent" in data:
+            if data["parent"] not in self.data:
+                raise ValueError(
+                    "Unknown parent {} of page {}, parents have to be listed "
+                    "before their children.".format(data["parent"], name)
+                )
+            data["parent"] = self.data[data["parent"]]
+        with capture_versions() as versions:
+            page = create_page(**data)
+        if extra["is_home"]:
             page.set_as_homepage()
-        version = get_version(page)
+        # Version of the new content, without looking it up again
+        version = next(
+            version for version in versions if version.content.page_id == page.pk
+        )
+        self.bootstrap.versions.add(page, version)
         placeholder = version.content.get_placeholders().get(slot="content")
+        self.add_assignments(page, extra["assignments"])
+        if self.options.get("bulk"):
+            self.add_plugins(placeholder, extra["content"], language)
+        else:
+            for plugin in extra["content"]:
+                self.add_plugin(placeholder, plugin, language)
+        if extra["publish"]:
+            self.publish(version, data["created_by"])
+        self.data[name] = page
+
+    def bulk(self):
+        """Create all pages, including their content, with bulk inserts.
+
+        `parent` of a page can reference another page of the data source
+        by name.
+        """
+        builder = PageTreeBuilder()
+        extras = {}
+        for name, data in self.raw_data.items():
+            extras[name] = self.prepare_each(data)
+            if data.get("parent") in self.data:
+                # Created by an earlier chunk
+                data["parent"] = self.data[data["parent"]]
+            builder.add(name, data)
+        pages = builder.save()
+        plugins = PluginTreeBuilder()
+        for name, data in self.raw_data.items():
+            content = extras[name]["content"]
+            if content:
+                placeholder = builder.placeholders[name]["content"]
+                plugins.add(placeholder, content, data["language"])
+        plugins.save()
+        for name, data in self.raw_data.items():
+            self.add_page(name, data, pages[name], builder.versions[name], extras[name])
+
+    def parallel(self, workers):
+        """Same as `bulk`, with pages created by `workers` processes.
+
+        Subtrees which don't depend on each other (root pages with
+        different slugs and their descendants, or descendants of
+        different existing pages) are split between the workers. Paths
+        of new root pages are reserved up front, so the workers' trees
+        don't overlap. Each worker uses a connection and transaction
+        of its own.
+        """
+        extras = {}
+        entries = {}
+        for name, data in self.raw_data.items():
+            extras[name] = self.prepare_each(data)
+            entries[name] = dict(
+                data, created_by=data["created_by"].pk, content=extras[name]["content"]
+            )
+        last = PageTreeBuilder().get_last_step(None)
+        roots = [name for name, data in self.raw_data.items() if data.get("parent") is None]
+        root_steps = {name: last + step for step, name in enumerate(roots, 1)}
+        shares = split_pages(self.raw_data, workers)
+        # Forked workers mustn't share connections of this process
+        connections.close_all()
+        ids = {}
+        profiler = self.options.get("profiler")
+        with ProcessPoolExecutor(max_workers=len(shares), initializer=django.setup) as executor:
+            for result, counts in executor.map(
+                create_pages,
+                [{name: entries[name] for name in share} for share in shares],
+                [
+                    {name: root_steps[name] for name in share if name in root_steps}
+                    for share in shares
+                ],
+            ):
+                ids.update(result)
+                if profiler is not None:
+                    # Queries of the workers aren't made by this process
+                    profiler.add(*counts)
+        pages = Page._base_manager.in_bulk(ids.values())
+        pages = {name: pages[pk] for name, pk in ids.items()}
+        self.bootstrap.versions.prefetch(pages.values())
+        for name, data in self.raw_data.items():
+            page = pages[name]
+            self.add_page(name, data, page, self.bootstrap.versions.get(page), extras[name])
+
+    def add_page(self, name, data, page, version, extra):
+        """Register a page created in bulk and collect its homepage,
+        assignments and publishing."""
+        self.bootstrap.versions.add(page, version)
+        if extra["is_home"]:
+            page.set_as_homepage()
+        self.add_assignments(page, extra["assignments"])
+        if extra["publish"]:
+            self.publish(version, data["created_by"])
+        self.data[name] = page
+
+    def publish(self, version, user):
+        """Publish the version, or queue it on the publisher when
+        publishing is deferred."""
+        if self.defer_publish:
+            self.publisher.add(version, user)
+        else:
+            version.publish(user)
+
+    def add_assignments(self, page, assignments):
+        """Collect page permissions of users, these are written
+        with `save_assignments`."""
         for assignment in assignments:
             assignment["user"] = self.bootstrap.users[assignment["user"]]
-            assign_user_to_page(page, **assignment)
-        for plugin in content:
-            self.add_plugin(placeholder, plugin, language)
-        if publish:
-            version.publish(data["created_by"])
-        self.data[name] = page
+            if assignment.get("global_permission"):
+                # Global permissions also need sites, these are rare enough
+                # to be created one by one
+                assign_user_to_page(page, **assignment)
+            else:
+                self.permissions.append(self.get_page_permission(page, **assignment))
+
+    def get_page_permission(
+        self,
+        page,
+        user,
+        grant_on=ACCESS_PAGE_AND_DESCENDANTS,
+        grant_all=False,
+        global_permission=False,
+        **permissions
+    ):
+        """Return unsaved page permission, same as the one created
+        by `cms.api.assign_user_to_page`."""
+        fields = [
+            field.name
+            for field in PagePermission._meta.concrete_fields
+            if field.name.startswith("can_")
+        ]
+        data = {name: bool(permissions.pop(name, False)) or grant_all for name in fields}
+        unknown = [name for name in permissions if not name.startswith("can_")]
+        if unknown:
+            raise TypeError(
+                "Unexpected page permission arguments: {}.".format(", ".join(unknown))
+            )
+        return PagePermission(page=page, user=user, grant_on=grant_on, **data)
+
+    def save_assignments(self):
+        """Insert collected page permissions with a single insert.
+
+        Saving page permissions one by one clears the permission cache
+        each time, here it's cleared once at the end.
+        """
+        if not self.permissions:
+            return
+        PagePermission.objects.bulk_create(self.permissions)
+        self.permissions = []
+        clear_permission_cache()
 
     def add_plugin(self, placeholder, plugin_data, language, parent=None):
         type_ = plugin_data.pop("type")
@@ -39,3 +312,33 @@ class Pages(Component):
         plugin = add_plugin(placeholder, type_, language, target=parent, **plugin_data)
         for child in children:
             self.add_plugin(placeholder, child, language, parent=plugin)
+
+    def add_plugins(self, placeholder, plugins, language):
+        """Add the whole plugin tree with bulk inserts."""
+        builder = PluginTreeBuilder()
+        builder.add(placeholder, plugins, language)
+        builder.save()
+
+    def plan(self):
+        """Pages are always created, there's nothing to skip."""
+        plugins = []
+        assignments = []
+        for name, data in self.raw_data.items():
+            plugins.extend(
+                "{}: {}".format(name, plugin_type)
+                for plugin_type in self.iter_plugin_types(data.get("content", []))
+            )
+            assignments.extend(
+                "{} -> {}".format(name, assignment["user"])
+                for assignment in data.get("assignments", [])
+            )
+        return {
+            "pages": diff(self.raw_data, set()),
+            "plugins": {"create": plugins, "skip": []},
+            "assignments": diff(assignments, set()),
+        }
+
+    def iter_plugin_types(self, plugins):
+        for plugin in plugins:
+            yield plugin["type"]
+            yield from self.iter_plugin_types(plugin.get("children", []))
@@ -1,11 +1,12 @@
 import logging
-from itertools import groupby
+from functools import cached_property
 
-from django.contrib.auth.models import Permission
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
 
-from .base import Component
+from ..utils import bulk_add
+from .base import Component, diff
 
 
 logger = logging.getLogger(__name__)
@@ -24,9 +25,18 @@ def codename(triple):
 class Permissions(Component):
     field_name = "permissions"
     default_factory = dict
+    depends_on = ("users", "groups")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.resolved = {}
+        self.report = {}
 
     def parse(self):
         aliases = self.raw_data.get("aliases", {})
+        if self.options.get("bulk"):
+            self.bulk(aliases)
+            return
         for username, perms in self.raw_data.get("users", {}).items():
             self.add_permissions_to_user(username, perms, aliases)
         for group_name, perms in self.raw_data.get("groups", {}).items():
@@ -35,14 +45,41 @@ class Permissions(Component):
     def add_permissions_to_user(self, username, perms, aliases):
         user = self.bootstrap.users[username]
         user.user_permissions.add(
-            *self.get_permissions(self.resolve_aliases(perms, aliases))
+            *self.get_permission_ids(self.resolve_aliases(perms, aliases))
         )
 
     def add_permissions_to_group(self, group_name, perms, aliases):
         group = self.bootstrap.groups[group_name]
         group.permissions.add(
-            *self.get_permissions(self.resolve_aliases(perms, aliases))
+            *self.get_permission_ids(self.resolve_aliases(perms, aliases))
+        )
+
+    def bulk(self, aliases):
+        """Add permissions to all users and groups with one insert
+        per through table. Number of inserted and skipped (already
+        existing) rows is stored in `self.report`."""
+        user_permissions = {
+            (self.bootstrap.users[username].pk, permission_id)
+            for username, perms in self.raw_data.get("users", {}).items()
+            for permission_id in self.get_permission_ids(
+                self.resolve_aliases(perms, aliases)
+            )
+        }
+        group_permissions = {
+            (self.bootstrap.groups[group_name].pk, permission_id)
+            for group_name, perms in self.raw_data.get("groups", {}).items()
+            for permission_id in self.get_permission_ids(
+                self.resolve_aliases(perms, aliases)
+            )
+        }
+        self.report["users"] = bulk_add(
+            get_user_model().user_permissions.field, user_permissions
         )
+        self.report["groups"] = bulk_add(Group.permissions.field, group_permissions)
+        for name, (inserted, skipped) in self.report.items():
+            logger.info(
+                "Permissions for %s: %d inserted, %d skipped", name, inserted, skipped
+            )
 
     def resolve_aliases(self, perms, aliases):
         for perm in perms:
@@ -54,16 +91,96 @@ class Permissions(Component):
         else:
             return aliases[perm]
 
-    def get_permissions(self, perms):
-        q = Q()
-        perms = sorted(perms, key=natural_key)
-        for key, group in groupby(perms, natural_key):
-            try:
-                ctype = ContentType.objects.get_by_natural_key(*key)
-            except ContentType.DoesNotExist:
-                logger.debug("Missing content type: %(ctype)s", key)
+    @cached_property
+    def content_types(self):
+        """(app_label, model) -> ContentType pk index, built with one query."""
+        return {
+            (app_label, model): pk
+            for pk, app_label, model in ContentType.objects.values_list(
+                "pk", "app_label", "model"
+            )
+        }
+
+    @cached_property
+    def permission_index(self):
+        """(codename, app_label, model) -> Permission pk index,
+        built with one query."""
+        content_types = {pk: key for key, pk in self.content_types.items()}
+        return {
+            (name, *content_types[content_type_id]): pk
+            for pk, name, content_type_id in Permission.objects.values_list(
+                "pk", "codename", "content_type_id"
+            )
+            if content_type_id in content_types
+        }
+
+    def get_permission_ids(self, perms):
+        """Return a frozenset of Permission pks. Results are memoized
+        by the set of permissions, so repeated lists (e.g. the same
+        aliases used by many groups) are resolved only once."""
+        perms = frozenset(tuple(perm) for perm in perms)
+        if perms not in self.resolved:
+            self.resolved[perms] = frozenset(self.lookup_permission_ids(perms))
+        return self.resolved[perms]
+
+    def lookup_permission_ids(self, perms):
+        for perm in perms:
+            if tuple(natural_key(perm)) not in self.content_types:
+                logger.debug("Missing content type: %s", natural_key(perm))
                 continue
-            q |= Q(content_type=ctype, codename__in=[codename(perm) for perm in group])
-        if not q:
+            try:
+                yield self.permission_index[tuple(perm)]
+            except KeyError:
+                logger.debug("Missing permission: %s", codename(perm))
+
+    def get_permissions(self, perms):
+        ids = self.get_permission_ids(perms)
+        if not ids:
             return Permission.objects.none()
-        return Permission.objects.filter(q)
+        return Permission.objects.filter(pk__in=ids)
+
+    def plan(self):
+        aliases = self.raw_data.get("aliases", {})
+        groups = self.bootstrap.groups.raw_data or {}
+        names = {
+            pk: "{}.{}".format(app_label, name)
+            for (name, app_label, model), pk in self.permission_index.items()
+        }
+        user_field = get_user_model().user_permissions.field
+        group_field = Group.permissions.field
+        return {
+            "users": self.plan_links(
+                user_field, "username", self.raw_data.get("users", {}), aliases, names
+            ),
+            "groups": self.plan_links(
+                group_field,
+                "name",
+                {
+                    groups[alias]["name"]: perms
+                    for alias, perms in self.raw_data.get("groups", {}).items()
+                },
+                aliases,
+                names,
+            ),
+        }
+
+    def plan_links(self, field, key, data, aliases, names):
+        """Diff of (user or group, permission) links, `data` is dict
+        of permission lists by `key` field value."""
+        source = field.m2m_field_name()
+        existing = field.remote_field.through.objects.filter(
+            **{source + "__" + key + "__in": data}
+        ).values_list(source + "__" + key, field.m2m_reverse_field_name() + "_id")
+        return diff(
+            [
+                "{} -> {}".format(name, names[permission_id])
+                for name, perms in data.items()
+                for permission_id in sorted(
+                    self.get_permission_ids(self.resolve_aliases(perms, aliases))
+                )
+            ],
+            {
+                "{} -> {}".format(name, names.get(permission_id))
+                for name, permission_id in existing
+            },
+        )
@@ -1,14 +1,34 @@
+from django.contrib.auth import get_user_model
+
 from ..factories import UserFactory
-from .base import Component
+from ..passwords import hash_passwords
+from ..utils import bulk_create
+from .base import Component, diff
 
 
 class Users(Component):
     field_name = "users"
     default_factory = list
+    chunked = True
+    data_fields = ("email_domain",)
 
     def parse(self):
-        for data in self.raw_data:
-            data = self.prepare_each(data)
+        users = [self.prepare_each(data) for data in self.raw_data]
+        if self.options.get("bulk"):
+            self.bulk(users)
+            return
+        if self.options.get("password_hashing"):
+            existing = set(
+                get_user_model()
+                ._default_manager.filter(
+                    username__in=[data["username"] for data in users]
+                )
+                .values_list("username", flat=True)
+            )
+            self.hash_passwords(
+                [data for data in users if data["username"] not in existing]
+            )
+        for data in users:
             self.each(data)
 
     def prepare_each(self, data):
@@ -26,6 +46,59 @@ class Users(Component):
         defaults.update(data)
         return defaults
 
+    def hash_passwords(self, users):
+        """Set `password_hash` with the configured hashing strategy
+        for users that don't have one in the data source.
+        """
+        strategy = self.options.get("password_hashing")
+        if not strategy:
+            return
+        users = [data for data in users if "password_hash" not in data]
+        hashes = hash_passwords([data["password"] for data in users], strategy)
+        for data, password_hash in zip(users, hashes):
+            data["password_hash"] = password_hash
+
     def each(self, data):
         user = UserFactory(**data)
         self.data[user.username] = user
+
+    def bulk(self, users):
+        """Create all missing users with one lookup and one insert.
+
+        Existing users are left untouched, same as in `each`. Unlike
+        `each`, fields missing from the data source (e.g. first name)
+        are not filled with fake data.
+        """
+        model = get_user_model()
+        usernames = [data["username"] for data in users]
+        existing = model._default_manager.in_bulk(usernames, field_name="username")
+        missing = {}
+        for data in users:
+            if data["username"] not in existing:
+                missing[data["username"]] = data
+        self.hash_passwords(missing.values())
+        existing.update(
+            bulk_create(
+                model, [self.build(data) for data in missing.values()], "username"
+            )
+        )
+        for username in usernames:
+            self.data[username] = existing[username]
+
+    def build(self, data):
+        data = dict(data)
+        password = data.pop("password")
+        password_hash = data.pop("password_hash", None)
+        user = get_user_model()(**data)
+        if password_hash is None:
+            user.set_password(password)
+        else:
+            user.password = password_hash
+        return user
+
+    def plan(self):
+        usernames = [self.prepare_each(data)["username"] for data in self.raw_data]
+        existing = get_user_model()._default_manager.filter(
+            username__in=usernames
+        ).values_list("username", flat=True)
+        return {"users": diff(usernames, set(existing))}
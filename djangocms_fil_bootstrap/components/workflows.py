@@ -1,13 +1,19 @@
-from djangocms_moderation.models import Role, Workflow
+from djangocms_moderation.models import Role, Workflow, WorkflowStep
 
-from .base import Component
+from ..utils import bulk_create
+from .base import Component, diff
 
 
 class Workflows(Component):
     field_name = "workflows"
     default_factory = dict
+    depends_on = ("users", "groups")
+    data_fields = ("roles",)
 
     def parse(self):
+        if self.options.get("bulk"):
+            self.bulk_workflows(self.bulk_roles())
+            return
         roles = self.roles()
         self.workflows(roles)
 
@@ -16,12 +22,15 @@ class Workflows(Component):
             name: self.role(data) for name, data in self.bootstrap.data("roles").items()
         }
 
-    def role(self, data):
+    def prepare_role(self, data):
         if "user" in data:
             data["user"] = self.bootstrap.users[data["user"]]
         if "group" in data:
             data["group"] = self.bootstrap.groups[data["group"]]
-        role, created = Role.objects.get_or_create(**data)
+        return data
+
+    def role(self, data):
+        role, created = Role.objects.get_or_create(**self.prepare_role(data))
         return role
 
     def workflows(self, roles):
@@ -36,3 +45,66 @@ class Workflows(Component):
                 step["role"] = roles[step["role"]]
                 workflow.steps.create(**step)
         self.data[name] = workflow
+
+    def get_or_create_by_name(self, model, objs):
+        """Bulk `get_or_create` of `objs` (dict of unsaved instances
+        by name). Existing objects are fetched with one lookup, missing
+        ones are inserted with one insert. Returns dicts of existing
+        and created objects by name."""
+        existing = {obj.name: obj for obj in model.objects.filter(name__in=objs)}
+        missing = [obj for name, obj in objs.items() if name not in existing]
+        return existing, bulk_create(model, missing, "name")
+
+    def bulk_roles(self):
+        """Same as `roles`, with bulk queries. Roles are matched by name."""
+        raw_data = self.bootstrap.data("roles")
+        roles = {}
+        for data in raw_data.values():
+            if data["name"] not in roles:
+                roles[data["name"]] = Role(**self.prepare_role(data))
+        existing, created = self.get_or_create_by_name(Role, roles)
+        roles = {**existing, **created}
+        return {name: roles[data["name"]] for name, data in raw_data.items()}
+
+    def bulk_workflows(self, roles):
+        """Same as `workflows`, with bulk queries. Steps of all new
+        workflows are created with a single insert."""
+        workflows = {}
+        steps = {}
+        for data in self.raw_data.values():
+            if data["name"] not in workflows:
+                steps[data["name"]] = data.pop("steps", [])
+                workflows[data["name"]] = Workflow(**data)
+        existing, created = self.get_or_create_by_name(Workflow, workflows)
+        new_steps = []
+        for name, workflow in created.items():
+            for step in steps[name]:
+                step["role"] = roles[step["role"]]
+                new_steps.append(WorkflowStep(workflow=workflow, **step))
+        WorkflowStep.objects.bulk_create(new_steps)
+        workflows = {**existing, **created}
+        for name, data in self.raw_data.items():
+            self.data[name] = workflows[data["name"]]
+
+    def plan(self):
+        roles = self.bootstrap.data("roles") or {}
+        role_names = [data["name"] for data in roles.values()]
+        names = [data["name"] for data in self.raw_data.values()]
+        existing = set(Workflow.objects.filter(name__in=names).values_list("name", flat=True))
+        return {
+            "roles": diff(
+                role_names,
+                set(Role.objects.filter(name__in=role_names).values_list("name", flat=True)),
+            ),
+            "workflows": diff(names, existing),
+            # Steps are only added to new workflows
+            "steps": {
+                "create": [
+                    "{} -> {}".format(data["name"], roles[step["role"]]["name"])
+                    for data in self.raw_data.values()
+                    if data["name"] not in existing
+                    for step in data.get("steps", [])
+                ],
+                "skip": [],
+            },
+        }
@@ -18,7 +18,10 @@ class UserFactory(factory.django.DjangoModelFactory):
     @classmethod
     def _create(cls, model_class, *args, **kwargs):
         """Return existing user instance if found.
-        Otherwise create a new user."""
+        Otherwise create a new user.
+
+        A precomputed `password_hash` is stored as is,
+        skipping the (slow) password hasher."""
         manager = cls._get_manager(model_class)
         username = kwargs.get("username")
         if username is not None:
@@ -26,4 +29,11 @@ class UserFactory(factory.django.DjangoModelFactory):
                 return manager.get(username=username)
             except model_class.DoesNotExist:
                 pass
-        return manager.create_user(*args, **kwargs)
+        password_hash = kwargs.pop("password_hash", None)
+        if password_hash is None:
+            return manager.create_user(*args, **kwargs)
+        kwargs.pop("password", None)
+        user = model_class(*args, **kwargs)
+        user.password = password_hash
+        user.save(using=manager.db)
+        return user
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import logging
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import models
+
+from .models import Fingerprint
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_digest(*data):
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def get_registry(data):
+    """Return (model label, pk) of objects in `data` by name, or None
+    if any of them isn't a model instance."""
+    registry = {}
+    for name, obj in data.items():
+        if not isinstance(obj, models.Model):
+            return None
+        registry[name] = [obj._meta.label_lower, obj.pk]
+    return registry
+
+
+def load_registry(registry):
+    """Return dict of objects in `registry` by name, with one query
+    per model, or None if any of them doesn't exist anymore."""
+    pks = defaultdict(set)
+    for label, pk in registry.values():
+        pks[label].add(pk)
+    objects = {}
+    for label, model_pks in pks.items():
+        model = apps.get_model(label)
+        for pk, obj in model._base_manager.in_bulk(model_pks).items():
+            objects[label, pk] = obj
+    if len(objects) != sum(len(model_pks) for model_pks in pks.values()):
+        return None
+    return {name: objects[label, pk] for name, (label, pk) in registry.items()}
+
+
+class ChangedSectionError(Exception):
+    """Section of a component which only ever creates objects has
+    changed since the last run."""
+
+
+class Ledger:
+    """Fingerprints of a data source from earlier runs.
+
+    A section is skipped when its digest matches the last successful
+    run. The digest covers the section, other keys of the source
+    the component reads (`Component.data_fields`) and digests of
+    components it depends on, so a change in e.g. users re-runs
+    the components using them. Components which only create objects
+    (`Component.creates_only`) don't include the digests of their
+    dependencies, and a change of their section raises
+    `ChangedSectionError`, as running them again duplicates
+    their objects. With `force`, nothing is skipped but fingerprints
+    are still recorded.
+    """
+
+    def __init__(self, source, force=False):
+        self.source = source
+        self.force = force
+        self.digests = {}
+        self.previous = {
+            fingerprint.section: fingerprint
+            for fingerprint in Fingerprint.objects.filter(source=source)
+        }
+
+    def is_unchanged(self, section, digest):
+        fingerprint = self.previous.get(section)
+        return (
+            not self.force and fingerprint is not None and fingerprint.digest == digest
+        )
+
+    def save(self, section, digest, registry=None):
+        Fingerprint.objects.update_or_create(
+            source=self.source,
+            section=section,
+            defaults={"digest": digest, "registry": registry or {}},
+        )
+
+    def get_section_digest(self, bootstrap, component, raw_data):
+        if component.creates_only:
+            depends_on = []
+        else:
+            depends_on = [self.digests.get(name) for name in component.depends_on]
+        return get_digest(
+            raw_data, [bootstrap.data(name) for name in component.data_fields], depends_on
+        )
+
+    def restore(self, bootstrap, component, raw_data):
+        """Set `component.data` from the last run if its section didn't
+        change. Returns whether the section can be skipped."""
+        name = component.field_name
+        digest = self.digests[name] = self.get_section_digest(
+            bootstrap, component, raw_data
+        )
+        if not self.is_unchanged(name, digest):
+            if component.creates_only and not self.force and name in self.previous:
+                raise ChangedSectionError(
+                    "Section {} of {} has changed since the last run, running it "
+                    "again would create all of its objects again. Use --force "
+                    "to do so anyway.".format(name, self.source)
+                )
+            return False
+        data = load_registry(self.previous[name].registry)
+        if data is None:
+            return False
+        component.data = data
+        logger.info("Skipping unchanged %s of %s", name, self.source)
+        return True
+
+    def record(self, component):
+        """Save the fingerprint of a component which has run."""
+        registry = get_registry(component.data)
+        if registry is None:
+            # Created objects can't be restored, always run the component
+            return
+        self.save(component.field_name, self.digests[component.field_name], registry)
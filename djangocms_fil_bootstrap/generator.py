@@ -0,0 +1,101 @@
+"""Synthetic data sources of configurable size, e.g. for benchmarks."""
+
+
+GROUP_PERMISSIONS = [
+    ["view_page", "cms", "page"],
+    ["change_page", "cms", "page"],
+    ["add_moderationcollection", "djangocms_moderation", "moderationcollection"],
+    ["change_moderationcollection", "djangocms_moderation", "moderationcollection"],
+]
+
+
+def get_plugins(depth, text):
+    """Return plugin tree `depth` levels deep. Multi column plugins
+    have two columns, so the number of text plugins doubles every
+    two levels."""
+    if depth <= 1:
+        return [{"type": "TextPlugin", "body": "<p>{}</p>".format(text)}]
+    if depth == 2:
+        return [{"type": "ColumnPlugin", "width": "50%", "children": get_plugins(1, text)}]
+    return [
+        {
+            "type": "MultiColumnPlugin",
+            "children": [
+                {
+                    "type": "ColumnPlugin",
+                    "width": "50%",
+                    "children": get_plugins(depth - 2, "{} ({})".format(text, column)),
+                }
+                for column in (1, 2)
+            ],
+        }
+    ]
+
+
+def generate(users=10, groups=2, pages=10, depth=2, collections=2, history=True):
+    """Return data source with `users` users, `groups` groups (each with
+    page and collection permissions and a moderation role), a workflow
+    going through the roles, `pages` pages with plugin trees `depth`
+    levels deep and `collections` moderation collections of the pages.
+    Pages form a binary tree. With `history`, collections get a review
+    history."""
+    if users < 1 or groups < 1:
+        raise ValueError("At least one user and one group are needed.")
+    usernames = ["user{}".format(i) for i in range(1, users + 1)]
+    group_names = ["group{}".format(i) for i in range(1, groups + 1)]
+    data = {
+        "email_domain": "example.com",
+        "users": [{"username": usernames[0], "is_superuser": True}] + usernames[1:],
+        "groups": {
+            name: {"name": "Group {}".format(i), "users": usernames[i - 1::groups]}
+            for i, name in enumerate(group_names, 1)
+        },
+        "permissions": {
+            "groups": {name: GROUP_PERMISSIONS for name in group_names},
+        },
+        "roles": {
+            name: {"name": "Role {}".format(i), "group": name}
+            for i, name in enumerate(group_names, 1)
+        },
+        "workflows": {
+            "workflow": {
+                "name": "Benchmark workflow",
+                "is_default": True,
+                "steps": [
+                    {"role": name, "is_required": True, "order": order}
+                    for order, name in enumerate(group_names[:3], 1)
+                ],
+            }
+        },
+        "pages": {},
+        "collections": {},
+    }
+    for i in range(1, pages + 1):
+        page = {
+            "title": "Page {}".format(i),
+            "template": "INHERIT",
+            "language": "en",
+            "created_by": usernames[(i - 1) % users],
+            "content": get_plugins(depth, "Page {}".format(i)),
+        }
+        if i > 1:
+            page["parent"] = "page{}".format(i // 2)
+        data["pages"]["page{}".format(i)] = page
+    for i in range(1, collections + 1):
+        data["collections"]["collection{}".format(i)] = {
+            "name": "Collection {}".format(i),
+            "user": usernames[(i - 1) % users],
+            "workflow": "workflow",
+            # Pages can only be in one collection at a time
+            "pages": ["page{}".format(j) for j in range(i, pages + 1, collections)],
+        }
+    if history:
+        data["history"] = {
+            name: {
+                "approvals": len(collection["pages"]),
+                "comments": 2,
+                "comment_authors": usernames[:2],
+            }
+            for name, collection in data["collections"].items()
+        }
+    return data
@@ -0,0 +1,180 @@
+import gzip
+import io
+import json
+import re
+import threading
+
+
+# Tokens which change nesting depth or start a string
+TOKEN = re.compile(r'["{}\[\]]')
+STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+END_OF_VALUE = re.compile(r"[,}]")
+NON_SPACE = re.compile(r"\S")
+
+
+def open_source(path):
+    """Open data source for reading as text. Sources ending with .gz
+    or .zst are decompressed on the fly (the latter needs the zstandard
+    package)."""
+    name = str(path)
+    if name.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if name.endswith((".zst", ".zstd")):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(
+                "Install zstandard to read zstd compressed sources."
+            ) from e
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path)
+
+
+class Scanner:
+    """Reads JSON text of top level values of a JSON object.
+
+    The file is read in chunks, the scanner only keeps the text
+    of the value which is being read.
+    """
+
+    def __init__(self, file, chunk_size=1 << 20):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+
+    def fill(self):
+        # Read at least as much as is buffered, so that reading a long
+        # value doesn't copy the buffer over and over
+        chunk = self.file.read(max(self.chunk_size, len(self.buffer)))
+        if not chunk:
+            raise ValueError("Unexpected end of JSON data.")
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def search(self, pattern, start):
+        """Return match of `pattern` at `start` or later, reading more
+        data if needed. `start` is relative to `self.pos`."""
+        while True:
+            match = pattern.search(self.buffer, self.pos + start)
+            if match:
+                return match
+            start = len(self.buffer) - self.pos
+            self.fill()
+
+    def next_char(self):
+        """Skip whitespace and return the next character, or None
+        at the end of the file."""
+        while True:
+            match = NON_SPACE.search(self.buffer, self.pos)
+            if match:
+                self.pos = match.start()
+                return match.group()
+            self.buffer, self.pos = "", 0
+            chunk = self.file.read(self.chunk_size)
+            if not chunk:
+                return None
+            self.buffer = chunk
+
+    def expect(self, char):
+        if self.next_char() != char:
+            raise ValueError("Expected {!r} in JSON data.".format(char))
+        self.pos += 1
+
+    def take(self, end):
+        text = self.buffer[self.pos:end]
+        self.pos = end
+        return text
+
+    def read_string(self):
+        self.next_char()
+        while True:
+            match = STRING.match(self.buffer, self.pos)
+            if match:
+                return self.take(match.end())
+            self.fill()
+
+    def read_value(self):
+        char = self.next_char()
+        if char == '"':
+            return self.read_string()
+        if char not in ("{", "["):
+            match = self.search(END_OF_VALUE, 0)
+            return self.take(match.start())
+        depth = 0
+        offset = 0
+        while True:
+            match = self.search(TOKEN, offset)
+            token = match.group()
+            if token == '"':
+                string = STRING.match(self.buffer, match.start())
+                if string is None:
+                    # String continues in the next chunk
+                    offset = match.start() - self.pos
+                    self.fill()
+                    continue
+                offset = string.end() - self.pos
+                continue
+            offset = match.end() - self.pos
+            depth += 1 if token in "{[" else -1
+            if depth == 0:
+                return self.take(match.end())
+
+
+def iter_sections(file, chunk_size=1 << 20):
+    """Yield (key, value) of top level items of the JSON object in
+    `file`, parsing one item at a time."""
+    scanner = Scanner(file, chunk_size)
+    scanner.expect("{")
+    if scanner.next_char() == "}":
+        return
+    while True:
+        key = json.loads(scanner.read_string())
+        scanner.expect(":")
+        value = json.loads(scanner.read_value())
+        yield key, value
+        char = scanner.next_char()
+        if char == "}":
+            return
+        if char != ",":
+            raise ValueError("Expected ',' or '}' in JSON data.")
+        scanner.pos += 1
+
+
+class StreamingSource:
+    """Data source which parses sections (top level keys) of the file
+    only when they are requested.
+
+    Sections the file has before the requested one are parsed
+    on the way and kept until requested and discarded, so the least
+    memory is used when sections are in the order components run.
+    The file is closed once it has been read to the end. Sources
+    can be shared by components running in several threads.
+    """
+
+    def __init__(self, file, chunk_size=1 << 20):
+        self.file = file
+        self.sections = iter_sections(file, chunk_size)
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def get(self, name, default=None):
+        with self.lock:
+            if name in self.pending:
+                return self.pending[name]
+            for key, value in self.sections:
+                self.pending[key] = value
+                if key == name:
+                    return value
+            self.close()
+            return default
+
+    def discard(self, name):
+        """Drop data of a section which has been used."""
+        with self.lock:
+            self.pending.pop(name, None)
+
+    def close(self):
+        self.sections.close()
+        self.file.close()
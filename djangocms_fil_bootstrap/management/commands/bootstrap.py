@@ -1,9 +1,16 @@
+import json
+from contextlib import nullcontext
 from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-from ... import bootstrap
+from ... import bootstrap, plan
+from ...fingerprints import ChangedSectionError
+from ...loaders import open_source
+from ...merging import merged_file
+from ...passwords import strategies
+from ...profiling import Profiler
 
 
 default_sources = ["roles", "demo"]
@@ -23,6 +30,98 @@ class Command(BaseCommand):
             action="store_true",
             help="Use all default sources ({})".format(", ".join(default_sources)),
         )
+        parser.add_argument(
+            "--merge",
+            action="store_true",
+            help="Merge all sources and bootstrap them in a single pass.",
+        )
+        parser.add_argument(
+            "--plan",
+            nargs="?",
+            const="text",
+            choices=["text", "json"],
+            help="Print objects and links that would be created or skipped "
+            "(as text or JSON), without writing to the database.",
+        )
+        parser.add_argument(
+            "--fingerprint",
+            action="store_true",
+            help="Store fingerprints of sources and their sections, and skip the ones "
+            "which haven't changed since the last successful run.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="With --fingerprint, run all sections, even those which haven't "
+            "changed since the last run.",
+        )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Create objects with bulk inserts where components support it.",
+        )
+        parser.add_argument(
+            "--password-hashing",
+            choices=sorted(strategies),
+            help="Hash user passwords once per distinct password (memoize) "
+            "or in a process pool (pool).",
+        )
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help="Parse the source one section at a time and drop each section "
+            "once its component is done, to keep memory use low.",
+        )
+        parser.add_argument(
+            "--concurrent",
+            action="store_true",
+            help="Run components which don't depend on each other concurrently, "
+            "each in its own transaction (not supported with SQLite). "
+            "Components which finished are not rolled back if another one fails.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            metavar="N",
+            help="Create independent page subtrees in N processes, each with its own "
+            "connection (not supported with SQLite). Runs without a transaction "
+            "spanning all sources.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            metavar="N",
+            help="Commit every N entries of each component's data and save a checkpoint, "
+            "instead of running everything in one transaction.",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="With --chunk-size, continue from the last checkpoint of a failed run.",
+        )
+        parser.add_argument(
+            "--defer-publish",
+            action="store_true",
+            help="Publish pages in bulk once all of them have been created.",
+        )
+        parser.add_argument(
+            "--skip-publish-signals",
+            action="store_true",
+            help="Skip publish hooks and signals of each version, send one "
+            "versions_published signal per content type instead. "
+            "Implies --defer-publish.",
+        )
+        parser.add_argument(
+            "--profile",
+            action="store_true",
+            help="Print time, queries, rows inserted and peak memory of each component.",
+        )
+        parser.add_argument(
+            "--profile-json",
+            metavar="FILE",
+            help="Write the profile of each component as JSON to FILE "
+            "(e.g. to compare runs between releases).",
+        )
 
     def get_file_path(self, path, external=False):
         if external:
@@ -32,27 +131,148 @@ class Command(BaseCommand):
             candidate = package_root / "builtin_data" / "{file}.json".format(file=path)
         return str(candidate)
 
-    @transaction.atomic
+    def get_bootstrap_options(self, options):
+        bootstrap_options = {}
+        if options["fingerprint"]:
+            # Sources and sections which haven't changed since the last
+            # successful run are skipped, unless forced
+            bootstrap_options["fingerprint"] = True
+        if options["force"]:
+            bootstrap_options["force"] = True
+        if options["bulk"]:
+            bootstrap_options["bulk"] = True
+        if options["password_hashing"]:
+            bootstrap_options["password_hashing"] = options["password_hashing"]
+        if options["defer_publish"]:
+            bootstrap_options["defer_publish"] = True
+        if options["skip_publish_signals"]:
+            bootstrap_options["skip_publish_signals"] = True
+        if options["stream"]:
+            bootstrap_options["stream"] = True
+        if options["concurrent"]:
+            bootstrap_options["concurrent"] = True
+        if options["workers"]:
+            bootstrap_options["workers"] = options["workers"]
+        if options["chunk_size"]:
+            bootstrap_options["chunk_size"] = options["chunk_size"]
+        if options["resume"]:
+            bootstrap_options["resume"] = True
+        return bootstrap_options
+
     def handle(self, **options):
         if options["all"]:
             sources = default_sources
         else:
             sources = options["sources"]
-        for source in sources:
-            for external in (False, True):
-                try:
-                    with open(self.get_file_path(source, external)) as f:
-                        bootstrap(f)
-                        break
-                except FileNotFoundError:
-                    pass
-                except Exception as e:
-                    raise CommandError(
-                        "An error occured while bootstrapping the project. "
-                        "Transaction has been rolled back and no data has been stored in the database. "
-                        "Use --traceback parameter to display the stacktrace."
-                    ) from e
-            else:
+        bootstrap_options = self.get_bootstrap_options(options)
+        for name in ("chunk_size", "workers"):
+            if options[name] is not None and options[name] < 1:
                 raise CommandError(
-                    "Could not open specified file ({}). Aborting.".format(source)
+                    "--{} has to be a positive number.".format(name.replace("_", "-"))
                 )
+        if options["chunk_size"] and (options["stream"] or options["concurrent"]):
+            raise CommandError("--chunk-size can't be used with --stream or --concurrent.")
+        if options["resume"] and not options["chunk_size"]:
+            raise CommandError("--resume needs --chunk-size.")
+        if options["merge"] and len(sources) > 1:
+            sources = [self.merge_sources(sources)]
+        if options["plan"]:
+            self.plan_sources(sources, options["plan"], bootstrap_options)
+            return
+        profiler = None
+        if options["profile"] or options["profile_json"]:
+            profiler = bootstrap_options["profiler"] = Profiler()
+        if options["concurrent"] or options["chunk_size"] or (options["workers"] or 1) > 1:
+            # Components (or chunks of them) run in their own transactions,
+            # page workers need to see users created before
+            self.bootstrap_sources(sources, bootstrap_options)
+        else:
+            with transaction.atomic():
+                self.bootstrap_sources(sources, bootstrap_options)
+        if options["profile"]:
+            self.stdout.write(profiler.format_table())
+        if options["profile_json"]:
+            profiler.write_json(options["profile_json"])
+
+    def bootstrap_sources(self, sources, bootstrap_options):
+        if bootstrap_options.get("chunk_size"):
+            rollback = "Chunks which have been committed have not been rolled back, use --resume to continue. "
+        elif bootstrap_options.get("concurrent") or bootstrap_options.get("workers", 1) > 1:
+            rollback = "Components which have finished have not been rolled back. "
+        else:
+            rollback = "Transaction has been rolled back and no data has been stored in the database. "
+        for source in sources:
+            self.run_source(source, lambda f: bootstrap(f, **bootstrap_options), rollback)
+
+    def plan_sources(self, sources, output_format, bootstrap_options):
+        options = {}
+        if bootstrap_options.get("stream"):
+            options["stream"] = True
+        reports = {}
+        for source in sources:
+            reports[getattr(source, "name", source)] = self.run_source(
+                source,
+                lambda f: plan(f, **options),
+                "No data has been stored in the database. ",
+            )
+        if output_format == "json":
+            self.stdout.write(json.dumps(reports, indent=2))
+        else:
+            for source, report in reports.items():
+                self.write_plan(source, report)
+
+    def write_plan(self, source, report):
+        self.stdout.write(source)
+        for component, kinds in report.items():
+            if kinds is None:
+                self.stdout.write("  {}: planning not supported".format(component))
+                continue
+            for kind, changes in kinds.items():
+                name = component if kind == component else "{}/{}".format(component, kind)
+                self.stdout.write(
+                    "  {}: {} to create, {} to skip".format(
+                        name, len(changes["create"]), len(changes["skip"])
+                    )
+                )
+                for item in changes["create"]:
+                    self.stdout.write("    + {}".format(item))
+
+    def merge_sources(self, sources):
+        """Return a single source merged from `sources`."""
+        data = [
+            self.run_source(source, json.load, "No data has been stored in the database. ")
+            for source in sources
+        ]
+        return merged_file(sources, data)
+
+    def open_file(self, source):
+        """Open builtin data source `source`, or the file at that path."""
+        for external in (False, True):
+            try:
+                return open_source(self.get_file_path(source, external))
+            except FileNotFoundError:
+                pass
+        raise CommandError(
+            "Could not open specified file ({}). Aborting.".format(source)
+        )
+
+    def run_source(self, source, run, rollback):
+        """Return result of `run` called with the opened data source
+        (name of the source, or an already open file). `rollback`
+        describes what happened to the data if `run` fails. Files are
+        closed afterwards only if they've been opened here."""
+        if isinstance(source, str):
+            source = self.open_file(source)
+        else:
+            source = nullcontext(source)
+        with source as f:
+            try:
+                return run(f)
+            except ChangedSectionError as e:
+                raise CommandError("{} {}".format(e, rollback).strip()) from e
+            except Exception as e:
+                raise CommandError(
+                    "An error occured while bootstrapping the project. "
+                    + rollback
+                    + "Use --traceback parameter to display the stacktrace."
+                ) from e
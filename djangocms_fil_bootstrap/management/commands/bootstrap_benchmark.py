@@ -0,0 +1,132 @@
+import json
+import math
+from io import StringIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ... import bootstrap
+from ...generator import generate
+from ...profiling import Profiler
+
+
+class Command(BaseCommand):
+    help = (
+        "Bootstrap synthetic data sources of increasing size and report how "
+        "time and queries of each component scale. Nothing is stored in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[10, 100, 1000],
+            help="Numbers of users and pages of the data sources "
+            "(there are a tenth as many groups and collections).",
+        )
+        parser.add_argument(
+            "--depth", type=int, default=2, help="Depth of plugin trees of the pages."
+        )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Create objects with bulk inserts where components support it.",
+        )
+        parser.add_argument(
+            "--output", metavar="FILE", help="Write the results as JSON to FILE."
+        )
+        parser.add_argument(
+            "--baseline",
+            metavar="FILE",
+            help="Compare the results with an earlier --output.",
+        )
+
+    def get_source(self, size, depth):
+        data = generate(
+            users=size,
+            groups=max(size // 10, 1),
+            pages=size,
+            depth=depth,
+            collections=max(size // 10, 1),
+        )
+        file_ = StringIO(json.dumps(data))
+        file_.name = str(size)
+        return file_
+
+    def handle(self, **options):
+        sizes = sorted(set(options["sizes"]))
+        profiler = Profiler()
+        bootstrap_options = {"profiler": profiler}
+        if options["bulk"]:
+            bootstrap_options["bulk"] = True
+        for size in sizes:
+            with transaction.atomic():
+                bootstrap(self.get_source(size, options["depth"]), **bootstrap_options)
+                # Each size starts from an empty database
+                transaction.set_rollback(True)
+        results = self.get_results(profiler, sizes)
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"]) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError("Could not read baseline: {}".format(e))
+        self.write_results(results, sizes, baseline)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+
+    def get_results(self, profiler, sizes):
+        """Return profile of each component at each size, with the
+        scaling exponents of time and queries between the smallest and
+        largest size (1 is linear, 0 constant)."""
+        results = {}
+        for source, components in profiler.results.items():
+            for component, result in components.items():
+                results.setdefault(component, {"sizes": {}})["sizes"][source] = result
+        for component in results.values():
+            component["time_exponent"] = self.get_exponent(component["sizes"], sizes, "time")
+            component["queries_exponent"] = self.get_exponent(
+                component["sizes"], sizes, "queries"
+            )
+        return results
+
+    def get_exponent(self, results, sizes, field):
+        if len(sizes) < 2:
+            return None
+        first, last = results[str(sizes[0])][field], results[str(sizes[-1])][field]
+        if first <= 0 or last <= 0:
+            return None
+        return math.log(last / first) / math.log(sizes[-1] / sizes[0])
+
+    def write_results(self, results, sizes, baseline=None):
+        for name, component in results.items():
+            self.stdout.write(
+                "{}: time ~ n^{}, queries ~ n^{}".format(
+                    name,
+                    self.format_exponent(component["time_exponent"]),
+                    self.format_exponent(component["queries_exponent"]),
+                )
+            )
+            for size in sizes:
+                result = component["sizes"][str(size)]
+                line = "  {:>8}  {:>9.3f}s  {:>7} queries  {:>8} rows".format(
+                    size, result["time"], result["queries"], result["rows"]
+                )
+                previous = (baseline or {}).get(name, {}).get("sizes", {}).get(str(size))
+                if previous:
+                    line += "  ({} time, {:+d} queries vs baseline)".format(
+                        self.format_change(result["time"], previous["time"]),
+                        result["queries"] - previous["queries"],
+                    )
+                self.stdout.write(line)
+
+    def format_exponent(self, exponent):
+        return "?" if exponent is None else "{:.2f}".format(exponent)
+
+    def format_change(self, value, previous):
+        if not previous:
+            return "n/a"
+        return "{:+.0%}".format(value / previous - 1)
@@ -0,0 +1,32 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+
+from ...loaders import open_source
+from ...snapshots import Snapshot, SnapshotConflict
+
+
+class Command(BaseCommand):
+    help = "Insert rows of a snapshot written by bootstrap_snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument("snapshot", help="Snapshot file (optionally .gz or .zst).")
+
+    def handle(self, **options):
+        path = options["snapshot"]
+        try:
+            with open_source(path) as f:
+                snapshot = Snapshot.load(f)
+        except (OSError, ValueError, LookupError) as e:
+            raise CommandError("Could not read snapshot {}: {}".format(path, e))
+        try:
+            with transaction.atomic():
+                count = snapshot.replay()
+        except (DatabaseError, ObjectDoesNotExist, SnapshotConflict) as e:
+            raise CommandError(
+                "Could not replay snapshot {}, no data has been stored "
+                "in the database: {}".format(path, e)
+            ) from e
+        self.stdout.write(
+            "Replayed {} rows into {} tables.".format(count, len(snapshot.rows))
+        )
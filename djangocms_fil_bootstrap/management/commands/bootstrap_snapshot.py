@@ -0,0 +1,52 @@
+import gzip
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...snapshots import Snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Bootstrap data sources and write all rows the run created to a snapshot "
+        "file, which bootstrap_replay loads into another database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("sources", metavar="source", nargs="+", help="Data sources.")
+        parser.add_argument(
+            "--output",
+            "-o",
+            required=True,
+            help="Snapshot file, compressed with gzip if it ends with .gz.",
+        )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Create objects with bulk inserts where components support it.",
+        )
+
+    def handle(self, **options):
+        snapshot = Snapshot()
+        args = [*options["sources"], "--force"]
+        if options["bulk"]:
+            args.append("--bulk")
+        with transaction.atomic():
+            snapshot.start()
+            call_command("bootstrap", *args, stdout=self.stdout, stderr=self.stderr)
+            snapshot.finish()
+        path = options["output"]
+        if path.endswith(".gz"):
+            file_ = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            file_ = open(path, "w")
+        with file_:
+            snapshot.dump(file_)
+        self.stdout.write(
+            "Wrote {} rows of {} tables to {}.".format(
+                sum(len(rows) for attnames, rows in snapshot.rows.values()),
+                len(snapshot.rows),
+                path,
+            )
+        )
@@ -0,0 +1,86 @@
+import json
+import logging
+from io import StringIO
+
+
+logger = logging.getLogger(__name__)
+
+# Values replaced by later sources as a whole, by path ("*" matches
+# any key). Joining plugins of a page would duplicate them.
+REPLACED = [("pages", "*", "content"), ("pages", "*", "assignments")]
+
+
+def is_replaced(path):
+    return any(
+        len(pattern) == len(path)
+        and all(part in ("*", key) for part, key in zip(pattern, path))
+        for pattern in REPLACED
+    )
+
+
+def merge(first, second, path):
+    """Merge `second` into `first`, later data takes precedence:
+
+    * values of `REPLACED` paths are replaced,
+    * dicts are merged key by key (recursively),
+    * lists are joined, items already in the first list are skipped,
+    * other values are replaced.
+    """
+    if is_replaced(path):
+        if first != second:
+            logger.info("%s replaced", "/".join(path))
+        return second
+    if isinstance(first, dict) and isinstance(second, dict):
+        merged = dict(first)
+        for key, value in second.items():
+            if key in merged:
+                merged[key] = merge(merged[key], value, path + (key,))
+            else:
+                merged[key] = value
+        return merged
+    if isinstance(first, list) and isinstance(second, list):
+        return first + [item for item in second if item not in first]
+    if isinstance(first, (dict, list)) or isinstance(second, (dict, list)):
+        raise ValueError("Can't merge {} of different types.".format("/".join(path)))
+    if first != second:
+        logger.info("%s: %r replaced with %r", "/".join(path), first, second)
+    return second
+
+
+def merge_users(first, second):
+    """Users are merged by username, fields of users listed
+    in both sources are merged."""
+    users = {}
+    for user in first + second:
+        if not isinstance(user, dict):
+            user = {"username": user}
+        username = user["username"]
+        users[username] = merge(users.get(username, {}), user, ("users", username))
+    return [
+        user if set(user) != {"username"} else username
+        for username, user in users.items()
+    ]
+
+
+def merge_sources(sources):
+    """Merge data of several sources into one, section by section.
+    See `merge` for how sections present in several sources are merged,
+    except users, which are merged by username."""
+    merged = {}
+    for data in sources:
+        for section, value in data.items():
+            if section not in merged:
+                merged[section] = value
+            elif section == "users":
+                merged[section] = merge_users(merged[section], value)
+            else:
+                merged[section] = merge(merged[section], value, (section,))
+    return merged
+
+
+def merged_file(names, sources):
+    """Return file-like object with merged `sources`, named after
+    the merged source `names`."""
+    file_ = StringIO(json.dumps(merge_sources(sources)))
+    file_.name = "+".join(names)
+    return file_
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="Fingerprint",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=255)),
+                ("section", models.CharField(blank=True, max_length=100)),
+                ("digest", models.CharField(max_length=64)),
+                ("registry", models.JSONField(default=dict)),
+                ("modified", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "unique_together": {("source", "section")},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("djangocms_fil_bootstrap", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Checkpoint",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=255, unique=True)),
+                ("digest", models.CharField(max_length=64)),
+                ("progress", models.JSONField(default=dict)),
+                ("modified", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import models
+
+
+class Fingerprint(models.Model):
+    """Digest of a data source, or of one of its sections, from the last
+    successful bootstrap run.
+
+    `section` is the component's field name, or empty for the whole
+    source. `registry` keeps the objects the component created by name
+    (`{name: [model label, pk]}`), so they can be restored when
+    the section is skipped.
+    """
+
+    source = models.CharField(max_length=255)
+    section = models.CharField(max_length=100, blank=True)
+    digest = models.CharField(max_length=64)
+    registry = models.JSONField(default=dict)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("source", "section")
+
+    def __str__(self):
+        return "{} {}".format(self.source, self.section).strip()
+
+
+class Checkpoint(models.Model):
+    """Progress of a chunked bootstrap run of a data source which
+    hasn't finished yet.
+
+    `progress` keeps, by section, the objects created so far
+    (`registry`, same as `Fingerprint.registry`) and the number
+    of entries committed (`offset`), which is null once the section
+    is done. The checkpoint only applies to the data source
+    with the same `digest`.
+    """
+
+    source = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64)
+    progress = models.JSONField(default=dict)
+    modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.source
@@ -0,0 +1,398 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
+from django.db.models import F
+from django.utils.text import slugify
+
+from cms.constants import TEMPLATE_INHERITANCE_MAGIC
+from cms.models import Page, PageContent, PageUrl, Placeholder
+from cms.utils.conf import get_cms_setting
+from cms.utils.placeholder import get_placeholders
+
+from djangocms_versioning.models import Version
+
+from .utils import bulk_create, iter_in
+
+
+# Tree nodes have been merged into pages in django CMS 5
+PAGES_ARE_NODES = not hasattr(Page, "node")
+
+if PAGES_ARE_NODES:
+    tree_model = Page
+else:
+    from cms.models import TreeNode as tree_model
+
+
+PAGE_ARGUMENTS = {
+    "title",
+    "language",
+    "template",
+    "created_by",
+    "parent",
+    "slug",
+    "overwrite_url",
+}
+
+
+def field_names(model):
+    return {field.name for field in model._meta.concrete_fields}
+
+
+def get_order(entries, existing=()):
+    """Return names of page `entries` ordered so that parents come
+    before their children. `parent` of an entry is a name of another
+    entry or of `existing` pages, or a page instance."""
+    order = []
+    done = set()
+    visiting = set()
+
+    def visit(name):
+        if name in visiting:
+            raise ValueError("Page {} is its own ancestor.".format(name))
+        if name in done:
+            return
+        parent = entries[name].get("parent")
+        if isinstance(parent, str) and parent not in existing:
+            if parent not in entries:
+                raise ValueError("Unknown parent {} of page {}.".format(parent, name))
+            visiting.add(name)
+            visit(parent)
+            visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in entries:
+        visit(name)
+    return order
+
+
+class PageTreeBuilder:
+    """Create page hierarchies with a handful of bulk inserts.
+
+    Pages are collected with `add` and written with `save`. Tree paths,
+    depth and number of children of the tree nodes are worked out in
+    memory, then all Page, TreeNode, PageUrl, PageContent, Version and
+    Placeholder rows are inserted in bulk, with one insert per table.
+    New pages are created as drafts, same as with `cms.api.create_page`.
+    Note that `save` methods and signals of these models are skipped.
+    """
+
+    def __init__(self, site=None, root_steps=None):
+        self.site = site or Site.objects.get_current()
+        # Positions of new root pages among root nodes by name, e.g.
+        # reserved up front when several builders run in parallel
+        self.root_steps = root_steps or {}
+        self.entries = {}
+        self.pages = {}
+        self.contents = {}
+        self.versions = {}
+        self.placeholders = defaultdict(dict)
+        self.parents = {}
+
+    def add(self, name, data):
+        """Add a page. `data` takes the same arguments as
+        `cms.api.create_page`, except that `parent` can also be a name
+        of another page added to this builder, and `created_by` has to
+        be a user instance.
+        """
+        if name in self.entries:
+            raise ValueError("Page {} has already been added.".format(name))
+        unknown = set(data) - PAGE_ARGUMENTS - field_names(Page) - field_names(PageContent)
+        if unknown:
+            raise TypeError(
+                "Unexpected arguments for page {}: {}.".format(
+                    name, ", ".join(sorted(unknown))
+                )
+            )
+        data = dict(data)
+        if data.get("parent") in self.pages:
+            # Parent has been saved already
+            data["parent"] = self.pages[data["parent"]]
+        self.entries[name] = data
+
+    def save(self):
+        """Insert all collected pages. Returns dict of pages by name."""
+        order = get_order(self.entries)
+        if not order:
+            return {}
+        nodes = self.get_nodes(order)
+        self.create_pages(order, nodes)
+        self.create_urls(order)
+        self.create_contents(order)
+        self.create_versions(order)
+        self.create_placeholders(order)
+        self.entries = {}
+        return self.pages
+
+    def get_parent_node(self, parent, nodes):
+        if parent is None:
+            return None
+        if isinstance(parent, str):
+            return nodes[parent]
+        return parent if PAGES_ARE_NODES else parent.node
+
+    def get_last_step(self, parent_node):
+        if parent_node is None:
+            last = tree_model.get_last_root_node()
+        elif parent_node.pk is None:
+            return 0
+        else:
+            last = parent_node.get_last_child()
+        if last is None:
+            return 0
+        return tree_model._str2int(last.path[-tree_model.steplen:])
+
+    def get_nodes(self, order):
+        """Compute tree node attributes (path, depth, numchild) for all
+        new pages. Returns dict of unsaved tree nodes by page name."""
+        nodes = {}
+        steps = {}
+        added_children = defaultdict(int)
+        for name in order:
+            parent = self.entries[name].get("parent")
+            parent_node = self.get_parent_node(parent, nodes)
+            if parent_node is None or isinstance(parent, str):
+                key = parent
+            else:
+                key = parent_node.pk
+            if parent_node is None and name in self.root_steps:
+                step = self.root_steps[name]
+            else:
+                if key not in steps:
+                    steps[key] = self.get_last_step(parent_node)
+                steps[key] += 1
+                step = steps[key]
+            if parent_node is None:
+                path, depth = tree_model._get_path(None, 1, step), 1
+            else:
+                depth = parent_node.depth + 1
+                path = tree_model._get_path(parent_node.path, depth, step)
+                if parent_node.pk is None:
+                    parent_node.numchild += 1
+                else:
+                    added_children[parent_node.pk] += 1
+            nodes[name] = tree_model(path=path, depth=depth, numchild=0, site=self.site)
+            self.parents[name] = parent_node
+        for pk, count in added_children.items():
+            tree_model._base_manager.filter(pk=pk).update(numchild=F("numchild") + count)
+        return nodes
+
+    def set_parents(self, nodes):
+        """Point the new nodes to their parents, once these have primary keys."""
+        if "parent" not in field_names(tree_model):
+            return
+        children = []
+        for name, node in nodes.items():
+            if self.parents[name] is not None:
+                node.parent = self.parents[name]
+                children.append(node)
+        tree_model._base_manager.bulk_update(children, ["parent"])
+
+    def get_username(self, user):
+        return getattr(user, user.USERNAME_FIELD)
+
+    def create_pages(self, order, nodes):
+        pages = []
+        page_fields = field_names(Page)
+        for name in order:
+            entry = self.entries[name]
+            username = self.get_username(entry["created_by"])
+            data = {
+                key: value
+                for key, value in entry.items()
+                if key in page_fields and key not in PAGE_ARGUMENTS
+            }
+            if "languages" in page_fields:
+                data.setdefault("languages", entry["language"])
+            if PAGES_ARE_NODES:
+                page = nodes[name]
+                for key, value in data.items():
+                    setattr(page, key, value)
+                page.created_by = page.changed_by = username
+            else:
+                page = Page(created_by=username, changed_by=username, **data)
+            pages.append((name, page))
+        if PAGES_ARE_NODES:
+            bulk_create(Page, [page for name, page in pages], "path")
+            self.set_parents(nodes)
+        else:
+            bulk_create(tree_model, nodes.values(), "path")
+            self.set_parents(nodes)
+            for name, page in pages:
+                page.node = nodes[name]
+            bulk_create(Page, [page for name, page in pages], "node_id")
+        for name, page in pages:
+            self.pages[name] = page
+
+    def get_parent_paths(self, order):
+        """Return url paths of existing parent pages, by (page pk, language)."""
+        parents = {
+            (self.entries[name]["parent"].pk, self.entries[name]["language"])
+            for name in order
+            if isinstance(self.entries[name].get("parent"), Page)
+        }
+        urls = iter_in(
+            PageUrl.objects.values_list("page_id", "language", "path"),
+            "page_id",
+            {page_id for page_id, language in parents},
+        )
+        return {
+            (page_id, language): path
+            for page_id, language, path in urls
+            if (page_id, language) in parents
+        }
+
+    def create_urls(self, order):
+        """Create urls of the pages. Same as `cms.api.create_page`,
+        slugs are generated from titles and get a numeric suffix
+        if the path is already taken."""
+        parent_paths = self.get_parent_paths(order)
+        urls = {}
+        for name in order:
+            entry = self.entries[name]
+            urls[name] = PageUrl(
+                page=self.pages[name],
+                language=entry["language"],
+                slug=entry.get("slug") or slugify(entry["title"]),
+                managed=not entry.get("overwrite_url"),
+            )
+        taken = set()
+        top = []
+        for name in order:
+            entry, url = self.entries[name], urls[name]
+            parent = entry.get("parent")
+            if entry.get("overwrite_url"):
+                url.path = entry["overwrite_url"].strip("/")
+                taken.add((url.language, url.path))
+            elif not isinstance(parent, str):
+                base = parent_paths.get((parent.pk, url.language)) if parent else ""
+                top.append((url, base or "", url.slug))
+        self.resolve_paths(top, taken, check_db=True)
+        for name in order:
+            entry, url = self.entries[name], urls[name]
+            parent = entry.get("parent")
+            if isinstance(parent, str) and not entry.get("overwrite_url"):
+                self.resolve_paths([(url, urls[parent].path, url.slug)], taken)
+        PageUrl.objects.bulk_create(urls.values())
+
+    def resolve_paths(self, pending, taken, check_db=False):
+        """Set unique paths of `pending` (url, base path, slug) entries.
+        Paths of pages under new parents can't conflict with existing
+        pages, so these only need to be unique within the batch."""
+        attempts = defaultdict(int)
+        while pending:
+            for url, base, slug in pending:
+                if attempts[id(url)] > 0:
+                    url.slug = "{}-{}".format(slug, attempts[id(url)] + 1)
+                url.path = "{}/{}".format(base, url.slug) if base else url.slug
+            existing = set()
+            if check_db:
+                existing = set(
+                    iter_in(
+                        PageUrl.objects.values_list("language", "path"),
+                        "path",
+                        {url.path for url, base, slug in pending},
+                    )
+                )
+            conflicts = []
+            for entry in pending:
+                url = entry[0]
+                key = (url.language, url.path)
+                if key in existing or key in taken:
+                    attempts[id(url)] += 1
+                    conflicts.append(entry)
+                else:
+                    taken.add(key)
+            pending = conflicts
+
+    def get_template(self, name, templates):
+        entry = self.entries[name]
+        template = entry["template"]
+        if template != TEMPLATE_INHERITANCE_MAGIC:
+            return template
+        parent = entry.get("parent")
+        if parent is None:
+            return get_cms_setting("TEMPLATES")[0][0]
+        if isinstance(parent, str):
+            return templates[parent]
+        content = PageContent._base_manager.filter(
+            page=parent, language=entry["language"]
+        ).last()
+        if content is None:
+            return get_cms_setting("TEMPLATES")[0][0]
+        return content.get_template()
+
+    def create_contents(self, order):
+        contents = []
+        content_fields = field_names(PageContent) - field_names(Page) - PAGE_ARGUMENTS
+        for name in order:
+            entry = self.entries[name]
+            username = self.get_username(entry["created_by"])
+            data = {
+                key: value for key, value in entry.items() if key in content_fields
+            }
+            data.setdefault("in_navigation", False)
+            contents.append(
+                PageContent(
+                    page=self.pages[name],
+                    language=entry["language"],
+                    title=entry["title"],
+                    template=entry["template"],
+                    created_by=username,
+                    changed_by=username,
+                    **data,
+                )
+            )
+        bulk_create(PageContent, contents, "page_id")
+        for name, content in zip(order, contents):
+            self.contents[name] = content
+
+    def create_versions(self, order):
+        extra = {"number": "1"} if "number" in field_names(Version) else {}
+        versions = [
+            Version(
+                content=self.contents[name],
+                created_by=self.entries[name]["created_by"],
+                **extra,
+            )
+            for name in order
+        ]
+        bulk_create(Version, versions, "object_id")
+        for name, version in zip(order, versions):
+            version.content = self.contents[name]
+            self.versions[name] = version
+
+    def create_placeholders(self, order):
+        content_type = ContentType.objects.get_for_model(PageContent)
+        templates = {}
+        slots = {}
+        placeholders = []
+        for name in order:
+            templates[name] = template = self.get_template(name, templates)
+            if template not in slots:
+                slots[template] = [
+                    placeholder.slot for placeholder in get_placeholders(template)
+                ]
+            for slot in slots[template]:
+                placeholder = Placeholder(
+                    slot=slot,
+                    content_type=content_type,
+                    object_id=self.contents[name].pk,
+                )
+                self.placeholders[name][slot] = placeholder
+                placeholders.append(placeholder)
+        Placeholder.objects.bulk_create(placeholders)
+        if any(placeholder.pk is None for placeholder in placeholders):
+            ids = {
+                (object_id, slot): pk
+                for object_id, slot, pk in iter_in(
+                    Placeholder.objects.filter(content_type=content_type).values_list(
+                        "object_id", "slot", "pk"
+                    ),
+                    "object_id",
+                    {placeholder.object_id for placeholder in placeholders},
+                )
+            }
+            for placeholder in placeholders:
+                placeholder.pk = ids[placeholder.object_id, placeholder.slot]
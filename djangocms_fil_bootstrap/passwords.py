@@ -0,0 +1,41 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+
+
+def memoized(passwords):
+    """Hash each distinct password once.
+
+    Users sharing a password share the hash (and its salt) as well.
+    """
+    hashes = {}
+    for password in passwords:
+        if password not in hashes:
+            hashes[password] = make_password(password)
+    return [hashes[password] for password in passwords]
+
+
+def pooled(passwords):
+    """Hash every password separately, spreading the work across cores."""
+    # Spawned workers don't inherit the settings of this process
+    with ProcessPoolExecutor(initializer=django.setup) as executor:
+        return list(executor.map(make_password, passwords, chunksize=64))
+
+
+strategies = {
+    "memoize": memoized,
+    "pool": pooled,
+}
+
+
+def hash_passwords(passwords, strategy):
+    try:
+        hasher = strategies[strategy]
+    except KeyError:
+        raise ValueError(
+            "Unknown password hashing strategy: {}. Choose one of: {}.".format(
+                strategy, ", ".join(strategies)
+            )
+        )
+    return hasher(list(passwords))
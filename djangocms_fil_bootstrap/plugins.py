@@ -0,0 +1,116 @@
+from collections import defaultdict
+
+from django.db import connections, router
+from django.db.models import Max
+
+from cms.models import CMSPlugin
+from cms.plugin_pool import plugin_pool
+
+
+class PluginTreeBuilder:
+    """Create plugin trees with a handful of bulk inserts.
+
+    Plugins are collected with `add` (for any number of placeholders)
+    and written with `save`. Positions and parents are worked out
+    in memory, resulting in the same tree as adding the plugins one
+    by one with `cms.api.add_plugin`. Note that `save` methods of
+    plugin models are not called.
+    """
+
+    def __init__(self):
+        self.plugins = []
+        self.positions = defaultdict(int)
+
+    def add(self, placeholder, plugins, language):
+        for plugin_data in plugins:
+            self.add_plugin(placeholder, plugin_data, language)
+
+    def add_plugin(self, placeholder, plugin_data, language, parent=None):
+        # Plugin data is read without being changed, pages may share it
+        type_ = plugin_data["type"]
+        children = plugin_data.get("children", [])
+        fields = {
+            key: value
+            for key, value in plugin_data.items()
+            if key not in ("type", "children")
+        }
+        model = plugin_pool.get_plugin(type_).model
+        # Position is relative to the last plugin already in the
+        # placeholder, which is only known when saving.
+        self.positions[placeholder.pk, language] += 1
+        base = CMSPlugin(
+            placeholder=placeholder,
+            plugin_type=type_,
+            language=language,
+            position=self.positions[placeholder.pk, language],
+        )
+        self.plugins.append((base, model(**fields), parent))
+        for child in children:
+            self.add_plugin(placeholder, child, language, parent=base)
+        return base
+
+    def save(self):
+        """Insert all collected plugins. Returns list of plugin instances."""
+        if not self.plugins:
+            return []
+        offsets = self.get_last_positions()
+        bases = []
+        for base, instance, parent in self.plugins:
+            base.position += offsets.get((base.placeholder_id, base.language), 0)
+            bases.append(base)
+        CMSPlugin.objects.bulk_create(bases)
+        if any(base.pk is None for base in bases):
+            self.fetch_ids(bases)
+        children = []
+        for base, instance, parent in self.plugins:
+            if parent is not None:
+                base.parent = parent
+                children.append(base)
+        CMSPlugin.objects.bulk_update(children, ["parent"])
+        instances = defaultdict(list)
+        for base, instance, parent in self.plugins:
+            for field in CMSPlugin._meta.concrete_fields:
+                setattr(instance, field.attname, getattr(base, field.attname))
+            instance.pk = base.pk
+            instances[type(instance)].append(instance)
+        for model, objs in instances.items():
+            self.insert(model, objs)
+        self.plugins = []
+        self.positions.clear()
+        return [instance for objs in instances.values() for instance in objs]
+
+    def get_last_positions(self):
+        placeholders = {base.placeholder_id for base, instance, parent in self.plugins}
+        return {
+            (row["placeholder_id"], row["language"]): row["last_position"]
+            for row in CMSPlugin.objects.filter(placeholder_id__in=placeholders)
+            .values("placeholder_id", "language")
+            .annotate(last_position=Max("position"))
+            .order_by()
+        }
+
+    def fetch_ids(self, bases):
+        """Set primary keys of inserted plugins, for backends which
+        can't return them from bulk inserts."""
+        placeholders = {base.placeholder_id for base in bases}
+        ids = {
+            (placeholder_id, language, position): pk
+            for pk, placeholder_id, language, position in CMSPlugin.objects.filter(
+                placeholder_id__in=placeholders
+            ).values_list("pk", "placeholder_id", "language", "position")
+        }
+        for base in bases:
+            base.pk = ids[base.placeholder_id, base.language, base.position]
+
+    def insert(self, model, objs):
+        """Insert rows of the plugin model table only, the CMSPlugin
+        rows they point to already exist. `bulk_create` doesn't
+        support multi-table inheritance, hence the lower level insert.
+        """
+        using = router.db_for_write(model)
+        fields = model._meta.local_concrete_fields
+        batch_size = connections[using].ops.bulk_batch_size(fields, objs)
+        for start in range(0, len(objs), batch_size):
+            model._base_manager._insert(
+                objs[start:start + batch_size], fields=fields, using=using
+            )
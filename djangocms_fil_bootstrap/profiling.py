@@ -0,0 +1,162 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+FIELDS = ["time", "queries", "query_time", "rows", "peak_memory"]
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries, their time and
+    rows inserted by them (see `connection.execute_wrapper`)."""
+
+    def __init__(self):
+        self.queries = 0
+        self.time = 0
+        self.rows = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            result = execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - start
+            self.queries += 1
+        if sql.lstrip().upper().startswith("INSERT"):
+            self.rows += self.get_inserted_rows(sql, params, many, context["cursor"])
+        return result
+
+    def get_inserted_rows(self, sql, params, many, cursor):
+        if cursor.description is None and cursor.rowcount >= 0:
+            return cursor.rowcount
+        # Rows returned by the insert (e.g. primary keys) haven't been
+        # fetched yet, so the row count isn't known. Count value groups
+        # from the number of parameters and inserted columns instead.
+        if many:
+            return len(params) if hasattr(params, "__len__") else 0
+        columns = sql[sql.find("(") + 1:sql.find(")")].count(",") + 1
+        return max(len(params or ()) // columns, 1)
+
+
+class Profiler:
+    """Wall time, queries, query time, rows inserted and peak memory
+    of each component, by data source.
+
+    Peak memory is measured with `tracemalloc` (which slows the run
+    down) and covers all threads, so it isn't accurate for components
+    running concurrently.
+    """
+
+    def __init__(self):
+        self.results = {}
+        self.lock = threading.Lock()
+        # Query counter of the component measured in each thread
+        self.local = threading.local()
+        # Measurements in progress, tracing stops after the last one
+        self.active = 0
+        self.started_tracing = False
+
+    @contextmanager
+    def measure(self, source, component):
+        counter = QueryCounter()
+        with self.lock:
+            if not self.active and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            self.active += 1
+            memory = self.reset_peak()
+        self.local.counter = counter
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(counter):
+                yield
+        finally:
+            self.local.counter = None
+            result = {
+                "time": time.perf_counter() - start,
+                "queries": counter.queries,
+                "query_time": counter.time,
+                "rows": counter.rows,
+                "peak_memory": max(tracemalloc.get_traced_memory()[1] - memory, 0),
+            }
+            with self.lock:
+                self.results.setdefault(source, {})[component] = result
+                self.active -= 1
+                if not self.active and self.started_tracing:
+                    tracemalloc.stop()
+                    self.started_tracing = False
+
+    def add(self, queries, query_time, rows):
+        """Add queries made by other processes (e.g. page workers) to
+        the component measured in this thread."""
+        counter = getattr(self.local, "counter", None)
+        if counter is not None:
+            counter.queries += queries
+            counter.time += query_time
+            counter.rows += rows
+
+    def reset_peak(self):
+        """Reset peak of traced memory, returns memory in use."""
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+            return tracemalloc.get_traced_memory()[0]
+        # Python < 3.9
+        tracemalloc.clear_traces()
+        return 0
+
+    def get_rows(self):
+        """Return results as (source, component, *values) rows,
+        with totals of each source."""
+        rows = []
+        for source, components in self.results.items():
+            totals = dict.fromkeys(FIELDS, 0)
+            for component, result in components.items():
+                rows.append([source, component] + [result[field] for field in FIELDS])
+                for field in FIELDS:
+                    if field == "peak_memory":
+                        totals[field] = max(totals[field], result[field])
+                    else:
+                        totals[field] += result[field]
+            rows.append([source, "total"] + [totals[field] for field in FIELDS])
+        return rows
+
+    def format_table(self):
+        header = [
+            "source",
+            "component",
+            "time (s)",
+            "queries",
+            "query time (s)",
+            "rows",
+            "peak memory (KiB)",
+        ]
+        lines = [header]
+        for row in self.get_rows():
+            source, component, time_, queries, query_time, rows, memory = row
+            lines.append(
+                [
+                    source,
+                    component,
+                    "{:.3f}".format(time_),
+                    str(queries),
+                    "{:.3f}".format(query_time),
+                    str(rows),
+                    str(memory // 1024),
+                ]
+            )
+        widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+        return "\n".join(
+            "  ".join(
+                value.ljust(width) if i < 2 else value.rjust(width)
+                for i, (value, width) in enumerate(zip(line, widths))
+            ).rstrip()
+            for line in lines
+        )
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.results, f, indent=2)
@@ -0,0 +1,182 @@
+from collections import defaultdict
+
+from django.db import connections
+from django.utils import timezone
+
+from cms.cache import invalidate_cms_page_cache
+from menus.menu_pool import menu_pool
+
+from djangocms_versioning import versionables
+from djangocms_versioning.constants import (
+    DRAFT,
+    OPERATION_PUBLISH,
+    OPERATION_UNPUBLISH,
+    PUBLISHED,
+    UNPUBLISHED,
+)
+from djangocms_versioning.models import StateTracking, Version
+from djangocms_versioning.operations import (
+    send_post_version_operation,
+    send_pre_version_operation,
+)
+
+from .signals import versions_published
+from .utils import iter_in
+
+
+# Transitions of `Version` moving versions to the state
+TRANSITIONS = {PUBLISHED: "_set_publish", UNPUBLISHED: "_set_unpublish"}
+
+
+class Publisher:
+    """Publish versions in bulk once all content has been created.
+
+    Versions are queued with `add` and published with `publish`, which
+    moves them to PUBLISHED with one update per content type, and
+    unpublishes versions previously published for the same groupers.
+    State changes are tracked same as with `Version.publish`.
+
+    By default the versioning signals (publish and unpublish operations)
+    and `on_publish` / `on_unpublish` hooks still run for each version.
+    Unlike `Version.publish`, the pre operation signals of all versions
+    are sent before any state changes and the post operation signals
+    after all of them, `save` and the `post_save` signal of versions are
+    skipped, and permissions and locks of the users aren't checked.
+    With `signals=False` the versioning signals and hooks are skipped
+    as well and `versions_published` is sent once per content type,
+    page and menu caches are cleared once at the end.
+    """
+
+    def __init__(self, signals=True):
+        self.signals = signals
+        self.queue = defaultdict(list)
+
+    def add(self, version, user):
+        self.queue[version.content_type_id].append((version, user))
+
+    def publish(self):
+        """Publish all queued versions. Returns list of published versions."""
+        published = []
+        for items in self.queue.values():
+            published.extend(self.publish_versions(items))
+        self.queue.clear()
+        if published and not self.signals:
+            invalidate_cms_page_cache()
+            menu_pool.clear(all=True)
+        return published
+
+    def publish_versions(self, items):
+        versions = [version for version, user in items]
+        model = versions[0].content_type.model_class()
+        versionable = versionables.for_content(model)
+        unpublished = self.get_published(versionable, items)
+        # Versions replacing the published ones, by grouping
+        new = {self.get_grouping(versionable, version.content): version for version in versions}
+        tokens = {}
+        if self.signals:
+            for version in versions:
+                tokens[version.pk] = send_pre_version_operation(
+                    OPERATION_PUBLISH, version=version
+                )
+            for version, user in unpublished:
+                tokens[version.pk] = send_pre_version_operation(
+                    OPERATION_UNPUBLISH,
+                    version=version,
+                    to_be_published=new[self.get_grouping(versionable, version.content)],
+                )
+        self.set_state(items, DRAFT, PUBLISHED)
+        self.set_state(unpublished, PUBLISHED, UNPUBLISHED)
+        if self.signals:
+            replaced = defaultdict(list)
+            for version, user in unpublished:
+                grouping = self.get_grouping(versionable, version.content)
+                replaced[grouping].append(version)
+                if versionable.on_unpublish:
+                    versionable.on_unpublish(version)
+                send_post_version_operation(
+                    OPERATION_UNPUBLISH,
+                    version=version,
+                    token=tokens[version.pk],
+                    to_be_published=new[grouping],
+                )
+            for version in versions:
+                if versionable.on_publish:
+                    versionable.on_publish(version)
+                send_post_version_operation(
+                    OPERATION_PUBLISH,
+                    version=version,
+                    token=tokens[version.pk],
+                    unpublished=replaced[
+                        self.get_grouping(versionable, version.content)
+                    ],
+                )
+        else:
+            versions_published.send(
+                sender=model,
+                versions=versions,
+                unpublished=[version for version, user in unpublished],
+            )
+        return versions
+
+    def get_grouping(self, versionable, content):
+        return (getattr(content, versionable.grouper_field_name + "_id"),) + tuple(
+            getattr(content, field) for field in versionable.extra_grouping_fields
+        )
+
+    def get_published(self, versionable, items):
+        """Return (version, user) of published versions sharing a grouper
+        with the queued versions, these are unpublished by the user
+        publishing the new version."""
+        content_type_id = items[0][0].content_type_id
+        users = {
+            self.get_grouping(versionable, version.content): user
+            for version, user in items
+        }
+        grouper_ids = {grouping[0] for grouping in users}
+        contents = {
+            content.pk: content
+            for content in iter_in(
+                versionable.content_model._base_manager.all(),
+                versionable.grouper_field_name + "_id",
+                grouper_ids,
+            )
+            if self.get_grouping(versionable, content) in users
+        }
+        published = iter_in(
+            Version.objects.filter(content_type=content_type_id, state=PUBLISHED),
+            "object_id",
+            contents,
+        )
+        result = []
+        for version in published:
+            version.content = contents[version.object_id]
+            user = users[self.get_grouping(versionable, version.content)]
+            result.append((version, user))
+        return result
+
+    def set_state(self, items, old_state, new_state):
+        if not items:
+            return
+        modified = timezone.now()
+        for version, user in items:
+            # Changes the state of the instances, or raises
+            # `TransitionNotAllowed` before anything is written
+            getattr(version, TRANSITIONS[new_state])(user)
+            version.modified = modified
+        pks = [version.pk for version, user in items]
+        batch_size = connections[Version.objects.db].features.max_query_params or len(pks)
+        for start in range(0, len(pks), batch_size):
+            Version.objects.filter(pk__in=pks[start:start + batch_size]).update(
+                state=new_state, modified=modified
+            )
+        StateTracking.objects.bulk_create(
+            [
+                StateTracking(
+                    version=version,
+                    old_state=old_state,
+                    new_state=new_state,
+                    user=user,
+                )
+                for version, user in items
+            ]
+        )
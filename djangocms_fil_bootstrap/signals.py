@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+
+# Sent once per content model by `Publisher.publish` when per-version
+# publish hooks and signals are skipped. Arguments: `versions` (published)
+# and `unpublished` (versions unpublished in their place).
+versions_published = Signal()
@@ -0,0 +1,431 @@
+import copy
+import json
+from collections import deque
+
+from django.apps import apps
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Max, UniqueConstraint
+
+from .fingerprints import get_registry, load_registry
+from .models import Fingerprint
+from .utils import VersionRegistry, iter_in
+
+
+FORMAT = 1
+
+# Values which have to be unique, but aren't unique in the database
+UNIQUE_TOGETHER = {"cms.pageurl": [("language", "path")]}
+
+
+class SnapshotConflict(Exception):
+    """Rows of a snapshot conflict with rows of the database
+    it's replayed into."""
+
+
+def get_models():
+    """Models with a table of their own, including many-to-many
+    through tables. Fingerprints are left out, they describe
+    the database the bootstrap ran on."""
+    return [
+        model
+        for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy and model is not Fingerprint
+    ]
+
+
+def get_fields(model):
+    # Parent models of multi-table inheritance have tables of their own
+    return model._meta.local_concrete_fields
+
+
+def get_relations(model):
+    """Foreign keys (and one to one fields) of `model` pointing to
+    primary keys of other rows."""
+    return [
+        field
+        for field in get_fields(model)
+        if field.is_relation and field.target_field.primary_key
+    ]
+
+
+def get_unique_fields(model):
+    """Return tuples of attnames of `model` whose values have to be
+    unique together, other than the primary key."""
+    opts = model._meta
+    unique = [(field.attname,) for field in get_fields(model) if field.unique and not field.primary_key]
+    unique_together = [*opts.unique_together, *UNIQUE_TOGETHER.get(opts.label_lower, [])]
+    unique_together.extend(
+        constraint.fields
+        for constraint in opts.constraints
+        if isinstance(constraint, UniqueConstraint)
+        and constraint.fields
+        and constraint.condition is None
+    )
+    local = {field.name: field.attname for field in get_fields(model)}
+    unique.extend(
+        tuple(local[name] for name in names)
+        for names in unique_together
+        if all(name in local for name in names)
+    )
+    return unique
+
+
+def sort_models(models):
+    """Return `models` ordered so that models come after the models
+    they reference. Rows of models referencing each other, or themselves,
+    are inserted with constraint checks deferred."""
+    dependencies = {
+        model: {field.related_model for field in get_relations(model)} & set(models) - {model}
+        for model in models
+    }
+    dependants = {model: [] for model in models}
+    remaining = {}
+    for model, depends_on in dependencies.items():
+        remaining[model] = len(depends_on)
+        for dependency in depends_on:
+            dependants[dependency].append(model)
+    ready = deque(model for model in models if not remaining[model])
+    order = []
+    while ready:
+        model = ready.popleft()
+        order.append(model)
+        for dependant in dependants[model]:
+            remaining[dependant] -= 1
+            if not remaining[dependant]:
+                ready.append(dependant)
+    return order + [model for model in models if model not in order]
+
+
+class Snapshot:
+    """Rows written by a bootstrap run, which can be inserted again
+    without running the components.
+
+    Call `start` before bootstrapping and `finish` with the bootstrap
+    afterwards. Rows which didn't exist when `start` was called are
+    captured, changes to rows which existed already are not. `restore`
+    inserts the captured rows with their primary keys, one insert
+    (or a few, for large tables) per model, and returns the bootstrap
+    with the objects of its components loaded from the database.
+
+    Snapshots can be written to a file with `dump` and read with
+    `load`, e.g. to `replay` them into another database.
+    """
+
+    def __init__(self, using="default"):
+        self.using = using
+        self.existing = {}
+        self.rows = {}
+        # Natural keys of rows referenced by captured rows which were
+        # there already (e.g. content types), by model and primary key
+        self.references = {}
+        self.bootstrap = None
+        # Objects of components, by field name: (model label, pk)
+        # of model instances, or the objects themselves otherwise
+        self.registries = {}
+        self.data = {}
+
+    def start(self):
+        """Record the last primary key of each table, rows after it
+        are the ones created by the run."""
+        self.existing = {}
+        for model in get_models():
+            manager = model._base_manager.using(self.using)
+            last = manager.aggregate(last=Max("pk"))["last"]
+            if last is not None and not isinstance(last, int):
+                # Keys other than numbers (e.g. session keys) don't grow
+                last = set(manager.values_list("pk", flat=True))
+            self.existing[model] = last
+
+    def finish(self, bootstrap=None, components=()):
+        """Capture new rows and objects of `components` of `bootstrap`."""
+        for model in sort_models(get_models()):
+            existing = self.existing.get(model)
+            attnames = [field.attname for field in get_fields(model)]
+            pk_index = attnames.index(model._meta.pk.attname)
+            queryset = model._base_manager.using(self.using).order_by("pk")
+            if isinstance(existing, int):
+                queryset = queryset.filter(pk__gt=existing)
+            rows = [
+                row
+                for row in queryset.values_list(*attnames)
+                if not isinstance(existing, set) or row[pk_index] not in existing
+            ]
+            if rows:
+                self.rows[model] = (attnames, rows)
+        self.existing = {}
+        self.bootstrap = bootstrap
+        for component in components:
+            name = component.field_name
+            data = getattr(bootstrap, name).data
+            registry = get_registry(data)
+            if registry is None:
+                self.data[name] = data
+            else:
+                self.registries[name] = registry
+
+    def restore(self):
+        """Insert captured rows and return the bootstrap."""
+        self.insert_all(self.rows)
+        return self.get_bootstrap()
+
+    def insert_all(self, tables):
+        connection = connections[self.using]
+        with connection.constraint_checks_disabled():
+            for model, (attnames, rows) in tables.items():
+                self.insert(model, attnames, rows)
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in tables]
+        )
+        # Primary keys were inserted explicitly, sequences have to catch up
+        statements = connection.ops.sequence_reset_sql(no_style(), list(tables))
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def insert(self, model, attnames, rows):
+        """Insert rows of the model's own table, same as
+        `PluginTreeBuilder.insert`."""
+        fields = get_fields(model)
+        objs = [model(**dict(zip(attnames, row))) for row in rows]
+        connection = connections[self.using]
+        batch_size = connection.ops.bulk_batch_size(fields, objs) or len(objs)
+        for start in range(0, len(objs), batch_size):
+            model._base_manager._insert(
+                objs[start:start + batch_size], fields=fields, using=self.using
+            )
+
+    def get_bootstrap(self):
+        """Return copy of the bootstrap, with objects of the components
+        loaded from the database (or copied, if they aren't models)."""
+        bootstrap = copy.copy(self.bootstrap)
+        bootstrap.versions = VersionRegistry()
+        for name in [*self.registries, *self.data]:
+            component = copy.copy(getattr(self.bootstrap, name))
+            component.bootstrap = bootstrap
+            if name in self.registries:
+                component.data = load_registry(self.registries[name])
+            else:
+                component.data = copy.deepcopy(self.data[name])
+            setattr(bootstrap, name, component)
+        return bootstrap
+
+    def get_pks(self, model):
+        attnames, rows = self.rows.get(model, ((), ()))
+        if not rows:
+            return set()
+        pk_index = attnames.index(model._meta.pk.attname)
+        return {row[pk_index] for row in rows}
+
+    def get_references(self):
+        """Natural keys of rows referenced by the captured rows which
+        aren't captured themselves, for models which have them."""
+        referenced = {}
+        for model, (attnames, rows) in self.rows.items():
+            for field in get_relations(model):
+                target = field.related_model
+                if not hasattr(target, "natural_key") or not hasattr(
+                    target._default_manager, "get_by_natural_key"
+                ):
+                    continue
+                index = attnames.index(field.attname)
+                referenced.setdefault(target, set()).update(
+                    row[index] for row in rows if row[index] is not None
+                )
+        references = {}
+        for model, pks in referenced.items():
+            pks -= self.get_pks(model)
+            objs = model._base_manager.using(self.using).in_bulk(pks)
+            if objs:
+                references[model] = {pk: list(obj.natural_key()) for pk, obj in objs.items()}
+        return references
+
+    def dump(self, file):
+        """Write captured rows to `file` as JSON, ordered so that rows
+        come after the rows they reference."""
+        json.dump(
+            {
+                "format": FORMAT,
+                "references": {
+                    model._meta.label_lower: list(keys.items())
+                    for model, keys in self.get_references().items()
+                },
+                "tables": [
+                    {"model": model._meta.label_lower, "fields": attnames, "rows": rows}
+                    for model, (attnames, rows) in self.rows.items()
+                ],
+            },
+            file,
+            cls=DjangoJSONEncoder,
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def load(cls, file, using="default"):
+        """Read snapshot written with `dump`."""
+        data = json.load(file)
+        if data.get("format") != FORMAT:
+            raise ValueError("Unsupported snapshot format: {}.".format(data.get("format")))
+        snapshot = cls(using)
+        for table in data["tables"]:
+            model = apps.get_model(table["model"])
+            fields = {field.attname: field for field in get_fields(model)}
+            rows = [
+                tuple(
+                    value if value is None or fields[attname].is_relation
+                    else fields[attname].to_python(value)
+                    for attname, value in zip(table["fields"], row)
+                )
+                for row in table["rows"]
+            ]
+            snapshot.rows[model] = (table["fields"], rows)
+        snapshot.references = {
+            apps.get_model(label): {pk: tuple(key) for pk, key in keys}
+            for label, keys in data["references"].items()
+        }
+        return snapshot
+
+    def replay(self):
+        """Insert the rows into the current database. Referenced rows
+        which were there already (e.g. content types) are looked up by
+        their natural keys. Primary keys of captured rows are shifted
+        past the existing ones if they are taken. Other unique values
+        (e.g. usernames, tree and url paths) aren't changed, the rows
+        aren't inserted and `SnapshotConflict` is raised if any of them
+        is taken. Returns the number of inserted rows."""
+        mapping = self.get_reference_mapping()
+        offsets = self.get_offsets()
+        tables = {}
+        for model, (attnames, rows) in self.rows.items():
+            remap = self.get_remap(model, attnames, mapping, offsets)
+            tables[model] = (attnames, [remap(row) for row in rows])
+        for model, (attnames, rows) in tables.items():
+            self.check_conflicts(model, attnames, rows)
+        self.insert_all(tables)
+        return sum(len(rows) for attnames, rows in tables.values())
+
+    def check_conflicts(self, model, attnames, rows):
+        """Raise `SnapshotConflict` if unique values of `rows` exist
+        in the database already."""
+        manager = model._base_manager.using(self.using)
+        for fields in get_unique_fields(model):
+            if not all(attname in attnames for attname in fields):
+                continue
+            indexes = [attnames.index(attname) for attname in fields]
+            values = {
+                tuple(row[index] for index in indexes)
+                for row in rows
+                if all(row[index] is not None for index in indexes)
+            }
+            if not values:
+                continue
+            conflicts = [
+                value
+                for value in iter_in(
+                    manager.values_list(*fields), fields[0], {value[0] for value in values}
+                )
+                if value in values
+            ]
+            if conflicts:
+                raise SnapshotConflict(
+                    "{} rows of {} exist already ({}: {}). Snapshots can only be "
+                    "replayed into databases without bootstrapped data.".format(
+                        len(conflicts),
+                        model._meta.label_lower,
+                        ", ".join(fields),
+                        ", ".join(
+                            "/".join(str(part) for part in value) for value in conflicts[:5]
+                        ),
+                    )
+                )
+
+    def get_reference_mapping(self):
+        """Return primary keys of referenced rows in the current database,
+        by model and primary key in the snapshot."""
+        mapping = {}
+        for model, keys in self.references.items():
+            manager = model._default_manager.db_manager(self.using)
+            mapping[model] = {
+                pk: manager.get_by_natural_key(*key).pk for pk, key in keys.items()
+            }
+        return mapping
+
+    def get_offsets(self):
+        """Return how much to shift primary keys of each model, so that
+        they don't conflict with existing rows."""
+        offsets = {}
+        for model in self.rows:
+            pk = model._meta.pk
+            if pk.is_relation:
+                # Multi-table inheritance, same key as the parent row
+                continue
+            pks = self.get_pks(model)
+            if not all(isinstance(value, int) for value in pks):
+                continue
+            manager = model._base_manager.using(self.using)
+            if manager.filter(pk__in=pks).exists():
+                last = manager.aggregate(last=Max("pk"))["last"]
+                offsets[model] = last - min(pks) + 1
+        return offsets
+
+    def get_remap(self, model, attnames, mapping, offsets):
+        """Return function changing keys of a row of `model`."""
+        captured = {}
+
+        def remap_key(target, value):
+            if value is None:
+                return None
+            if target not in captured:
+                captured[target] = self.get_pks(target)
+            if value in captured[target]:
+                while target._meta.pk.is_relation:
+                    target = target._meta.pk.related_model
+                return value + offsets.get(target, 0)
+            return mapping.get(target, {}).get(value, value)
+
+        fields = {field.attname: field for field in get_fields(model)}
+        relations = get_relations(model)
+        remaps = []
+        for field in (fields[attname] for attname in attnames):
+            if field.primary_key and not field.is_relation:
+                remaps.append(lambda value, row: remap_key(model, value))
+            elif field in relations:
+                remaps.append(
+                    lambda value, row, target=field.related_model: remap_key(target, value)
+                )
+            else:
+                remaps.append(None)
+        content_types = apps.get_model("contenttypes", "ContentType")
+        for field in model._meta.private_fields:
+            # Object ids of generic foreign keys are keys of the model
+            # of the content type
+            if not isinstance(field, GenericForeignKey):
+                continue
+            ct_index = attnames.index(model._meta.get_field(field.ct_field).attname)
+            fk_index = attnames.index(model._meta.get_field(field.fk_field).attname)
+
+            def remap_object_id(value, row, ct_index=ct_index):
+                if value is None or row[ct_index] is None:
+                    return value
+                content_type = content_types.objects.db_manager(self.using).get_for_id(
+                    remap_key(content_types, row[ct_index])
+                )
+                target = content_type.model_class()
+                if target is None:
+                    return value
+                target_pk = target._meta.pk
+                remapped = remap_key(target, target_pk.to_python(value))
+                return remapped if isinstance(value, int) else str(remapped)
+
+            remaps[fk_index] = remap_object_id
+
+        def remap(row):
+            return tuple(
+                value if function is None else function(value, row)
+                for function, value in zip(remaps, row)
+            )
+
+        return remap
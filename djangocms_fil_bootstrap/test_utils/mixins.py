@@ -0,0 +1,64 @@
+import json
+import os
+from pathlib import Path
+
+from factory.random import reseed_random
+
+from .. import get_components
+from ..bootstrapper import Bootstrap
+from ..snapshots import Snapshot
+
+
+# Snapshots of bootstrapped sources by source and options, kept for
+# the lifetime of the process (i.e. per test runner worker)
+snapshots = {}
+
+
+def get_source_path(source):
+    if os.path.exists(source):
+        return source
+    package_root = Path(__file__).resolve().parents[1]
+    return str(package_root / "builtin_data" / "{}.json".format(source))
+
+
+def bootstrap_once(source, **options):
+    """Bootstrap `source` (name of a builtin data source or path)
+    and return the bootstrap.
+
+    Components run only the first time a source is bootstrapped with
+    the same options in a process. Rows they wrote are captured, and
+    later calls insert them again and load objects of the components
+    (`bootstrap.users["admin"]` etc.) from the database. Has to be
+    called in a transaction which is rolled back afterwards, e.g. in
+    `TestCase.setUpTestData`, otherwise the rows are there already.
+    """
+    path = get_source_path(source)
+    key = (path, json.dumps(options, sort_keys=True, default=str))
+    if key in snapshots:
+        return snapshots[key].restore()
+    snapshot = Snapshot()
+    snapshot.start()
+    reseed_random(0)
+    components = get_components()
+    bootstrap = Bootstrap.from_file(path, **options)
+    bootstrap(*components)
+    snapshot.finish(bootstrap, components)
+    snapshots[key] = snapshot
+    return snapshot.get_bootstrap()
+
+
+class BootstrapTestMixin:
+    """Mixin for `django.test.TestCase` bootstrapping `bootstrap_source`
+    once per process instead of in each test class.
+
+    The bootstrap is available as `self.bootstrap`. Each test runs in
+    a savepoint of the class transaction, as usual with `TestCase`.
+    """
+
+    bootstrap_source = "demo"
+    bootstrap_options = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.bootstrap = bootstrap_once(cls.bootstrap_source, **cls.bootstrap_options)
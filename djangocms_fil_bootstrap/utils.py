@@ -1,3 +1,10 @@
+from contextlib import contextmanager
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.db.models import Max
+from django.db.models.signals import post_save
+
 from cms.models import PageContent
 
 from djangocms_versioning.models import Version
@@ -7,3 +14,132 @@ def get_version(page):
     return Version.objects.get_for_content(
         PageContent._base_manager.filter(page=page).last()
     )
+
+
+@contextmanager
+def capture_versions():
+    """Collect versions created inside the block, e.g. by
+    `cms.api.create_page`, which doesn't return them."""
+    versions = []
+
+    def receiver(sender, instance, created, **kwargs):
+        if created:
+            versions.append(instance)
+
+    post_save.connect(receiver, sender=Version, weak=False)
+    try:
+        yield versions
+    finally:
+        post_save.disconnect(receiver, sender=Version)
+
+
+class VersionRegistry:
+    """Latest versions of pages, shared by components of a bootstrap run.
+
+    Components creating page content register its version with `add`,
+    so it doesn't have to be looked up again. Versions of pages that
+    weren't registered (e.g. created by an earlier run) are loaded
+    in batches with `prefetch`.
+    """
+
+    def __init__(self):
+        self.versions = {}
+
+    def __contains__(self, page):
+        return page.pk in self.versions
+
+    def add(self, page, version):
+        self.versions[page.pk] = version
+
+    def get(self, page):
+        if page not in self:
+            self.prefetch([page])
+        return self.versions[page.pk]
+
+    def prefetch(self, pages):
+        """Load versions of all unregistered `pages` with two queries
+        (more if there are too many pages for the backend).
+
+        Same as `get_version`, the version of the most recent
+        page content is used.
+        """
+        pages = [page for page in pages if page not in self]
+        if not pages:
+            return
+        contents = {}
+        # Contents of a page are in the same batch, ordered by pk
+        for content in iter_in(
+            PageContent._base_manager.order_by("pk"), "page_id", {page.pk for page in pages}
+        ):
+            contents[content.page_id] = content
+        versions = iter_in(
+            Version.objects.filter(content_type=ContentType.objects.get_for_model(PageContent)),
+            "object_id",
+            [content.pk for content in contents.values()],
+        )
+        versions = {version.object_id: version for version in versions}
+        for page_id, content in contents.items():
+            version = versions[content.pk]
+            version.content = content
+            self.versions[page_id] = version
+
+
+def bulk_create(model, objs, key):
+    """Insert `objs` and return them in a dict keyed by the `key` field.
+
+    Backends which can't return primary keys from bulk inserts
+    get them with two extra queries: the last primary key before
+    the insert, and the rows inserted after it by `key`, which has
+    to be unique among the inserted rows (but not in the table).
+    """
+    manager = model._base_manager
+    queryset = manager.values_list(key, "pk")
+    if not connections[manager.db].features.can_return_rows_from_bulk_insert:
+        last_pk = manager.aggregate(last_pk=Max("pk"))["last_pk"]
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+    objs = manager.bulk_create(objs)
+    missing = {getattr(obj, key): obj for obj in objs if obj.pk is None}
+    if missing:
+        for value, pk in iter_in(queryset, key, missing):
+            if value in missing:
+                missing[value].pk = pk
+    return {getattr(obj, key): obj for obj in objs}
+
+
+def iter_in(queryset, key, values):
+    """Iterate over `queryset.filter(key__in=values)`, split into
+    several queries if there are too many values for the backend."""
+    values = list(values)
+    batch_size = connections[queryset.db].features.max_query_params or len(values) or 1
+    for start in range(0, len(values), batch_size):
+        yield from queryset.filter(**{key + "__in": values[start:start + batch_size]})
+
+
+def bulk_add(field, pairs):
+    """Insert (source pk, target pk) `pairs` into the through table
+    of the many-to-many `field` with a single insert.
+
+    Pairs that already exist are skipped. Returns a tuple with
+    the number of inserted and skipped rows.
+    """
+    through = field.remote_field.through
+    source = field.m2m_field_name() + "_id"
+    target = field.m2m_reverse_field_name() + "_id"
+    pairs = set(pairs)
+    if not pairs:
+        return 0, 0
+    sources = {source_pk for source_pk, target_pk in pairs}
+    targets = {target_pk for source_pk, target_pk in pairs}
+    # Look up existing rows by the side with fewer distinct keys
+    key, values = (source, sources) if len(sources) <= len(targets) else (target, targets)
+    existing = iter_in(through.objects.values_list(source, target), key, values)
+    missing = pairs - set(existing)
+    through.objects.bulk_create(
+        [
+            through(**{source: source_pk, target: target_pk})
+            for source_pk, target_pk in missing
+        ],
+        ignore_conflicts=True,
+    )
+    return len(missing), len(pairs) - len(missing)
@@ -25,6 +25,7 @@ setup(
         "Topic :: Software Development",
     ],
     install_requires=INSTALL_REQUIREMENTS,
+    extras_require={"zstd": ["zstandard"]},
     test_suite="test_settings.run",
     author="Fidelity International",
     url="http://github.com/FidelityInternational/djangocms-fil-bootstrap",
@@ -1,8 +1,39 @@
-from unittest.mock import Mock, call, mock_open, patch
+from io import StringIO
+from unittest.mock import MagicMock, Mock, call, mock_open, patch
 
 from django.test import TestCase
 
-from djangocms_fil_bootstrap.bootstrapper import Bootstrap
+from djangocms_fil_bootstrap.bootstrapper import Bootstrap, sort_components
+from djangocms_fil_bootstrap.components.base import Component, diff
+from djangocms_fil_bootstrap.loaders import StreamingSource
+
+
+def component(field_name, *depends_on):
+    return Mock(spec=[], field_name=field_name, depends_on=depends_on)
+
+
+class SortComponentsTestCase(TestCase):
+    def test_order(self):
+        users = component("users")
+        groups = component("groups", "users")
+        pages = component("pages", "users")
+        collections = component("collections", "pages", "workflows")
+        workflows = component("workflows", "users", "groups")
+        self.assertEqual(
+            sort_components([collections, workflows, pages, groups, users]),
+            [users, pages, groups, workflows, collections],
+        )
+
+    def test_missing_dependencies_are_ignored(self):
+        pages = component("pages", "users")
+        collections = component("collections", "pages")
+        self.assertEqual(sort_components([collections, pages]), [pages, collections])
+
+    def test_circular(self):
+        one = component("one", "two")
+        two = component("two", "one")
+        with self.assertRaises(ValueError):
+            sort_components([one, two, component("three")])
 
 
 class BootstrapTestCase(TestCase):
@@ -28,6 +59,44 @@ class BootstrapTestCase(TestCase):
         json_load.assert_called_once_with(file_)
         self.assertEqual(bootstrap.raw_data, json_load.return_value)
 
+    def test_load_stream(self):
+        bootstrap = Bootstrap(StringIO('{"users": ["foo"]}'), stream=True)
+        self.assertIsInstance(bootstrap.raw_data, StreamingSource)
+        self.assertEqual(bootstrap.data("users"), ["foo"])
+        self.assertIsNone(bootstrap.data("groups"))
+
+    def test_from_file_stream(self):
+        with patch.object(Bootstrap, "load") as load, patch(
+            "djangocms_fil_bootstrap.bootstrapper.open_source"
+        ) as open_source:
+            Bootstrap.from_file("foo", stream=True)
+        open_source.assert_called_once_with("foo")
+        load.assert_called_once_with(open_source.return_value)
+
+    def test_each_stream_drops_data(self):
+        bootstrap = Bootstrap(StringIO('{"test_field": [1], "other": [2]}'), stream=True)
+        component = Mock(spec=[], field_name="test_field", raw_data=None)
+        component_class = Mock(spec=[], return_value=component)
+
+        def parse(raw_data):
+            component.raw_data = raw_data
+
+        component.side_effect = parse
+        bootstrap.each(component_class)
+        component.assert_called_once_with([1])
+        self.assertIsNone(component.raw_data)
+        self.assertNotIn("test_field", bootstrap.raw_data.pending)
+
+    def test_each_profiled(self):
+        profiler = MagicMock()
+        bootstrap = Bootstrap(StringIO('{"test_field": [1]}'), profiler=profiler)
+        bootstrap.source = "demo"
+        component = Mock(spec=[], field_name="test_field")
+        component_class = Mock(spec=[], field_name="test_field", return_value=component)
+        bootstrap.each(component_class)
+        profiler.measure.assert_called_once_with("demo", "test_field")
+        component.assert_called_once_with([1])
+
     def test_data(self):
         with patch.object(Bootstrap, "load"):
             bootstrap = Bootstrap(Mock())
@@ -38,9 +107,71 @@ class BootstrapTestCase(TestCase):
     def test_call(self):
         with patch.object(Bootstrap, "load"):
             bootstrap = Bootstrap(Mock())
+        components = [component("one"), component("two"), component("three")]
+        with patch.object(bootstrap, "each") as each:
+            bootstrap(*components)
+        each.assert_has_calls([call(component) for component in components])
+
+    def test_call_dependency_order(self):
+        with patch.object(Bootstrap, "load"):
+            bootstrap = Bootstrap(Mock())
+        users = component("users")
+        pages = component("pages", "users")
+        collections = component("collections", "users", "pages")
         with patch.object(bootstrap, "each") as each:
-            bootstrap(1, 2, 3)
-        each.assert_has_calls([call(1), call(2), call(3)])
+            bootstrap(collections, pages, users)
+        self.assertEqual(each.call_args_list, [call(users), call(pages), call(collections)])
+
+    def test_call_concurrent(self):
+        with patch.object(Bootstrap, "load"):
+            bootstrap = Bootstrap(Mock(), concurrent=True)
+        components = [component("one"), component("two")]
+        with patch.object(
+            bootstrap, "can_run_concurrently", return_value=True
+        ), patch.object(bootstrap, "run_concurrently") as run_concurrently, patch.object(
+            bootstrap, "each"
+        ) as each:
+            bootstrap(*components)
+        run_concurrently.assert_called_once_with(components)
+        each.assert_not_called()
+
+    def test_call_concurrent_not_supported(self):
+        with patch.object(Bootstrap, "load"):
+            bootstrap = Bootstrap(Mock(), concurrent=True)
+        components = [component("one"), component("two")]
+        # Tests run inside a transaction
+        self.assertFalse(bootstrap.can_run_concurrently())
+        with patch.object(bootstrap, "run_concurrently") as run_concurrently, patch.object(
+            bootstrap, "each"
+        ) as each, self.assertLogs("djangocms_fil_bootstrap.bootstrapper", "WARNING"):
+            bootstrap(*components)
+        run_concurrently.assert_not_called()
+        each.assert_has_calls([call(component) for component in components])
+
+    def test_run_concurrently(self):
+        with patch.object(Bootstrap, "load"):
+            bootstrap = Bootstrap(Mock(), concurrent=True)
+        users = component("users")
+        groups = component("groups", "users")
+        pages = component("pages", "users")
+        collections = component("collections", "users", "pages")
+        done = []
+        with patch.object(bootstrap, "each_in_thread", side_effect=done.append):
+            bootstrap.run_concurrently([users, groups, pages, collections])
+        self.assertEqual(done[0], users)
+        self.assertEqual(set(done[1:3]), {groups, pages})
+        self.assertEqual(done[3], collections)
+
+    def test_run_concurrently_error(self):
+        with patch.object(Bootstrap, "load"):
+            bootstrap = Bootstrap(Mock(), concurrent=True)
+        users = component("users")
+        pages = component("pages", "users")
+        with patch.object(
+            bootstrap, "each_in_thread", side_effect=[ValueError, None]
+        ) as each_in_thread, self.assertRaises(ValueError):
+            bootstrap.run_concurrently([users, pages])
+        each_in_thread.assert_called_once_with(users)
 
     def test_each(self):
         with patch.object(Bootstrap, "load"):
@@ -55,3 +186,43 @@ class BootstrapTestCase(TestCase):
         self.assertEqual(bootstrap.test_field, component)
         data.assert_called_once_with("test_field")
         component.assert_called_once_with(data.return_value)
+
+    def test_each_passes_options(self):
+        with patch.object(Bootstrap, "load"):
+            bootstrap = Bootstrap(Mock(), bulk=True)
+
+        component_class = Mock(
+            spec=[], return_value=Mock(spec=[], field_name="test_field")
+        )
+        with patch.object(bootstrap, "data"):
+            bootstrap.each(component_class)
+        component_class.assert_called_once_with(bootstrap, bulk=True)
+
+    def test_plan(self):
+        bootstrap = Bootstrap(StringIO('{"two": [2]}'))
+
+        class One(Component):
+            field_name = "one"
+            default_factory = list
+
+            def parse(self):
+                raise AssertionError("Plan must not parse")
+
+            def plan(self):
+                return {"one": diff(self.raw_data, set())}
+
+        class Two(One):
+            field_name = "two"
+            depends_on = ("one",)
+
+            def plan(self):
+                assert self.bootstrap.one.raw_data == []
+                return {"two": diff(self.raw_data, {2})}
+
+        self.assertEqual(
+            bootstrap.plan(Two, One),
+            {
+                "one": {"one": {"create": [], "skip": []}},
+                "two": {"two": {"create": [], "skip": [2]}},
+            },
+        )
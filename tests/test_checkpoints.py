@@ -0,0 +1,125 @@
+import json
+from io import StringIO
+
+from django.contrib.auth.models import Group
+from django.test import TestCase
+
+from djangocms_fil_bootstrap.bootstrapper import Bootstrap
+from djangocms_fil_bootstrap.checkpoints import Checkpoints, get_chunk
+from djangocms_fil_bootstrap.components.base import Component
+from djangocms_fil_bootstrap.models import Checkpoint
+
+
+class Things(Component):
+    field_name = "things"
+    default_factory = dict
+    chunked = True
+    fail_on = None
+
+    def parse(self):
+        for name in self.raw_data:
+            if name == self.fail_on:
+                raise ValueError(name)
+            self.data[name] = Group.objects.create(name=name)
+
+
+class Labels(Component):
+    field_name = "labels"
+    default_factory = list
+    depends_on = ("things",)
+
+    def parse(self):
+        for name in self.raw_data:
+            self.data[name] = self.bootstrap.things[name]
+
+
+def source(data, name="source.json"):
+    file_ = StringIO(json.dumps(data))
+    file_.name = name
+    return file_
+
+
+DATA = {"things": {"a": 1, "b": 2, "c": 3}, "labels": ["a", "c"]}
+
+
+class GetChunkTestCase(TestCase):
+    def test_dict(self):
+        self.assertEqual(get_chunk({"a": 1, "b": 2, "c": 3}, 1, 5), {"b": 2, "c": 3})
+
+    def test_list(self):
+        self.assertEqual(get_chunk([1, 2, 3, 4], 2, 1), [3])
+
+
+class CheckpointsTestCase(TestCase):
+    def test_save_restore(self):
+        group = Group.objects.create(name="a")
+        checkpoints = Checkpoints("source.json", "digest")
+        component = Things(None)
+        component.data = {"a": group}
+        checkpoints.save(component, 1)
+
+        checkpoint = Checkpoint.objects.get()
+        self.assertEqual(checkpoint.digest, "digest")
+        self.assertEqual(
+            checkpoint.progress,
+            {"things": {"registry": {"a": ["auth.group", group.pk]}, "offset": 1}},
+        )
+
+        component = Things(None)
+        self.assertEqual(
+            Checkpoints("source.json", "digest", resume=True).restore(component), 1
+        )
+        self.assertEqual(component.data, {"a": group})
+        # Without resume, or if the source changed, runs start over
+        self.assertEqual(Checkpoints("source.json", "digest").restore(Things(None)), 0)
+        with self.assertLogs("djangocms_fil_bootstrap.checkpoints", "WARNING"):
+            checkpoints = Checkpoints("source.json", "changed", resume=True)
+        self.assertEqual(checkpoints.restore(Things(None)), 0)
+
+        checkpoints.finish()
+        self.assertFalse(Checkpoint.objects.exists())
+
+    def test_no_source(self):
+        with self.assertRaises(ValueError):
+            Checkpoints(None, "digest")
+
+
+class ChunkedBootstrapTestCase(TestCase):
+    def test_run(self):
+        bootstrap = Bootstrap(source(DATA), chunk_size=2)
+        bootstrap(Things, Labels)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(bootstrap.labels.data, {"a": bootstrap.things["a"], "c": bootstrap.things["c"]})
+        self.assertEqual(bootstrap.things.raw_data, DATA["things"])
+        self.assertFalse(Checkpoint.objects.exists())
+
+    def test_resume(self):
+        Things.fail_on = "c"
+        try:
+            with self.assertRaises(ValueError):
+                Bootstrap(source(DATA), chunk_size=2)(Things, Labels)
+        finally:
+            Things.fail_on = None
+        # First chunk has been committed
+        self.assertCountEqual(Group.objects.values_list("name", flat=True), ["a", "b"])
+        self.assertEqual(
+            Checkpoint.objects.get(source="source.json").progress["things"]["offset"], 2
+        )
+
+        bootstrap = Bootstrap(source(DATA), chunk_size=2, resume=True)
+        bootstrap(Things, Labels)
+        self.assertCountEqual(Group.objects.values_list("name", flat=True), ["a", "b", "c"])
+        self.assertEqual(set(bootstrap.things.data), {"a", "b", "c"})
+        self.assertEqual(set(bootstrap.labels.data), {"a", "c"})
+        self.assertFalse(Checkpoint.objects.exists())
+
+    def test_resume_skips_done_sections(self):
+        groups = {name: Group.objects.create(name=name) for name in "abc"}
+        bootstrap = Bootstrap(source(DATA), chunk_size=5, resume=True)
+        component = Things(bootstrap)
+        component.data = groups
+        Checkpoints("source.json", bootstrap.digest).save(component)
+        # Things would fail creating the groups again
+        bootstrap(Things, Labels)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(bootstrap.labels.data, {"a": groups["a"], "c": groups["c"]})
@@ -1,12 +1,28 @@
 from unittest.mock import Mock, call, patch
 
+from django.contrib.auth.hashers import check_password
+from django.contrib.auth.models import Group, Permission
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now
 
-from djangocms_moderation.constants import COLLECTING, IN_REVIEW
+from cms.api import create_page
+from cms.models import ACCESS_PAGE, PagePermission
+
+from djangocms_moderation.constants import (
+    ACTION_APPROVED,
+    ACTION_REJECTED,
+    ACTION_STARTED,
+    COLLECTING,
+    IN_REVIEW,
+)
 from djangocms_moderation.models import (
+    CollectionComment,
     ModerationCollection,
     ModerationRequest,
+    ModerationRequestAction,
+    ModerationRequestTreeNode,
     Role,
     Workflow,
 )
@@ -16,12 +32,18 @@ from freezegun import freeze_time
 from djangocms_fil_bootstrap.components import (
     Collections,
     Groups,
+    History,
     Pages,
     Permissions,
     Users,
     Workflows,
 )
 from djangocms_fil_bootstrap.components.base import Component
+from djangocms_fil_bootstrap.components.pages import (
+    create_pages,
+    get_subtree_key,
+    split_pages,
+)
 from djangocms_fil_bootstrap.components.permissions import (
     codename,
     natural_key,
@@ -35,8 +57,9 @@ from djangocms_fil_bootstrap.test_utils.factories import (
     RoleFactory,
     UserFactory,
     WorkflowFactory,
+    WorkflowStepFactory,
 )
-from djangocms_fil_bootstrap.utils import get_version
+from djangocms_fil_bootstrap.utils import VersionRegistry, get_version
 
 
 class TestComponent(Component):
@@ -137,6 +160,71 @@ class UsersTestCase(TestCase):
         self.assertIn("bar", component.data)
         self.assertEqual(component.data["bar"], value)
 
+    def test_parse_bulk(self):
+        component = Users(Mock(), bulk=True)
+        component.raw_data = ["foo"]
+        with patch.object(component, "prepare_each") as prepare_each, patch.object(
+            component, "each"
+        ) as each, patch.object(component, "bulk") as bulk:
+            component.parse()
+        prepare_each.assert_called_once_with("foo")
+        bulk.assert_called_once_with([prepare_each.return_value])
+        each.assert_not_called()
+
+    def test_bulk(self):
+        """
+        Existing users are looked up, missing ones are inserted
+        and both end up in the component data.
+        """
+        existing_user = UserFactory(username="existing")
+        component = Users(Mock(), bulk=True)
+        component.bulk(
+            [
+                {"username": "existing", "password": "existing"},
+                {"username": "new", "password": "new", "is_staff": True},
+            ]
+        )
+        self.assertEqual(component.data["existing"], existing_user)
+        new_user = component.data["new"]
+        self.assertIsNotNone(new_user.pk)
+        self.assertTrue(new_user.is_staff)
+        self.assertTrue(new_user.check_password("new"))
+
+    def test_bulk_password_hash(self):
+        component = Users(Mock(), bulk=True)
+        component.bulk(
+            [{"username": "user", "password": "user", "password_hash": "precomputed"}]
+        )
+        self.assertEqual(component.data["user"].password, "precomputed")
+
+    def test_hash_passwords(self):
+        component = Users(Mock(), password_hashing="memoize")
+        users = [
+            {"username": "user1", "password": "secret"},
+            {"username": "user2", "password": "secret"},
+            {"username": "user3", "password": "user3", "password_hash": "precomputed"},
+        ]
+        component.hash_passwords(users)
+        self.assertEqual(users[0]["password_hash"], users[1]["password_hash"])
+        self.assertTrue(check_password("secret", users[0]["password_hash"]))
+        self.assertEqual(users[2]["password_hash"], "precomputed")
+
+    def test_hash_passwords_default_strategy(self):
+        component = Users(Mock())
+        users = [{"username": "user1", "password": "secret"}]
+        component.hash_passwords(users)
+        self.assertNotIn("password_hash", users[0])
+
+    def test_parse_hashes_passwords_of_missing_users_only(self):
+        UserFactory(username="existing")
+        component = Users(Mock(), password_hashing="memoize")
+        component.raw_data = ["existing", "new"]
+        with patch.object(component, "hash_passwords") as hash_passwords, patch.object(
+            component, "prepare_each", side_effect=lambda u: {"username": u}
+        ), patch.object(component, "each"):
+            component.parse()
+        hash_passwords.assert_called_once_with([{"username": "new"}])
+
     def test_prepare_each_only_username(self):
         """
         Check what data is prepared by prepare_each function
@@ -171,20 +259,16 @@ class UsersTestCase(TestCase):
         self.assertEqual(result["is_staff"], True)
         self.assertEqual(result["foo"], "bar")
 
+    def test_plan(self):
+        UserFactory(username="user1")
+        component = Users(Mock(data=Mock(return_value="example.com")))
+        component.load(["user1", {"username": "user2"}, "user2"])
+        with self.assertNumQueries(1):
+            result = component.plan()
+        self.assertEqual(result, {"users": {"create": ["user2"], "skip": ["user1"]}})
 
-class GroupsTestCase(TestCase):
-    def test_add_user_to_group(self):
-        """
-        Mocking the whole bootstrap method, so we lose access to any stored components' methods
-        E.g. bootstrap.Users.get()
-        Tests that the django add() method is called with the correct arguement
-        """
-        user = Mock()
-        bootstrap = Mock(users={"bar": user})
-        component = Groups(bootstrap)
-        component.add_user_to_group("foo", "bar")
-        user.groups.add.assert_called_once_with("foo")
 
+class GroupsTestCase(TestCase):
     def test_parse(self):
         component = Groups(Mock())
         component.raw_data = {"foo": {"name": "visible name"}}
@@ -193,19 +277,73 @@ class GroupsTestCase(TestCase):
         self.assertEqual(component.data["foo"].name, "visible name")
 
     def test_parse_with_users(self):
-        bootstrap = Mock(users={"user1": Mock(), "user2": Mock()})
+        user1 = UserFactory()
+        user2 = UserFactory()
+        bootstrap = Mock(users={"user1": user1, "user2": user2})
         component = Groups(bootstrap)
         component.raw_data = {
             "foo": {"name": "visible name", "users": ["user1", "user2"]}
         }
-        with patch.object(component, "add_user_to_group") as add_user_to_group:
-            component.parse()
+        component.parse()
         self.assertIn("foo", component.data)
         group = component.data["foo"]
         self.assertEqual(group.name, "visible name")
-        add_user_to_group.assert_has_calls(
-            [call(group, "user1"), call(group, "user2")], any_order=True
+        self.assertEqual(list(group.user_set.order_by("pk")), [user1, user2])
+
+    def test_parse_uses_existing_groups(self):
+        existing_group = GroupFactory(name="visible name")
+        component = Groups(Mock())
+        component.raw_data = {
+            "foo": {"name": "visible name"},
+            "bar": {"name": "visible name"},
+        }
+        component.parse()
+        self.assertEqual(component.data["foo"], existing_group)
+        self.assertEqual(component.data["bar"], existing_group)
+        self.assertEqual(Group.objects.count(), 1)
+
+    def test_get_groups(self):
+        existing_group = GroupFactory(name="existing")
+        component = Groups(Mock())
+        groups = component.get_groups(["existing", "new", "new"])
+        self.assertEqual(groups["existing"], existing_group)
+        self.assertEqual(groups["new"].name, "new")
+        self.assertIsNotNone(groups["new"].pk)
+
+    def test_add_memberships_ignores_existing(self):
+        group = GroupFactory()
+        user1 = UserFactory()
+        user2 = UserFactory()
+        user1.groups.add(group)
+        component = Groups(Mock())
+        with self.assertNumQueries(1):
+            component.add_memberships({(user1.pk, group.pk), (user2.pk, group.pk)})
+        self.assertEqual(group.user_set.count(), 2)
+
+    def test_plan(self):
+        user1 = UserFactory(username="user1")
+        UserFactory(username="user2")
+        GroupFactory(name="Group 1").user_set.add(user1)
+        component = Groups(Mock())
+        component.load(
+            {
+                "group1": {"name": "Group 1", "users": ["user1", "user2"]},
+                "group2": {"name": "Group 2", "users": ["user1"]},
+            }
+        )
+        with self.assertNumQueries(2):
+            result = component.plan()
+        self.assertEqual(
+            result,
+            {
+                "groups": {"create": ["Group 2"], "skip": ["Group 1"]},
+                "memberships": {
+                    "create": ["user2 -> Group 1", "user1 -> Group 2"],
+                    "skip": ["user1 -> Group 1"],
+                },
+            },
         )
+        self.assertFalse(Group.objects.filter(name="Group 2").exists())
 
 
 class PermissionsTestCase(TestCase):
@@ -270,6 +408,36 @@ class PermissionsTestCase(TestCase):
         )
         self.assertFalse(result.exists())
 
+    def test_get_permission_ids_builds_indexes_once(self):
+        component = Permissions(Mock())
+        perms = [["change_page", "cms", "page"], ["use_structure", "cms", "placeholder"]]
+        with self.assertNumQueries(2):
+            ids = component.get_permission_ids(perms)
+            component.get_permission_ids([["change_user", "auth", "user"]])
+        self.assertEqual(
+            ids,
+            {
+                Permission.objects.get_by_natural_key(*perm).pk
+                for perm in perms
+            },
+        )
+
+    def test_get_permission_ids_memoized(self):
+        component = Permissions(Mock())
+        perms = [["change_page", "cms", "page"], ["use_structure", "cms", "placeholder"]]
+        ids = component.get_permission_ids(perms)
+        with patch.object(component, "lookup_permission_ids") as lookup:
+            result = component.get_permission_ids(reversed(perms))
+        lookup.assert_not_called()
+        self.assertEqual(result, ids)
+
+    def test_get_permission_ids_missing_permission_is_ignored(self):
+        component = Permissions(Mock())
+        result = component.get_permission_ids(
+            [["change_page", "cms", "page"], ["no_such_permission", "cms", "page"]]
+        )
+        self.assertEqual(len(result), 1)
+
     def test_add_permissions_to_user(self):
         user = UserFactory()
         bootstrap = Mock(users={"bar": user})
@@ -309,6 +477,85 @@ class PermissionsTestCase(TestCase):
             "group1", [["change_page", "cms", "page"]], aliases
         )
 
+    def test_parse_bulk(self):
+        component = Permissions(Mock(), bulk=True)
+        aliases = {"test": ["change_test", "app", "model"]}
+        component.raw_data = {"aliases": aliases, "users": {"user1": ["test"]}}
+        with patch.object(
+            component, "add_permissions_to_user"
+        ) as add_permissions_to_user, patch.object(component, "bulk") as bulk:
+            component.parse()
+        bulk.assert_called_once_with(aliases)
+        add_permissions_to_user.assert_not_called()
+
+    def test_bulk(self):
+        group = GroupFactory()
+        user = UserFactory()
+        other_user = UserFactory()
+        other_user.user_permissions.add(
+            Permission.objects.get_by_natural_key("change_page", "cms", "page")
+        )
+        bootstrap = Mock(
+            users={"user": user, "other_user": other_user}, groups={"group": group}
+        )
+        component = Permissions(bootstrap, bulk=True)
+        component.raw_data = {
+            "aliases": {"change_page": ["change_page", "cms", "page"]},
+            "users": {
+                "user": ["change_page"],
+                "other_user": ["change_page", ["view_page", "cms", "page"]],
+            },
+            "groups": {"group": ["change_page", ["use_structure", "cms", "placeholder"]]},
+        }
+        component.parse()
+        self.assertEqual(component.report, {"users": (2, 1), "groups": (2, 0)})
+        user = user._meta.model.objects.get(pk=user.pk)  # reload perms
+        other_user = user._meta.model.objects.get(pk=other_user.pk)
+        self.assertTrue(user.has_perm("cms.change_page"))
+        self.assertFalse(user.has_perm("cms.view_page"))
+        self.assertTrue(other_user.has_perm("cms.view_page"))
+        self.assertEqual(
+            set(group.permissions.values_list("codename", flat=True)),
+            {"change_page", "use_structure"},
+        )
+
+    def test_bulk_queries(self):
+        users = {str(i): UserFactory() for i in range(5)}
+        component = Permissions(Mock(users=users, groups={}), bulk=True)
+        component.raw_data = {
+            "users": {name: [["change_page", "cms", "page"]] for name in users},
+        }
+        # indexes, existing user permissions, insert
+        with self.assertNumQueries(4):
+            component.parse()
+        self.assertEqual(component.report["users"], (5, 0))
+
+    def test_plan(self):
+        user = UserFactory(username="user1")
+        group = GroupFactory(name="Group 1")
+        user.user_permissions.add(Permission.objects.get(codename="change_page"))
+        groups = Mock(raw_data={"group1": {"name": "Group 1"}})
+        component = Permissions(Mock(groups=groups))
+        component.load(
+            {
+                "aliases": {"view_page": ["view_page", "cms", "page"]},
+                "users": {"user1": [["change_page", "cms", "page"], "view_page"]},
+                "groups": {"group1": ["view_page"]},
+            }
+        )
+        result = component.plan()
+        self.assertEqual(
+            result,
+            {
+                "users": {
+                    "create": ["user1 -> cms.view_page"],
+                    "skip": ["user1 -> cms.change_page"],
+                },
+                "groups": {"create": ["Group 1 -> cms.view_page"], "skip": []},
+            },
+        )
+        self.assertFalse(group.permissions.exists())
+
 
 class PagesTestCase(TestCase):
     def test_add_plugin(self):
@@ -352,11 +599,253 @@ class PagesTestCase(TestCase):
     def test_parse(self):
         component = Pages(Mock())
         component.raw_data = {"page1": "bar", "page2": "baz"}
-        with patch.object(component, "each") as each:
+        with patch.object(component, "each") as each, patch.object(
+            component.publisher, "publish"
+        ) as publish, patch.object(component, "save_assignments") as save_assignments:
             component.parse()
         each.assert_has_calls(
             [call("page1", "bar"), call("page2", "baz")], any_order=True
         )
+        save_assignments.assert_called_once_with()
+        publish.assert_not_called()
+
+    def test_parse_defer_publish(self):
+        component = Pages(Mock(), defer_publish=True)
+        component.raw_data = {"page1": "bar"}
+        with patch.object(component, "each"), patch.object(
+            component.publisher, "publish"
+        ) as publish:
+            component.parse()
+        publish.assert_called_once_with()
+
+    def test_skip_publish_signals(self):
+        self.assertTrue(Pages(Mock()).publisher.signals)
+        self.assertFalse(Pages(Mock()).defer_publish)
+        component = Pages(Mock(), skip_publish_signals=True)
+        self.assertFalse(component.publisher.signals)
+        self.assertTrue(component.defer_publish)
+
+    def test_parse_bulk(self):
+        component = Pages(Mock(), bulk=True)
+        component.raw_data = {"page1": "bar"}
+        with patch.object(component, "each") as each, patch.object(
+            component, "bulk"
+        ) as bulk:
+            component.parse()
+        bulk.assert_called_once_with()
+        each.assert_not_called()
+
+    def test_bulk(self):
+        user1 = UserFactory(is_staff=False)
+        user2 = UserFactory(is_staff=False)
+        bootstrap = Mock(users={"user1": user1, "user2": user2})
+        component = Pages(bootstrap, bulk=True)
+        component.raw_data = {
+            "child": {
+                "title": "Child page",
+                "template": "INHERIT",
+                "language": "en",
+                "created_by": "user2",
+                "parent": "page1",
+                "content": [{"type": "TextPlugin", "body": "<h1>Test content</h1>"}],
+                "publish": True,
+            },
+            "page1": {
+                "title": "Test page",
+                "template": "INHERIT",
+                "language": "en",
+                "created_by": "user1",
+                "publish": True,
+                "is_home": True,
+                "assignments": [{"user": "user1", "can_view": True}],
+            },
+        }
+        component.parse()
+
+        page = component.data["page1"]
+        child = component.data["child"]
+        self.assertEqual(child.get_parent_page(), page)
+        self.assertTrue(page.is_home)
+        self.assertTrue(page.has_view_permission(user1))
+        self.assertFalse(page.has_view_permission(user2))
+        version = get_version(child)
+        self.assertEqual(version.state, PUBLISHED)
+        self.assertEqual(version.created_by, user2)
+        bootstrap.versions.add.assert_any_call(child, version)
+        # The page and its descendants can only be viewed by user1
+        self.client.force_login(user1)
+        response = self.client.get(version.content.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"<h1>Test content</h1>", response.content)
+
+    def test_bulk_chunks_parents_first(self):
+        user = UserFactory(is_staff=False)
+        component = Pages(Mock(users={"user1": user}), bulk=True)
+        raw_data = {
+            name: {
+                "title": name,
+                "template": "INHERIT",
+                "language": "en",
+                "created_by": "user1",
+                **({"parent": parent} if parent else {}),
+            }
+            for name, parent in [("grandchild", "child"), ("child", "page1"), ("page1", None)]
+        }
+        component.load(raw_data)
+        self.assertEqual(list(component.raw_data), ["page1", "child", "grandchild"])
+
+        # Chunks of a single page, as with --chunk-size 1
+        entries = component.raw_data
+        for name in entries:
+            component({name: entries[name]})
+
+        self.assertEqual(component.data["child"].get_parent_page(), component.data["page1"])
+        self.assertEqual(component.data["grandchild"].get_parent_page(), component.data["child"])
+
+    def test_bulk_shared_content(self):
+        user = UserFactory(is_staff=False)
+        bootstrap = Mock(users={"user1": user})
+        component = Pages(bootstrap, bulk=True)
+        content = [{"type": "TextPlugin", "body": "<p>Shared</p>"}]
+        component.raw_data = {
+            name: {
+                "title": name,
+                "template": "INHERIT",
+                "language": "en",
+                "created_by": "user1",
+                "content": content,
+            }
+            for name in ("page1", "page2")
+        }
+        component.parse()
+
+        self.assertEqual(content, [{"type": "TextPlugin", "body": "<p>Shared</p>"}])
+        for name in ("page1", "page2"):
+            plugin = (
+                get_version(component.data[name])
+                .content.get_placeholders()
+                .get(slot="content")
+                .get_plugins()
+                .get()
+            )
+            self.assertEqual(plugin.plugin_type, "TextPlugin")
+            self.assertEqual(plugin.get_bound_plugin().body, "<p>Shared</p>")
+
+    def test_split_pages(self):
+        existing = Mock(pk=1)
+        pages = {
+            "a": {"title": "A"},
+            "b": {"title": "B"},
+            "a-child": {"title": "Child", "parent": "a"},
+            "a-grandchild": {"title": "Grandchild", "parent": "a-child"},
+            # Same slug as a, has to be created by the same worker
+            "a2": {"title": "Other", "slug": "a"},
+            "c": {"title": "C", "parent": existing},
+            "d": {"title": "D", "parent": existing},
+        }
+        self.assertEqual(get_subtree_key("a-grandchild", pages), ("root", "a"))
+        self.assertEqual(get_subtree_key("d", pages), ("page", 1))
+        self.assertEqual(
+            split_pages(pages, 2),
+            [["a", "a-child", "a-grandchild", "a2"], ["b", "c", "d"]],
+        )
+        self.assertEqual(len(split_pages(pages, 10)), 3)
+
+    def test_parse_workers_not_supported(self):
+        bootstrap = Mock()
+        bootstrap.can_run_concurrently.return_value = False
+        component = Pages(bootstrap, workers=4)
+        component.raw_data = {}
+        with patch.object(component, "bulk") as bulk, patch.object(
+            component, "parallel"
+        ) as parallel, self.assertLogs("djangocms_fil_bootstrap.components.pages", "WARNING"):
+            component.parse()
+        bulk.assert_called_once_with()
+        parallel.assert_not_called()
+
+    def test_parallel(self):
+        class SerialExecutor:
+            def __init__(self, max_workers, initializer):
+                self.max_workers = max_workers
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def map(self, function, *iterables):
+                return map(function, *iterables)
+
+        results = []
+
+        def create_and_keep(*args):
+            results.append(create_pages(*args))
+            return results[-1]
+
+        user = UserFactory(is_staff=False)
+        bootstrap = Mock(users={"user1": user}, versions=VersionRegistry())
+        bootstrap.can_run_concurrently.return_value = True
+        component = Pages(bootstrap, workers=2)
+        component.raw_data = {
+            name: {
+                "title": name,
+                "template": "INHERIT",
+                "language": "en",
+                "created_by": "user1",
+                "content": [{"type": "TextPlugin", "body": "<p>{}</p>".format(name)}],
+            }
+            for name in ("root1", "root2")
+        }
+        component.raw_data["child"] = dict(
+            component.raw_data["root1"], title="child", parent="root1", publish=True
+        )
+        with patch(
+            "djangocms_fil_bootstrap.components.pages.ProcessPoolExecutor", SerialExecutor
+        ), patch(
+            "djangocms_fil_bootstrap.components.pages.connections"
+        ) as connections, patch(
+            "djangocms_fil_bootstrap.components.pages.create_pages", side_effect=create_and_keep
+        ) as create:
+            component.parse()
+
+        connections.close_all.assert_called_once_with()
+        self.assertEqual(create.call_count, 2)
+        # Queries of the workers are returned with their pages
+        self.assertTrue(all(counts[0] > 0 for ids, counts in results))
+        self.assertEqual(set(component.data), {"root1", "root2", "child"})
+        self.assertEqual(
+            component.data["child"].get_parent_page(), component.data["root1"]
+        )
+        version = get_version(component.data["child"])
+        self.assertEqual(version.state, PUBLISHED)
+        self.assertEqual(bootstrap.versions.get(component.data["child"]), version)
+        self.assertEqual(
+            version.content.get_placeholders()
+            .get(slot="content")
+            .get_plugins()
+            .get()
+            .plugin_type,
+            "TextPlugin",
+        )
+
+    def test_each_parent(self):
+        user = UserFactory()
+        bootstrap = Mock(users={"user1": user})
+        component = Pages(bootstrap)
+        for name, parent in (("page1", None), ("page2", "page1")):
+            data = {
+                "title": name,
+                "template": "INHERIT",
+                "language": "en",
+                "created_by": "user1",
+            }
+            if parent:
+                data["parent"] = parent
+            component.each(name, data)
+        self.assertEqual(
+            component.data["page2"].get_parent_page(), component.data["page1"]
+        )
 
     def test_each(self):
         user = UserFactory()
@@ -377,6 +866,25 @@ class PagesTestCase(TestCase):
         self.assertEqual(version.content.language, "en")
         self.assertEqual(version.created_by, user)
         self.assertEqual(version.state, DRAFT)
+        bootstrap.versions.add.assert_called_once_with(
+            component.data["page1"], version
+        )
+
+    def test_each_version_not_looked_up(self):
+        user = UserFactory()
+        component = Pages(Mock(users={"user1": user}))
+        data = {"template": "INHERIT", "language": "en", "created_by": "user1"}
+        create_page(**dict(data, title="Warm up", created_by=user))
+        with CaptureQueriesContext(connection) as context:
+            create_page(**dict(data, title="Page 1", created_by=user))
+
+        # Queries of create_page, and the lookup of the content placeholder
+        with self.assertNumQueries(len(context.captured_queries) + 1):
+            component.each("page2", dict(data, title="Page 2"))
+
+        component.bootstrap.versions.add.assert_called_once_with(
+            component.data["page2"], get_version(component.data["page2"])
+        )
 
     def test_each_published(self):
         user = UserFactory()
@@ -399,6 +907,24 @@ class PagesTestCase(TestCase):
         self.assertEqual(version.created_by, user)
         self.assertEqual(version.state, PUBLISHED)
 
+    def test_each_published_deferred(self):
+        user = UserFactory()
+        bootstrap = Mock(users={"user1": user})
+        component = Pages(bootstrap, defer_publish=True)
+        component.each(
+            "page1",
+            {
+                "title": "Test page",
+                "template": "INHERIT",
+                "language": "en",
+                "created_by": "user1",
+                "publish": True,
+            },
+        )
+        self.assertEqual(get_version(component.data["page1"]).state, DRAFT)
+        component.publisher.publish()
+        self.assertEqual(get_version(component.data["page1"]).state, PUBLISHED)
+
     def test_each_is_home(self):
         user = UserFactory()
         bootstrap = Mock(users={"user1": user})
@@ -448,6 +974,41 @@ class PagesTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b"<h1>Test content</h1>", response.content)
 
+    def test_each_unknown_parent(self):
+        component = Pages(Mock(users={"user1": UserFactory()}))
+        data = {
+            "title": "Child page",
+            "template": "INHERIT",
+            "language": "en",
+            "created_by": "user1",
+            "parent": "page1",
+        }
+        with self.assertRaisesMessage(ValueError, "Unknown parent page1 of page child"):
+            component.each("child", data)
+
+    def test_each_content_bulk(self):
+        user = UserFactory()
+        bootstrap = Mock(users={"user1": user})
+        component = Pages(bootstrap, bulk=True)
+        with patch.object(component, "add_plugin") as add_plugin:
+            component.each(
+                "page1",
+                {
+                    "title": "Test page",
+                    "template": "INHERIT",
+                    "language": "en",
+                    "created_by": "user1",
+                    "content": [{"type": "TextPlugin", "body": "<h1>Test content</h1>"}],
+                    "publish": True,
+                },
+            )
+        add_plugin.assert_not_called()
+        version = get_version(component.data["page1"])
+        response = self.client.get(version.content.get_absolute_url())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"<h1>Test content</h1>", response.content)
+
     def test_each_assignment(self):
         user1 = UserFactory(is_staff=False)
         user2 = UserFactory(is_staff=False)
@@ -463,6 +1024,7 @@ class PagesTestCase(TestCase):
                 "assignments": [{"user": "user1", "can_view": True}],
             },
         )
+        component.save_assignments()
 
         self.assertIn("page1", component.data)
         page = component.data["page1"]
@@ -473,6 +1035,76 @@ class PagesTestCase(TestCase):
         self.assertTrue(page.has_view_permission(user1))
         self.assertFalse(page.has_view_permission(user2))
 
+    def test_save_assignments(self):
+        user1 = UserFactory(is_staff=False)
+        user2 = UserFactory(is_staff=False)
+        page1 = PageContentWithVersionFactory().page
+        page2 = PageContentWithVersionFactory().page
+        component = Pages(Mock(users={"user1": user1, "user2": user2}))
+        component.add_assignments(page1, [{"user": "user1", "can_view": True}])
+        component.add_assignments(
+            page2,
+            [
+                {"user": "user1", "grant_all": True},
+                {"user": "user2", "can_change": True, "grant_on": ACCESS_PAGE},
+            ],
+        )
+        self.assertFalse(PagePermission.objects.exists())
+        with patch(
+            "djangocms_fil_bootstrap.components.pages.clear_permission_cache"
+        ) as clear_permission_cache, self.assertNumQueries(1):
+            component.save_assignments()
+        clear_permission_cache.assert_called_once_with()
+
+        self.assertEqual(PagePermission.objects.count(), 3)
+        permission = PagePermission.objects.get(page=page2, user=user1)
+        self.assertTrue(permission.can_view)
+        self.assertTrue(permission.can_delete)
+        permission = PagePermission.objects.get(page=page2, user=user2)
+        self.assertTrue(permission.can_change)
+        self.assertFalse(permission.can_view)
+        self.assertEqual(permission.grant_on, ACCESS_PAGE)
+        self.assertEqual(component.permissions, [])
+
+    def test_save_no_assignments(self):
+        with self.assertNumQueries(0):
+            Pages(Mock()).save_assignments()
+
+    def test_unknown_assignment_argument(self):
+        component = Pages(Mock(users={"user1": UserFactory()}))
+        with self.assertRaises(TypeError):
+            component.add_assignments(
+                PageContentWithVersionFactory().page, [{"user": "user1", "foo": 1}]
+            )
+
+    def test_plan(self):
+        component = Pages(Mock())
+        component.load(
+            {
+                "page1": {
+                    "title": "Page 1",
+                    "content": [
+                        {"type": "MultiColumnPlugin", "children": [{"type": "TextPlugin"}]}
+                    ],
+                    "assignments": [{"user": "user1", "can_view": True}],
+                },
+                "page2": {"title": "Page 2"},
+            }
+        )
+        with self.assertNumQueries(0):
+            result = component.plan()
+        self.assertEqual(
+            result,
+            {
+                "pages": {"create": ["page1", "page2"], "skip": []},
+                "plugins": {
+                    "create": ["page1: MultiColumnPlugin", "page1: TextPlugin"],
+                    "skip": [],
+                },
+                "assignments": {"create": ["page1 -> user1"], "skip": []},
+            },
+        )
+
 
 class WorkflowsTestCase(TestCase):
     def test_role_user(self):
@@ -620,6 +1252,109 @@ class WorkflowsTestCase(TestCase):
         roles.assert_called_once_with()
         workflows.assert_called_once_with(roles.return_value)
 
+    # Backends which can't return ids of inserted rows need an extra query
+    fetch_ids = int(not connection.features.can_return_rows_from_bulk_insert)
+
+    def test_parse_bulk(self):
+        component = Workflows(Mock(), bulk=True)
+        with patch.object(component, "bulk_roles") as bulk_roles, patch.object(
+            component, "bulk_workflows"
+        ) as bulk_workflows, patch.object(component, "roles") as roles:
+            component.parse()
+        bulk_workflows.assert_called_once_with(bulk_roles.return_value)
+        roles.assert_not_called()
+
+    def test_bulk_roles(self):
+        user = UserFactory()
+        group = GroupFactory()
+        existing = RoleFactory(name="Role 1")
+        raw_data = {
+            "role1": {"name": "Role 1", "user": "user1"},
+            "role2": {"name": "Role 2", "user": "user1"},
+            "role3": {"name": "Role 3", "group": "group1"},
+        }
+        bootstrap = Mock(
+            users={"user1": user},
+            groups={"group1": group},
+            data=Mock(return_value=raw_data),
+        )
+        component = Workflows(bootstrap)
+        # lookup, insert (and ids of inserted roles if not returned)
+        with self.assertNumQueries(2 + self.fetch_ids):
+            roles = component.bulk_roles()
+        self.assertEqual(roles["role1"], existing)
+        self.assertEqual(roles["role2"], Role.objects.get(name="Role 2", user=user))
+        self.assertEqual(roles["role3"], Role.objects.get(name="Role 3", group=group))
+        self.assertEqual(Role.objects.count(), 3)
+
+    def test_bulk_workflows(self):
+        role1 = RoleFactory()
+        role2 = RoleFactory()
+        existing = WorkflowFactory(is_default=False)
+        component = Workflows(Mock())
+        component.raw_data = {
+            "wf1": {
+                "name": "Workflow 1",
+                "is_default": True,
+                "steps": [
+                    {"role": "role1", "is_required": True, "order": 1},
+                    {"role": "role2", "is_required": False, "order": 2},
+                ],
+            },
+            "wf2": {
+                "name": "Workflow 2",
+                "steps": [{"role": "role2", "is_required": True, "order": 1}],
+            },
+            "wf3": {
+                "name": existing.name,
+                "is_default": True,
+                "steps": [{"role": "role1", "is_required": True, "order": 1}],
+            },
+        }
+        # lookup, workflows insert (and their ids), steps insert
+        with self.assertNumQueries(3 + self.fetch_ids):
+            component.bulk_workflows({"role1": role1, "role2": role2})
+
+        workflow1 = Workflow.objects.get(name="Workflow 1")
+        self.assertEqual(
+            component.data,
+            {
+                "wf1": workflow1,
+                "wf2": Workflow.objects.get(name="Workflow 2"),
+                "wf3": existing,
+            },
+        )
+        self.assertTrue(workflow1.is_default)
+        self.assertEqual(
+            list(workflow1.steps.order_by("order").values_list("role", "is_required")),
+            [(role1.pk, True), (role2.pk, False)],
+        )
+        existing.refresh_from_db()
+        self.assertFalse(existing.is_default)
+        self.assertEqual(existing.steps.count(), 0)
+
+    def test_plan(self):
+        RoleFactory(name="Role 1")
+        WorkflowFactory(name="Workflow 1")
+        roles = {"role1": {"name": "Role 1"}, "role2": {"name": "Role 2"}}
+        component = Workflows(Mock(data=Mock(return_value=roles)))
+        component.load(
+            {
+                "wf1": {"name": "Workflow 1", "steps": [{"role": "role1", "order": 1}]},
+                "wf2": {"name": "Workflow 2", "steps": [{"role": "role2", "order": 1}]},
+            }
+        )
+        with self.assertNumQueries(2):
+            result = component.plan()
+        self.assertEqual(
+            result,
+            {
+                "roles": {"create": ["Role 2"], "skip": ["Role 1"]},
+                "workflows": {"create": ["Workflow 2"], "skip": ["Workflow 1"]},
+                "steps": {"create": ["Workflow 2 -> Role 2"], "skip": []},
+            },
+        )
+
 
 class CollectionsTestCase(TestCase):
     def setUp(self):
@@ -634,7 +1369,10 @@ class CollectionsTestCase(TestCase):
                 "page2": PageContentWithVersionFactory().page,
             }
         bootstrap = Mock(
-            users={"user1": self.user}, workflows={"wf1": self.wf1}, pages=pages
+            users={"user1": self.user},
+            workflows={"wf1": self.wf1},
+            pages=pages,
+            versions=VersionRegistry(),
         )
         component = Collections(bootstrap)
         component.raw_data = {
@@ -734,3 +1472,267 @@ class CollectionsTestCase(TestCase):
         component.parse()
 
         self.assertDictEqual(component.data, {"collection1": existing_collection})
+
+    def test_parse_uses_version_registry(self):
+        """Versions of pages registered by Pages component are not
+        looked up again."""
+        unregistered = self._get_collections_obj()
+        with CaptureQueriesContext(connection) as context:
+            unregistered.parse()
+        page1 = PageContentWithVersionFactory().page
+        page2 = PageContentWithVersionFactory().page
+        component = self._get_collections_obj(pages={"page1": page1, "page2": page2})
+        component.raw_data["collection1"]["name"] = "Collection 2"
+        for page in (page1, page2):
+            component.bootstrap.versions.add(page, get_version(page))
+
+        # Without the page content and version lookups of the prefetch
+        with self.assertNumQueries(len(context.captured_queries) - 2):
+            component.parse()
+
+        self.assertEqual(
+            set(
+                ModerationRequest.objects.filter(
+                    collection=component.data["collection1"]
+                ).values_list("version", flat=True)
+            ),
+            {get_version(page1).pk, get_version(page2).pk},
+        )
+
+    def test_parse_bulk(self):
+        component = self._get_collections_obj()
+        component.options["bulk"] = True
+        with patch.object(component, "bulk") as bulk, patch.object(
+            component, "add_versions"
+        ) as add_versions:
+            component.parse()
+        bulk.assert_called_once_with()
+        add_versions.assert_not_called()
+
+    @freeze_time()
+    def test_bulk(self):
+        with freeze_time("2010-10-10"):
+            existing_collection = ModerationCollectionFactory(name="Collection 2")
+        pages = {
+            "page{}".format(i): PageContentWithVersionFactory().page for i in range(3)
+        }
+        component = self._get_collections_obj(pages=pages)
+        component.raw_data["collection2"] = {
+            "pages": ["page1"],
+            "name": "Collection 2",
+            "user": "user1",
+            "workflow": "wf1",
+        }
+        component.raw_data["collection3"] = {
+            "pages": ["page1", "page2"],
+            "name": "Collection 3",
+            "user": "user1",
+            "workflow": "wf1",
+        }
+
+        component.bulk()
+
+        collection1 = ModerationCollection.objects.get(name="Collection 1")
+        collection3 = ModerationCollection.objects.get(name="Collection 3")
+        self.assertDictEqual(
+            component.data,
+            {
+                "collection1": collection1,
+                "collection2": existing_collection,
+                "collection3": collection3,
+            },
+        )
+        self.assertEqual(collection1.author, self.user)
+        self.assertEqual(collection1.workflow, self.wf1)
+        self.assertEqual(collection1.status, COLLECTING)
+        self.assertEqual(collection1.date_created, now())
+        self.assertEqual(
+            {request.version for request in collection1.moderation_requests.all()},
+            {get_version(page) for page in pages.values()},
+        )
+        self.assertEqual(collection3.moderation_requests.count(), 2)
+        self.assertEqual(existing_collection.moderation_requests.count(), 0)
+        request = collection3.moderation_requests.get(version=get_version(pages["page1"]))
+        self.assertEqual(request.author, self.user)
+        self.assertEqual(request.language, "")
+        self.assertTrue(request.is_active)
+        self.assertEqual(request.date_sent, now())
+        nodes = ModerationRequestTreeNode.objects.filter(
+            moderation_request__collection__in=[collection1, collection3]
+        )
+        self.assertEqual(nodes.count(), 5)
+        self.assertEqual(ModerationRequestTreeNode.find_problems(), ([], [], [], [], []))
+
+    def test_bulk_add_versions_after_existing_requests(self):
+        page1 = PageContentWithVersionFactory().page
+        page2 = PageContentWithVersionFactory().page
+        component = self._get_collections_obj(pages={"page1": page1})
+        collection = ModerationCollectionFactory()
+        collection.add_version(get_version(page1))
+
+        component.bulk_add_versions([(collection, []), (ModerationCollectionFactory(), [page2])])
+
+        self.assertEqual(ModerationRequestTreeNode.objects.count(), 2)
+        self.assertEqual(ModerationRequestTreeNode.find_problems(), ([], [], [], [], []))
+
+    def test_plan(self):
+        ModerationCollectionFactory(name="Collection 1")
+        component = self._get_collections_obj()
+        component.raw_data["collection2"] = {
+            "pages": ["page1"],
+            "name": "Collection 2",
+            "user": "user1",
+            "workflow": "wf1",
+        }
+        with self.assertNumQueries(1):
+            result = component.plan()
+        self.assertEqual(
+            result,
+            {
+                "collections": {"create": ["Collection 2"], "skip": ["Collection 1"]},
+                "requests": {"create": ["Collection 2 -> page1"], "skip": []},
+            },
+        )
+
+
+class HistoryTestCase(TestCase):
+    def setUp(self):
+        self.author = UserFactory()
+        self.submitter = UserFactory()
+        self.workflow = WorkflowFactory()
+        self.step1 = WorkflowStepFactory(workflow=self.workflow, order=1)
+        self.step2 = WorkflowStepFactory(workflow=self.workflow, order=2)
+        self.collection = ModerationCollectionFactory(
+            author=self.author, workflow=self.workflow
+        )
+        self.requests = [
+            ModerationRequest.objects.create(
+                collection=self.collection,
+                version=PageVersionFactory(),
+                author=self.author,
+                is_active=True,
+            )
+            for i in range(3)
+        ]
+
+    def get_component(self, data):
+        bootstrap = Mock(
+            users={"submitter": self.submitter, "author": self.author},
+            collections={"collection1": self.collection},
+        )
+        component = History(bootstrap)
+        component.raw_data = {"collection1": data}
+        return component
+
+    def test_parse(self):
+        component = self.get_component(
+            {
+                "submitted_by": "submitter",
+                "approvals": 4,
+                "rejections": 1,
+                "comments": 3,
+                "comment_authors": ["submitter", "author"],
+            }
+        )
+
+        component.parse()
+
+        self.collection.refresh_from_db()
+        self.assertEqual(self.collection.status, IN_REVIEW)
+        self.assertEqual(component.data, {"collection1": self.collection})
+        actions = ModerationRequestAction.objects.filter(
+            moderation_request__collection=self.collection
+        )
+        started = actions.filter(action=ACTION_STARTED)
+        self.assertEqual(started.count(), 3)
+        self.assertEqual({action.by_user for action in started}, {self.submitter})
+        self.assertEqual({action.to_role for action in started}, {self.step1.role})
+        approvals = actions.filter(action=ACTION_APPROVED)
+        self.assertEqual(approvals.count(), 4)
+        # Approvals go round-robin, the first request gets both steps approved
+        self.assertEqual(
+            list(
+                approvals.filter(moderation_request=self.requests[0])
+                .order_by("pk")
+                .values_list("step_approved", "by_user", "to_role")
+            ),
+            [
+                (self.step1.pk, self.step1.role.user_id, self.step2.role_id),
+                (self.step2.pk, self.step2.role.user_id, None),
+            ],
+        )
+        rejection = actions.get(action=ACTION_REJECTED)
+        self.assertEqual(rejection.moderation_request, self.requests[0])
+        self.assertEqual(rejection.to_user, self.author)
+        self.assertEqual(
+            list(
+                CollectionComment.objects.filter(collection=self.collection)
+                .order_by("pk")
+                .values_list("author", "message")
+            ),
+            [
+                (self.submitter.pk, "Comment 1"),
+                (self.author.pk, "Comment 2"),
+                (self.submitter.pk, "Comment 3"),
+            ],
+        )
+
+    def test_parse_caps_approvals(self):
+        component = self.get_component({"approvals": 100})
+
+        component.parse()
+
+        approvals = ModerationRequestAction.objects.filter(action=ACTION_APPROVED)
+        self.assertEqual(approvals.count(), 6)
+        self.assertEqual(
+            set(ModerationRequestAction.objects.values_list("by_user", flat=True)),
+            {self.author.pk, self.step1.role.user_id, self.step2.role.user_id},
+        )
+
+    def test_parse_role_with_group(self):
+        group = GroupFactory()
+        member = UserFactory()
+        member.groups.add(group)
+        role = self.step1.role
+        role.user = None
+        role.group = group
+        role.save()
+        component = self.get_component({"approvals": 1})
+
+        component.parse()
+
+        approval = ModerationRequestAction.objects.get(action=ACTION_APPROVED)
+        self.assertEqual(approval.by_user, member)
+
+    def test_parse_skips_collections_with_history(self):
+        self.requests[0].actions.create(by_user=self.author, action=ACTION_STARTED)
+        component = self.get_component({"approvals": 1, "comments": 1})
+
+        component.parse()
+
+        self.assertEqual(ModerationRequestAction.objects.count(), 1)
+        self.assertFalse(CollectionComment.objects.exists())
+        self.assertEqual(component.data, {"collection1": self.collection})
+
+    def test_parse_queries(self):
+        component = self.get_component({"approvals": 3, "rejections": 3, "comments": 3})
+        # history lookup, requests, steps, status update, actions, comments
+        with self.assertNumQueries(6):
+            component.parse()
+
+    def test_plan(self):
+        other = ModerationCollectionFactory(name="Collection 2")
+        component = self.get_component({"approvals": 1})
+        component.raw_data["collection2"] = {"approvals": 1}
+        component.bootstrap.collections = Mock(
+            raw_data={
+                "collection1": {"name": self.collection.name},
+                "collection2": {"name": other.name},
+            }
+        )
+        self.requests[0].actions.create(by_user=self.author, action=ACTION_STARTED)
+        with self.assertNumQueries(1):
+            result = component.plan()
+        self.assertEqual(
+            result, {"history": {"create": [other.name], "skip": [self.collection.name]}}
+        )
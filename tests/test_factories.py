@@ -1,3 +1,6 @@
+from unittest.mock import patch
+
+from django.contrib.auth.hashers import make_password
 from django.test import TestCase
 
 from djangocms_fil_bootstrap.factories import UserFactory
@@ -12,3 +15,14 @@ class UserFactoryTestCase(TestCase):
         existing_user = UserFactory()
         user = UserFactory(username=existing_user.username)
         self.assertEqual(user.pk, existing_user.pk)
+
+    def test_user_factory_password_hash(self):
+        with patch(
+            "django.contrib.auth.models.UserManager.create_user"
+        ) as create_user:
+            user = UserFactory(
+                username="test", password="test", password_hash=make_password("test")
+            )
+        create_user.assert_not_called()
+        user.refresh_from_db()
+        self.assertTrue(user.check_password("test"))
@@ -0,0 +1,180 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from djangocms_fil_bootstrap.bootstrapper import Bootstrap
+from djangocms_fil_bootstrap.components.base import Component
+from djangocms_fil_bootstrap.factories import UserFactory
+from djangocms_fil_bootstrap.fingerprints import ChangedSectionError, Ledger
+from djangocms_fil_bootstrap.models import Fingerprint
+from djangocms_fil_bootstrap.profiling import Profiler
+
+
+class Things(Component):
+    field_name = "things"
+    default_factory = dict
+
+    def parse(self):
+        for name, username in self.raw_data.items():
+            self.data[name] = UserFactory(username=username)
+
+
+class Labels(Component):
+    field_name = "labels"
+    default_factory = dict
+    depends_on = ("things",)
+
+    def parse(self):
+        for name, thing in self.raw_data.items():
+            self.data[name] = self.bootstrap.things[thing]
+
+
+class Notes(Component):
+    """Creates a new user for every note, each time it runs."""
+
+    field_name = "notes"
+    default_factory = dict
+    creates_only = True
+    depends_on = ("things",)
+
+    def parse(self):
+        for name, thing in self.raw_data.items():
+            self.data[name] = UserFactory(
+                username="{}-{}".format(name, get_user_model().objects.count())
+            )
+
+
+def source(data, name="source.json"):
+    file_ = StringIO(json.dumps(data))
+    file_.name = name
+    return file_
+
+
+class FingerprintTestCase(TestCase):
+    data = {"things": {"a": "user-a", "b": "user-b"}, "labels": {"x": "a"}}
+
+    def run_bootstrap(self, data, **options):
+        bootstrap = Bootstrap(source(data), fingerprint=True, **options)
+        bootstrap(Things, Labels)
+        return bootstrap
+
+    def test_records_fingerprints(self):
+        self.run_bootstrap(self.data)
+        self.assertEqual(
+            set(Fingerprint.objects.values_list("source", "section")),
+            {("source.json", ""), ("source.json", "things"), ("source.json", "labels")},
+        )
+        user = get_user_model().objects.get(username="user-a")
+        self.assertEqual(
+            Fingerprint.objects.get(section="things").registry,
+            {
+                "a": ["auth.user", user.pk],
+                "b": ["auth.user", get_user_model().objects.get(username="user-b").pk],
+            },
+        )
+
+    def test_unchanged_source_is_skipped(self):
+        self.run_bootstrap(self.data)
+        with patch.object(Things, "parse") as parse, patch.object(
+            Ledger, "restore"
+        ) as restore:
+            # One query loading fingerprints
+            with self.assertNumQueries(1):
+                self.run_bootstrap(self.data)
+        parse.assert_not_called()
+        restore.assert_not_called()
+
+    def test_unchanged_section_is_restored(self):
+        self.run_bootstrap(self.data)
+        data = dict(self.data, unrelated=[1])
+        with patch.object(Things, "parse") as parse:
+            bootstrap = self.run_bootstrap(data)
+        parse.assert_not_called()
+        self.assertEqual(bootstrap.things["a"].username, "user-a")
+        self.assertEqual(bootstrap.labels["x"], bootstrap.things["a"])
+
+    def test_changed_section_runs(self):
+        self.run_bootstrap(self.data)
+        data = dict(self.data, labels={"x": "a", "y": "b"})
+        with patch.object(Things, "parse") as parse:
+            bootstrap = self.run_bootstrap(data)
+        parse.assert_not_called()
+        self.assertEqual(bootstrap.labels["y"].username, "user-b")
+        self.assertEqual(
+            Fingerprint.objects.get(section="labels").registry["y"][0], "auth.user"
+        )
+
+    def test_changed_dependency_runs_dependants(self):
+        self.run_bootstrap(self.data)
+        data = dict(self.data, things={"a": "user-a", "b": "user-b", "c": "user-c"})
+        with patch.object(Labels, "parse") as parse:
+            self.run_bootstrap(data)
+        parse.assert_called_once_with()
+
+    def test_deleted_objects_run_again(self):
+        self.run_bootstrap(self.data)
+        get_user_model().objects.filter(username="user-b").delete()
+        bootstrap = self.run_bootstrap(dict(self.data, unrelated=[1]))
+        self.assertEqual(bootstrap.things["b"].username, "user-b")
+
+    def test_force(self):
+        self.run_bootstrap(self.data)
+        with patch.object(Things, "parse") as parse, patch.object(
+            Labels, "parse"
+        ) as labels_parse:
+            self.run_bootstrap(self.data, force=True)
+        parse.assert_called_once_with()
+        labels_parse.assert_called_once_with()
+
+    def test_other_source(self):
+        self.run_bootstrap(self.data)
+        bootstrap = Bootstrap(source(self.data, "other.json"), fingerprint=True)
+        with patch.object(Things, "parse") as parse:
+            bootstrap(Things)
+        parse.assert_called_once_with()
+
+    def test_profile_excludes_fingerprints(self):
+        data = dict(self.data, labels={})
+        profiler = Profiler()
+        self.run_bootstrap(data, profiler=profiler)
+        # Labels don't query anything, recording their fingerprint does
+        self.assertEqual(profiler.results["source.json"]["labels"]["queries"], 0)
+
+        profiler = Profiler()
+        self.run_bootstrap(dict(data, unrelated=[1]), profiler=profiler)
+        # Restored sections aren't profiled
+        self.assertEqual(profiler.results, {})
+
+    def test_without_fingerprint(self):
+        bootstrap = Bootstrap(source(self.data))
+        bootstrap(Things, Labels)
+        self.assertIsNone(bootstrap.ledger)
+        self.assertFalse(Fingerprint.objects.exists())
+
+
+class CreatesOnlyTestCase(TestCase):
+    data = {"things": {"a": "user-a"}, "notes": {"n": "a"}}
+
+    def run_bootstrap(self, data, **options):
+        bootstrap = Bootstrap(source(data), fingerprint=True, **options)
+        bootstrap(Things, Notes)
+        return bootstrap
+
+    def test_changed_dependency_is_restored(self):
+        note = self.run_bootstrap(self.data).notes["n"]
+        data = dict(self.data, things={"a": "user-a", "b": "user-b"})
+        with patch.object(Notes, "parse") as parse:
+            bootstrap = self.run_bootstrap(data)
+        parse.assert_not_called()
+        self.assertEqual(bootstrap.notes["n"], note)
+
+    def test_changed_section(self):
+        self.run_bootstrap(self.data)
+        data = dict(self.data, notes={"n": "a", "m": "a"})
+        with self.assertRaisesMessage(ChangedSectionError, "Section notes of source.json"):
+            self.run_bootstrap(data)
+        bootstrap = self.run_bootstrap(data, force=True)
+        self.assertEqual(set(bootstrap.notes.data), {"n", "m"})
@@ -0,0 +1,68 @@
+import json
+from io import StringIO
+
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+
+from cms.models import PageContent
+
+from djangocms_moderation.models import (
+    CollectionComment,
+    ModerationCollection,
+    ModerationRequest,
+)
+
+from djangocms_fil_bootstrap import bootstrap
+from djangocms_fil_bootstrap.generator import generate, get_plugins
+
+
+def count_plugins(plugins):
+    return sum(1 + count_plugins(plugin.get("children", [])) for plugin in plugins)
+
+
+class GeneratorTestCase(TestCase):
+    def test_get_plugins(self):
+        self.assertEqual(
+            get_plugins(1, "text"), [{"type": "TextPlugin", "body": "<p>text</p>"}]
+        )
+        self.assertEqual(count_plugins(get_plugins(2, "text")), 2)
+        # Multi column, two columns, two text plugins
+        self.assertEqual(count_plugins(get_plugins(3, "text")), 5)
+        self.assertEqual(count_plugins(get_plugins(5, "text")), 13)
+
+    def test_generate(self):
+        data = generate(users=5, groups=2, pages=7, depth=3, collections=2)
+        self.assertEqual(
+            data["users"],
+            [{"username": "user1", "is_superuser": True}, "user2", "user3", "user4", "user5"],
+        )
+        self.assertEqual(data["groups"]["group1"]["users"], ["user1", "user3", "user5"])
+        self.assertEqual(data["groups"]["group2"]["users"], ["user2", "user4"])
+        self.assertEqual(len(data["workflows"]["workflow"]["steps"]), 2)
+        self.assertEqual(len(data["pages"]), 7)
+        self.assertNotIn("parent", data["pages"]["page1"])
+        self.assertEqual(data["pages"]["page7"]["parent"], "page3")
+        self.assertEqual(
+            data["collections"]["collection1"]["pages"], ["page1", "page3", "page5", "page7"]
+        )
+        self.assertEqual(data["history"]["collection2"]["approvals"], 3)
+
+    def test_generate_invalid(self):
+        with self.assertRaises(ValueError):
+            generate(users=0)
+
+    def assertBootstrapped(self, **options):
+        data = generate(users=5, groups=2, pages=7, depth=3, collections=2)
+        bootstrap(StringIO(json.dumps(data)), **options)
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(PageContent._base_manager.count(), 7)
+        self.assertEqual(ModerationCollection.objects.count(), 2)
+        self.assertEqual(ModerationRequest.objects.count(), 7)
+        self.assertEqual(CollectionComment.objects.count(), 4)
+
+    def test_bootstrap(self):
+        self.assertBootstrapped()
+
+    def test_bootstrap_bulk(self):
+        self.assertBootstrapped(bulk=True)
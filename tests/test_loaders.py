@@ -0,0 +1,97 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+
+from djangocms_fil_bootstrap.loaders import (
+    StreamingSource,
+    iter_sections,
+    open_source,
+)
+
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+DATA = {
+    "users": [{"username": "user1", "password": "a \"quoted\" {password}"}],
+    "empty": {},
+    "number": -1.5e3,
+    "flag": False,
+    "nothing": None,
+    "text": "}]\\",
+    "pages": {"page1": {"title": "Page", "content": [{"children": [[], {}]}]}},
+}
+
+
+class IterSectionsTestCase(SimpleTestCase):
+    def test_sections(self):
+        for text in (json.dumps(DATA), json.dumps(DATA, indent=4)):
+            for chunk_size in (1, 3, 1000):
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    sections = list(iter_sections(StringIO(text), chunk_size))
+                    self.assertEqual(sections, list(DATA.items()))
+
+    def test_empty(self):
+        self.assertEqual(list(iter_sections(StringIO(" { } "))), [])
+
+    def test_invalid(self):
+        for text in ("[]", '{"a": 1', '{"a": [1, 2}', '{"a": 1 "b": 2}'):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                list(iter_sections(StringIO(text), 2))
+
+
+class StreamingSourceTestCase(SimpleTestCase):
+    def test_get(self):
+        source = StreamingSource(StringIO(json.dumps(DATA)), chunk_size=4)
+        self.assertEqual(source.get("empty"), {})
+        # Sections read on the way are kept until discarded
+        self.assertEqual(source.pending, {"users": DATA["users"], "empty": {}})
+        source.discard("empty")
+        self.assertEqual(source.get("users"), DATA["users"])
+        self.assertEqual(source.pending, {"users": DATA["users"]})
+
+    def test_get_missing(self):
+        file_ = StringIO(json.dumps(DATA))
+        source = StreamingSource(file_)
+        self.assertIsNone(source.get("missing"))
+        self.assertEqual(source.get("missing", []), [])
+        self.assertEqual(source.get("pages"), DATA["pages"])
+        self.assertTrue(file_.closed)
+
+
+class OpenSourceTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.text = json.dumps(DATA)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_plain(self):
+        with open(self.path("data.json"), "w") as f:
+            f.write(self.text)
+        with open_source(self.path("data.json")) as f:
+            self.assertEqual(json.load(f), DATA)
+
+    def test_gzip(self):
+        with gzip.open(self.path("data.json.gz"), "wt") as f:
+            f.write(self.text)
+        with open_source(self.path("data.json.gz")) as f:
+            self.assertEqual(dict(iter_sections(f)), DATA)
+
+    @skipUnless(zstandard, "zstandard is not installed")
+    def test_zstd(self):
+        with open(self.path("data.json.zst"), "wb") as f:
+            f.write(zstandard.ZstdCompressor().compress(self.text.encode()))
+        with open_source(self.path("data.json.zst")) as f:
+            self.assertEqual(dict(iter_sections(f)), DATA)
@@ -2,10 +2,11 @@ from unittest.mock import Mock, patch
 
 from django.test import TestCase
 
-from djangocms_fil_bootstrap import bootstrap
+from djangocms_fil_bootstrap import bootstrap, plan
 from djangocms_fil_bootstrap.components import (
     Collections,
     Groups,
+    History,
     Pages,
     Permissions,
     Users,
@@ -22,6 +23,16 @@ class MainTestCase(TestCase):
             bootstrap(file_)
         Bootstrap.assert_called_once_with(file_)
         Bootstrap.return_value.assert_called_once_with(
-            Users, Groups, Permissions, Pages, Workflows, Collections
+            Users, Groups, Permissions, Pages, Workflows, Collections, History
         )
         reseed_random.assert_called_once_with(0)
+
+    def test_plan(self):
+        file_ = Mock()
+        with patch("djangocms_fil_bootstrap.bootstrapper.Bootstrap") as Bootstrap:
+            result = plan(file_, stream=True)
+        Bootstrap.assert_called_once_with(file_, stream=True)
+        Bootstrap.return_value.plan.assert_called_once_with(
+            Users, Groups, Permissions, Pages, Workflows, Collections, History
+        )
+        self.assertEqual(result, Bootstrap.return_value.plan.return_value)
@@ -1,10 +1,16 @@
+import json
+import os
+import tempfile
 from io import StringIO
 from pathlib import Path
 from unittest.mock import call, mock_open, patch
 
+from django.contrib.auth.models import Group
 from django.core.management import CommandError, call_command
+from django.db import transaction
 from django.test import TestCase
 
+from djangocms_fil_bootstrap.fingerprints import ChangedSectionError
 from djangocms_fil_bootstrap.management.commands.bootstrap import Command
 
 
@@ -66,6 +72,19 @@ class BootstrapCommandTest(TestCase):
             "An error occured while bootstrapping the project.", str(context.exception)
         )
 
+    def test_bootstrap_changed_section(self):
+        command = Command()
+        with patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.bootstrap",
+            side_effect=ChangedSectionError("Section pages of demo has changed."),
+        ), patch.object(command, "get_file_path"), patch("builtins.open", mock_open()):
+            out = StringIO()
+            with self.assertRaises(CommandError) as context:
+                call_command(command, "demo", "--fingerprint", stdout=out)
+        self.assertTrue(
+            str(context.exception).startswith("Section pages of demo has changed.")
+        )
+
     def test_bootstrap(self):
         command = Command()
         with patch(
@@ -91,4 +110,297 @@ class BootstrapCommandTest(TestCase):
             out = StringIO()
             call_command(command, "--all", stdout=out)
         path(call("file1", False), call("file1", True), call("file1", False))
-        bootstrap.assert_has_calls([call(file1), call(file2)])
+        bootstrap.assert_has_calls(
+            [call(file1), call(file2)]
+        )
+
+    def test_bootstrap_bulk(self):
+        command = Command()
+        with patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.bootstrap"
+        ) as bootstrap, patch.object(command, "get_file_path"), patch(
+            "builtins.open", mock_open()
+        ) as file:
+            out = StringIO()
+            call_command(command, "demo", "--bulk", stdout=out)
+        bootstrap.assert_called_once_with(
+            file.return_value, bulk=True
+        )
+
+    def test_bootstrap_password_hashing(self):
+        command = Command()
+        with patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.bootstrap"
+        ) as bootstrap, patch.object(command, "get_file_path"), patch(
+            "builtins.open", mock_open()
+        ) as file:
+            out = StringIO()
+            call_command(
+                command, "demo", "--password-hashing", "memoize", stdout=out
+            )
+        bootstrap.assert_called_once_with(
+            file.return_value, password_hashing="memoize"
+        )
+
+    def test_bootstrap_defer_publish(self):
+        command = Command()
+        with patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.bootstrap"
+        ) as bootstrap, patch.object(command, "get_file_path"), patch(
+            "builtins.open", mock_open()
+        ) as file:
+            out = StringIO()
+            call_command(command, "demo", "--defer-publish", stdout=out)
+        bootstrap.assert_called_once_with(
+            file.return_value, defer_publish=True
+        )
+
+    def test_bootstrap_skip_publish_signals(self):
+        command = Command()
+        with patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.bootstrap"
+        ) as bootstrap, patch.object(command, "get_file_path"), patch(
+            "builtins.open", mock_open()
+        ) as file:
+            out = StringIO()
+            call_command(command, "demo", "--skip-publish-signals", stdout=out)
+        bootstrap.assert_called_once_with(
+            file.return_value, skip_publish_signals=True
+        )
+
+    def test_bootstrap_stream(self):
+        command = Command()
+        with patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.bootstrap"
+        ) as bootstrap, patch.object(command, "get_file_path"), patch(
+            "builtins.open", mock_open()
+        ) as file:
+            out = StringIO()
+            call_command(command, "demo", "--stream", stdout=out)
+        bootstrap.assert_called_once_with(
+            file.return_value, stream=True
+        )
+
+    def test_bootstrap_compressed(self):
+        command = Command()
+        with patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.bootstrap"
+        ) as bootstrap, patch.object(
+            command, "get_file_path", return_value="demo.json.gz"
+        ), patch(
+            "djangocms_fil_bootstrap.loaders.gzip.open"
+        ) as gzip_open:
+            out = StringIO()
+            call_command(command, "demo", stdout=out)
+        gzip_open.assert_called_once_with("demo.json.gz", "rt", encoding="utf-8")
+        bootstrap.assert_called_once_with(gzip_open.return_value.__enter__.return_value)
+
+    def test_bootstrap_concurrent(self):
+        command = Command()
+        with patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.bootstrap"
+        ) as bootstrap, patch.object(command, "get_file_path"), patch(
+            "builtins.open", mock_open()
+        ) as file, patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.transaction"
+        ) as transaction:
+            out = StringIO()
+            call_command(command, "demo", "--concurrent", stdout=out)
+        bootstrap.assert_called_once_with(
+            file.return_value, concurrent=True
+        )
+        transaction.atomic.assert_not_called()
+
+    def test_bootstrap_force(self):
+        command = Command()
+        with patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.bootstrap"
+        ) as bootstrap, patch.object(command, "get_file_path"), patch(
+            "builtins.open", mock_open()
+        ) as file:
+            out = StringIO()
+            call_command(command, "demo", "--fingerprint", "--force", stdout=out)
+        bootstrap.assert_called_once_with(
+            file.return_value, fingerprint=True, force=True
+        )
+
+    def test_bootstrap_profile(self):
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.json")
+            call_command(
+                "bootstrap", "roles", "--profile", "--profile-json", path, stdout=out
+            )
+            with open(path) as f:
+                report = json.load(f)
+        source = Command().get_file_path("roles")
+        self.assertEqual(list(report), [source])
+        self.assertGreaterEqual(report[source]["groups"]["rows"], 3)
+        self.assertGreater(report[source]["groups"]["queries"], 0)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("source"))
+        self.assertTrue(lines[-1].startswith(source + "  total"))
+
+    def test_bootstrap_chunked(self):
+        command = Command()
+        with patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.bootstrap"
+        ) as bootstrap, patch.object(command, "get_file_path"), patch(
+            "builtins.open", mock_open()
+        ) as file, patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.transaction"
+        ) as transaction:
+            out = StringIO()
+            call_command(command, "demo", "--chunk-size", "100", "--resume", stdout=out)
+        bootstrap.assert_called_once_with(
+            file.return_value, chunk_size=100, resume=True
+        )
+        transaction.atomic.assert_not_called()
+
+    def test_bootstrap_resume_needs_chunk_size(self):
+        with self.assertRaises(CommandError):
+            call_command("bootstrap", "demo", "--resume", stdout=StringIO())
+
+    def test_bootstrap_merge(self):
+        command = Command()
+        file1 = StringIO(json.dumps({"users": ["user1"]}))
+        file2 = StringIO(json.dumps({"users": ["user2"]}))
+        with patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.bootstrap"
+        ) as bootstrap, patch.object(command, "get_file_path"), patch(
+            "builtins.open", mock_open()
+        ) as file:
+            file.side_effect = [file1, file2]
+            out = StringIO()
+            call_command(command, "roles", "demo", "--merge", stdout=out)
+        bootstrap.assert_called_once()
+        merged = bootstrap.call_args[0][0]
+        self.assertEqual(merged.name, "roles+demo")
+        self.assertEqual(bootstrap.call_args[1], {})
+        merged.seek(0)
+        self.assertEqual(json.load(merged), {"users": ["user1", "user2"]})
+
+    def test_plan(self):
+        command = Command()
+        report = {
+            "users": {"users": {"create": ["user1"], "skip": ["user2"]}},
+            "groups": {
+                "groups": {"create": [], "skip": []},
+                "memberships": {"create": ["user1 -> group1"], "skip": []},
+            },
+            "custom": None,
+        }
+        with patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.plan",
+            return_value=report,
+        ) as plan, patch(
+            "djangocms_fil_bootstrap.management.commands.bootstrap.bootstrap"
+        ) as bootstrap, patch.object(
+            command, "get_file_path", return_value="demo"
+        ), patch(
+            "builtins.open", mock_open()
+        ) as file:
+            out = StringIO()
+            call_command(command, "demo", "--plan", stdout=out)
+        plan.assert_called_once_with(file.return_value)
+        bootstrap.assert_not_called()
+        self.assertEqual(
+            out.getvalue(),
+            "demo\n"
+            "  users: 1 to create, 1 to skip\n"
+            "    + user1\n"
+            "  groups: 0 to create, 0 to skip\n"
+            "  groups/memberships: 1 to create, 0 to skip\n"
+            "    + user1 -> group1\n"
+            "  custom: planning not supported\n",
+        )
+
+    def test_plan_json(self):
+        out = StringIO()
+        call_command("bootstrap", "roles", "--plan", "json", stdout=out)
+        report = json.loads(out.getvalue())["roles"]
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(
+            report["groups"]["groups"],
+            {"create": ["Publishers", "Reviewers", "Editors"], "skip": []},
+        )
+        self.assertTrue(report["permissions"]["groups"]["create"])
+
+        call_command("bootstrap", "roles", stdout=StringIO())
+        out = StringIO()
+        call_command("bootstrap", "roles", "--plan", "json", stdout=out)
+        report = json.loads(out.getvalue())["roles"]
+        self.assertEqual(
+            report["groups"]["groups"],
+            {"create": [], "skip": ["Publishers", "Reviewers", "Editors"]},
+        )
+        self.assertEqual(report["workflows"]["roles"]["create"], [])
+        self.assertEqual(report["permissions"]["groups"]["create"], [])
+
+
+class BootstrapBenchmarkCommandTest(TestCase):
+    def test_benchmark(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "benchmark.json")
+            out = StringIO()
+            call_command(
+                "bootstrap_benchmark", "--sizes", "10", "5", "--output", path, stdout=out
+            )
+            with open(path) as f:
+                results = json.load(f)
+            self.assertFalse(Group.objects.exists())
+            self.assertCountEqual(
+                results,
+                ["users", "groups", "permissions", "pages", "workflows", "collections", "history"],
+            )
+            self.assertEqual(list(results["users"]["sizes"]), ["5", "10"])
+            self.assertGreaterEqual(results["users"]["sizes"]["10"]["rows"], 10)
+            self.assertIsNotNone(results["pages"]["queries_exponent"])
+            self.assertIn("users: time ~ n^", out.getvalue())
+
+            out = StringIO()
+            call_command(
+                "bootstrap_benchmark", "--sizes", "5", "10", "--baseline", path, stdout=out
+            )
+        self.assertIn("queries vs baseline)", out.getvalue())
+
+    def test_benchmark_baseline_not_found(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "bootstrap_benchmark", "--sizes", "5", "--baseline", "missing.json", stdout=StringIO()
+            )
+
+
+class BootstrapSnapshotCommandTest(TestCase):
+    def test_snapshot_replay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "roles.json.gz")
+            with transaction.atomic():
+                out = StringIO()
+                call_command("bootstrap_snapshot", "roles", "-o", path, stdout=out)
+                self.assertIn("Wrote", out.getvalue())
+                transaction.set_rollback(True)
+            self.assertFalse(Group.objects.exists())
+
+            out = StringIO()
+            call_command("bootstrap_replay", path, stdout=out)
+        self.assertCountEqual(
+            Group.objects.values_list("name", flat=True),
+            ["Publishers", "Reviewers", "Editors"],
+        )
+        self.assertTrue(Group.objects.get(name="Editors").permissions.exists())
+        self.assertIn("Replayed", out.getvalue())
+
+    def test_replay_conflict(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "roles.json.gz")
+            call_command("bootstrap_snapshot", "roles", "-o", path, stdout=StringIO())
+            count = Group.objects.count()
+
+            with self.assertRaisesMessage(CommandError, "exist already"):
+                call_command("bootstrap_replay", path, stdout=StringIO())
+        self.assertEqual(Group.objects.count(), count)
+
+    def test_replay_not_found(self):
+        with self.assertRaises(CommandError):
+            call_command("bootstrap_replay", "missing.json", stdout=StringIO())
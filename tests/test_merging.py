@@ -0,0 +1,104 @@
+import json
+
+from django.test import SimpleTestCase
+
+from djangocms_fil_bootstrap.merging import (
+    merge,
+    merge_sources,
+    merge_users,
+    merged_file,
+)
+
+
+class MergeTestCase(SimpleTestCase):
+    def test_merge_dicts(self):
+        result = merge(
+            {"page1": {"title": "Page 1"}, "page2": {"title": "Page 2"}},
+            {"page1": {"slug": "first"}, "page3": {"title": "Page 3"}},
+            ("pages",),
+        )
+        self.assertEqual(
+            result,
+            {
+                "page1": {"title": "Page 1", "slug": "first"},
+                "page2": {"title": "Page 2"},
+                "page3": {"title": "Page 3"},
+            },
+        )
+
+    def test_merge_lists(self):
+        result = merge(["group1", "group2"], ["group2", "group3"], ("groups",))
+        self.assertEqual(result, ["group1", "group2", "group3"])
+
+    def test_merge_later_value_wins(self):
+        with self.assertLogs("djangocms_fil_bootstrap.merging", "INFO") as logs:
+            result = merge({"title": "Old"}, {"title": "New"}, ("pages", "page1"))
+        self.assertEqual(result, {"title": "New"})
+        self.assertIn("pages/page1/title: 'Old' replaced with 'New'", logs.output[0])
+
+    def test_merge_different_types(self):
+        with self.assertRaises(ValueError) as context:
+            merge({"roles": ["role1"]}, {"roles": {"role1": {}}}, ("workflows",))
+        self.assertEqual(
+            str(context.exception), "Can't merge workflows/roles of different types."
+        )
+
+    def test_merge_pages(self):
+        plugin = {"type": "TextPlugin"}
+        page = {
+            "title": "Page 1",
+            "content": [dict(plugin, body="<p>Old</p>")],
+            "assignments": [{"user": "user1", "can_view": True}],
+        }
+        result = merge_sources(
+            [
+                {"pages": {"page1": page}},
+                {
+                    "pages": {
+                        "page1": dict(
+                            page,
+                            content=[dict(plugin, body="<p>New</p>")],
+                            assignments=[{"user": "user2", "can_view": True}],
+                        )
+                    }
+                },
+            ]
+        )
+        self.assertEqual(
+            result["pages"]["page1"],
+            {
+                "title": "Page 1",
+                "content": [dict(plugin, body="<p>New</p>")],
+                "assignments": [{"user": "user2", "can_view": True}],
+            },
+        )
+
+    def test_merge_users(self):
+        result = merge_users(
+            ["user1", {"username": "user2", "password": "old"}],
+            [{"username": "user2", "password": "new"}, "user1", "user3"],
+        )
+        self.assertEqual(
+            result, ["user1", {"username": "user2", "password": "new"}, "user3"]
+        )
+
+    def test_merge_sources(self):
+        result = merge_sources(
+            [
+                {"users": ["user1"], "groups": {"Editors": ["user1"]}},
+                {"users": ["user2"], "groups": {"Editors": ["user2"]}, "history": {}},
+            ]
+        )
+        self.assertEqual(
+            result,
+            {
+                "users": ["user1", "user2"],
+                "groups": {"Editors": ["user1", "user2"]},
+                "history": {},
+            },
+        )
+
+    def test_merged_file(self):
+        file_ = merged_file(["roles", "demo"], [{"users": ["user1"]}, {"users": ["user2"]}])
+        self.assertEqual(file_.name, "roles+demo")
+        self.assertEqual(json.load(file_), {"users": ["user1", "user2"]})
@@ -0,0 +1,152 @@
+from django.test import TestCase
+
+from cms.api import create_page
+from cms.models import PageUrl
+
+from djangocms_versioning.constants import DRAFT
+
+from djangocms_fil_bootstrap.page_builder import (
+    PAGES_ARE_NODES,
+    PageTreeBuilder,
+    tree_model,
+)
+from djangocms_fil_bootstrap.test_utils.factories import UserFactory
+from djangocms_fil_bootstrap.utils import get_version
+
+
+class PageTreeBuilderTestCase(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+
+    def page(self, title, **kwargs):
+        data = {
+            "title": title,
+            "template": "INHERIT",
+            "language": "en",
+            "created_by": self.user,
+        }
+        data.update(kwargs)
+        return data
+
+    def get_path(self, page):
+        return PageUrl.objects.get(page=page, language="en").path
+
+    def get_node(self, page):
+        return page if PAGES_ARE_NODES else page.node
+
+    def assertValidTree(self):
+        self.assertEqual(tree_model.find_problems(), ([], [], [], [], []))
+
+    def test_hierarchy(self):
+        builder = PageTreeBuilder()
+        builder.add("grandchild", self.page("Grandchild", parent="child"))
+        builder.add("root", self.page("Root"))
+        builder.add("child", self.page("Child", parent="root"))
+        builder.add("child2", self.page("Child 2", parent="root"))
+        builder.add("root2", self.page("Root 2", in_navigation=True))
+        pages = builder.save()
+
+        self.assertValidTree()
+        self.assertEqual(pages["child"].get_parent_page(), pages["root"])
+        self.assertEqual(pages["grandchild"].get_parent_page(), pages["child"])
+        self.assertEqual(pages["child2"].get_parent_page(), pages["root"])
+        self.assertIsNone(pages["root2"].get_parent_page())
+        self.assertEqual(self.get_path(pages["root"]), "root")
+        self.assertEqual(self.get_path(pages["grandchild"]), "root/child/grandchild")
+        self.assertEqual(self.get_path(pages["root2"]), "root-2")
+
+        version = get_version(pages["root2"])
+        self.assertEqual(version, builder.versions["root2"])
+        self.assertEqual(version.state, DRAFT)
+        self.assertEqual(version.created_by, self.user)
+        self.assertEqual(version.content.title, "Root 2")
+        self.assertTrue(version.content.in_navigation)
+        self.assertEqual(
+            version.content.get_placeholders().get(slot="content"),
+            builder.placeholders["root2"]["content"],
+        )
+
+    def test_same_as_create_page(self):
+        expected = create_page(**self.page("Root", in_navigation=True))
+        builder = PageTreeBuilder()
+        builder.add("root", self.page("Root", in_navigation=True))
+        page = builder.save()["root"]
+
+        self.assertValidTree()
+        expected_content = get_version(expected).content
+        content = get_version(page).content
+        for field in ("title", "template", "language", "in_navigation", "created_by"):
+            self.assertEqual(getattr(content, field), getattr(expected_content, field))
+        self.assertEqual(
+            set(content.get_placeholders().values_list("slot", flat=True)),
+            set(expected_content.get_placeholders().values_list("slot", flat=True)),
+        )
+
+    def test_children_of_existing_page(self):
+        existing = create_page(**self.page("Existing"))
+        create_page(**self.page("Child", parent=existing))
+        builder = PageTreeBuilder()
+        builder.add("child", self.page("Child", parent=existing))
+        builder.add("grandchild", self.page("Grandchild", parent="child"))
+        pages = builder.save()
+
+        self.assertValidTree()
+        self.assertEqual(pages["child"].get_parent_page(), existing)
+        self.assertEqual(self.get_path(pages["child"]), "existing/child-2")
+        self.assertEqual(
+            self.get_path(pages["grandchild"]), "existing/child-2/grandchild"
+        )
+
+    def test_unique_slugs(self):
+        create_page(**self.page("Same"))
+        builder = PageTreeBuilder()
+        builder.add("page1", self.page("Same"))
+        builder.add("page2", self.page("Same"))
+        builder.add("page3", self.page("Other", slug="same-3"))
+        pages = builder.save()
+
+        paths = {self.get_path(page) for page in pages.values()}
+        self.assertEqual(paths, {"same-2", "same-3", "same-4"})
+
+    def test_published_page_is_served(self):
+        builder = PageTreeBuilder()
+        builder.add("root", self.page("Root"))
+        builder.add("child", self.page("Child", parent="root"))
+        builder.save()
+        for version in builder.versions.values():
+            version.publish(self.user)
+
+        response = self.client.get(
+            builder.versions["child"].content.get_absolute_url()
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_parent(self):
+        builder = PageTreeBuilder()
+        builder.add("child", self.page("Child", parent="missing"))
+        with self.assertRaises(ValueError):
+            builder.save()
+
+    def test_circular_parents(self):
+        builder = PageTreeBuilder()
+        builder.add("page1", self.page("Page 1", parent="page2"))
+        builder.add("page2", self.page("Page 2", parent="page1"))
+        with self.assertRaises(ValueError):
+            builder.save()
+
+    def test_unexpected_argument(self):
+        builder = PageTreeBuilder()
+        with self.assertRaises(TypeError):
+            builder.add("page", self.page("Page", foo="bar"))
+
+    def test_root_steps(self):
+        create_page("Existing", "INHERIT", "en", created_by=self.user)
+        builder = PageTreeBuilder(root_steps={"root": 5})
+        builder.add("root", self.page("Root"))
+        builder.add("child", self.page("Child", parent="root"))
+        builder.add("other", self.page("Other"))
+        pages = builder.save()
+        self.assertEqual(self.get_node(pages["root"]).path, tree_model._get_path(None, 1, 5))
+        self.assertEqual(pages["child"].get_parent_page(), pages["root"])
+        # Other roots are added after the last existing root
+        self.assertEqual(self.get_node(pages["other"]).path, tree_model._get_path(None, 1, 2))
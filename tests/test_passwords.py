@@ -0,0 +1,44 @@
+from unittest.mock import patch
+
+import django
+from django.contrib.auth.hashers import check_password
+from django.test import TestCase
+
+from djangocms_fil_bootstrap.passwords import hash_passwords
+
+
+class PasswordsTestCase(TestCase):
+    def test_memoize(self):
+        result = hash_passwords(["foo", "bar", "foo"], "memoize")
+        self.assertEqual(len(result), 3)
+        self.assertEqual(result[0], result[2])
+        self.assertNotEqual(result[0], result[1])
+        self.assertTrue(check_password("foo", result[0]))
+        self.assertTrue(check_password("bar", result[1]))
+
+    def test_memoize_hashes_each_password_once(self):
+        with patch(
+            "djangocms_fil_bootstrap.passwords.make_password",
+            side_effect=lambda password: password.upper(),
+        ) as make_password:
+            result = hash_passwords(["foo", "foo", "foo"], "memoize")
+        make_password.assert_called_once_with("foo")
+        self.assertEqual(result, ["FOO", "FOO", "FOO"])
+
+    def test_pool(self):
+        result = hash_passwords(["foo", "foo"], "pool")
+        self.assertEqual(len(result), 2)
+        # Each user gets its own salt
+        self.assertNotEqual(result[0], result[1])
+        self.assertTrue(check_password("foo", result[0]))
+        self.assertTrue(check_password("foo", result[1]))
+
+    def test_pool_sets_up_workers(self):
+        with patch("djangocms_fil_bootstrap.passwords.ProcessPoolExecutor") as executor:
+            executor.return_value.__enter__.return_value.map.return_value = ["hash"]
+            self.assertEqual(hash_passwords(["foo"], "pool"), ["hash"])
+        executor.assert_called_once_with(initializer=django.setup)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            hash_passwords(["foo"], "unknown")
@@ -0,0 +1,144 @@
+from copy import deepcopy
+from unittest.mock import Mock
+
+from django.test import TestCase
+
+from cms.api import add_plugin
+from cms.models import CMSPlugin
+
+from djangocms_column.models import Column
+from djangocms_text_ckeditor.models import Text
+
+from djangocms_fil_bootstrap.components import Pages
+from djangocms_fil_bootstrap.plugins import PluginTreeBuilder
+from djangocms_fil_bootstrap.test_utils.factories import (
+    PageContentWithVersionFactory,
+    PlaceholderFactory,
+)
+
+
+CONTENT = [
+    {"type": "TextPlugin", "body": "<h1>Title</h1>"},
+    {
+        "type": "MultiColumnPlugin",
+        "children": [
+            {
+                "type": "ColumnPlugin",
+                "width": "33%",
+                "children": [{"type": "TextPlugin", "body": "<p>First</p>"}],
+            },
+            {
+                "type": "ColumnPlugin",
+                "width": "66%",
+                "children": [
+                    {"type": "TextPlugin", "body": "<p>Second</p>"},
+                    {"type": "TextPlugin", "body": "<p>Third</p>"},
+                ],
+            },
+        ],
+    },
+    {"type": "TextPlugin", "body": "<p>Footer</p>"},
+]
+
+
+class PluginTreeBuilderTestCase(TestCase):
+    def get_placeholder(self):
+        return PlaceholderFactory(source=PageContentWithVersionFactory())
+
+    def get_tree(self, placeholder):
+        plugins = CMSPlugin.objects.filter(placeholder=placeholder).order_by(
+            "position"
+        )
+        return [
+            (
+                plugin.plugin_type,
+                plugin.language,
+                plugin.position,
+                plugin.parent.position if plugin.parent_id else None,
+            )
+            for plugin in plugins
+        ]
+
+    def get_plugin_data(self, placeholder):
+        return (
+            list(
+                Text.objects.filter(placeholder=placeholder)
+                .order_by("position")
+                .values_list("position", "body")
+            ),
+            list(
+                Column.objects.filter(placeholder=placeholder)
+                .order_by("position")
+                .values_list("position", "width")
+            ),
+        )
+
+    def add_plugins(self, placeholder, content):
+        component = Pages(Mock())
+        for plugin in deepcopy(content):
+            component.add_plugin(placeholder, plugin, "en")
+
+    def test_same_tree_as_add_plugin(self):
+        expected = self.get_placeholder()
+        placeholder = self.get_placeholder()
+        self.add_plugins(expected, CONTENT)
+
+        builder = PluginTreeBuilder()
+        builder.add(placeholder, deepcopy(CONTENT), "en")
+        builder.save()
+
+        self.assertEqual(len(self.get_tree(placeholder)), 8)
+        self.assertEqual(self.get_tree(placeholder), self.get_tree(expected))
+        self.assertEqual(
+            self.get_plugin_data(placeholder), self.get_plugin_data(expected)
+        )
+
+    def test_appends_to_existing_plugins(self):
+        expected = self.get_placeholder()
+        placeholder = self.get_placeholder()
+        for target in (expected, placeholder):
+            add_plugin(target, "TextPlugin", "en", body="<p>Existing</p>")
+        self.add_plugins(expected, CONTENT)
+
+        builder = PluginTreeBuilder()
+        builder.add(placeholder, deepcopy(CONTENT), "en")
+        builder.save()
+
+        self.assertEqual(self.get_tree(placeholder), self.get_tree(expected))
+
+    def test_multiple_placeholders(self):
+        expected = self.get_placeholder()
+        placeholder1 = self.get_placeholder()
+        placeholder2 = self.get_placeholder()
+        self.add_plugins(expected, CONTENT)
+
+        builder = PluginTreeBuilder()
+        builder.add(placeholder1, deepcopy(CONTENT), "en")
+        builder.add(placeholder2, deepcopy(CONTENT), "en")
+        plugins = builder.save()
+
+        self.assertEqual(len(plugins), 16)
+        self.assertEqual(self.get_tree(placeholder1), self.get_tree(expected))
+        self.assertEqual(self.get_tree(placeholder2), self.get_tree(expected))
+
+    def test_shared_plugin_data(self):
+        expected = self.get_placeholder()
+        placeholder1 = self.get_placeholder()
+        placeholder2 = self.get_placeholder()
+        self.add_plugins(expected, CONTENT)
+        content = deepcopy(CONTENT)
+
+        builder = PluginTreeBuilder()
+        builder.add(placeholder1, content, "en")
+        builder.add(placeholder2, content, "en")
+        builder.save()
+
+        self.assertEqual(content, CONTENT)
+        self.assertEqual(self.get_tree(placeholder2), self.get_tree(expected))
+        self.assertEqual(
+            self.get_plugin_data(placeholder2), self.get_plugin_data(expected)
+        )
+
+    def test_save_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(PluginTreeBuilder().save(), [])
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import Group
+from django.test import TestCase
+
+from djangocms_fil_bootstrap.profiling import Profiler
+
+
+class ProfilerTestCase(TestCase):
+    def test_measure(self):
+        profiler = Profiler()
+        with profiler.measure("demo", "groups"):
+            Group.objects.bulk_create([Group(name="group1"), Group(name="group2")])
+            Group.objects.count()
+            data = [0] * 100000
+        del data
+
+        result = profiler.results["demo"]["groups"]
+        self.assertEqual(result["queries"], 2)
+        self.assertEqual(result["rows"], 2)
+        self.assertGreater(result["time"], 0)
+        self.assertGreaterEqual(result["time"], result["query_time"])
+        self.assertGreater(result["peak_memory"], 100000 * 8)
+
+    def test_measure_error(self):
+        profiler = Profiler()
+        with self.assertRaises(ValueError):
+            with profiler.measure("demo", "groups"):
+                Group.objects.count()
+                raise ValueError
+        self.assertEqual(profiler.results["demo"]["groups"]["queries"], 1)
+
+    def test_add(self):
+        profiler = Profiler()
+        profiler.add(5, 1.0, 5)
+        with profiler.measure("demo", "pages"):
+            Group.objects.count()
+            profiler.add(3, 0.5, 2)
+
+        result = profiler.results["demo"]["pages"]
+        self.assertEqual(result["queries"], 4)
+        self.assertEqual(result["rows"], 2)
+        self.assertGreaterEqual(result["query_time"], 0.5)
+
+    def test_get_rows(self):
+        profiler = Profiler()
+        profiler.results = {
+            "demo": {
+                "users": {"time": 1, "queries": 2, "query_time": 0.5, "rows": 3, "peak_memory": 2048},
+                "groups": {"time": 2, "queries": 1, "query_time": 1, "rows": 0, "peak_memory": 1024},
+            }
+        }
+        self.assertEqual(
+            profiler.get_rows(),
+            [
+                ["demo", "users", 1, 2, 0.5, 3, 2048],
+                ["demo", "groups", 2, 1, 1, 0, 1024],
+                ["demo", "total", 3, 3, 1.5, 3, 2048],
+            ],
+        )
+        self.assertEqual(
+            profiler.format_table().splitlines(),
+            [
+                "source  component  time (s)  queries  query time (s)  rows  peak memory (KiB)",
+                "demo    users         1.000        2           0.500     3                  2",
+                "demo    groups        2.000        1           1.000     0                  1",
+                "demo    total         3.000        3           1.500     3                  2",
+            ],
+        )
+
+    def test_write_json(self):
+        profiler = Profiler()
+        with profiler.measure("demo", "groups"):
+            Group.objects.create(name="group1")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.json")
+            profiler.write_json(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f), profiler.results)
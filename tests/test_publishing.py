@@ -0,0 +1,133 @@
+from unittest.mock import ANY, patch
+
+from django.test import TestCase
+
+from django_fsm import TransitionNotAllowed
+from djangocms_versioning.constants import (
+    DRAFT,
+    OPERATION_PUBLISH,
+    OPERATION_UNPUBLISH,
+    PUBLISHED,
+    UNPUBLISHED,
+)
+from djangocms_versioning.models import StateTracking, Version
+from djangocms_versioning.signals import (
+    post_version_operation,
+    pre_version_operation,
+)
+
+from djangocms_fil_bootstrap.publishing import Publisher
+from djangocms_fil_bootstrap.signals import versions_published
+from djangocms_fil_bootstrap.test_utils.factories import (
+    PageVersionFactory,
+    UserFactory,
+)
+
+
+class PublisherTestCase(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+
+    def get_state(self, version):
+        # `state` is a protected field, `refresh_from_db` can't set it
+        return Version.objects.get(pk=version.pk).state
+
+    def test_publish(self):
+        versions = PageVersionFactory.create_batch(3)
+        publisher = Publisher()
+        for version in versions[:2]:
+            publisher.add(version, self.user)
+        published = publisher.publish()
+
+        self.assertEqual(published, versions[:2])
+        self.assertEqual(
+            [self.get_state(version) for version in versions],
+            [PUBLISHED, PUBLISHED, DRAFT],
+        )
+        self.assertEqual(versions[0].state, PUBLISHED)
+        tracking = StateTracking.objects.get(version=versions[0])
+        self.assertEqual(tracking.old_state, DRAFT)
+        self.assertEqual(tracking.new_state, PUBLISHED)
+        self.assertEqual(tracking.user, self.user)
+        self.assertFalse(publisher.queue)
+
+    def test_publish_unpublishes_previous_version(self):
+        version1 = PageVersionFactory()
+        version1.publish(self.user)
+        version2 = version1.copy(self.user)
+        publisher = Publisher()
+        publisher.add(version2, self.user)
+        publisher.publish()
+
+        self.assertEqual(self.get_state(version1), UNPUBLISHED)
+        self.assertEqual(self.get_state(version2), PUBLISHED)
+        self.assertTrue(
+            StateTracking.objects.filter(
+                version=version1, old_state=PUBLISHED, new_state=UNPUBLISHED
+            ).exists()
+        )
+
+    def test_publish_sends_signals(self):
+        version = PageVersionFactory()
+        publisher = Publisher()
+        publisher.add(version, self.user)
+        with patch.object(post_version_operation, "send") as post, patch.object(
+            versions_published, "send"
+        ) as aggregated:
+            publisher.publish()
+        post.assert_called_once()
+        aggregated.assert_not_called()
+
+    def test_publish_sends_unpublish_signals(self):
+        version1 = PageVersionFactory()
+        version1.publish(self.user)
+        version2 = version1.copy(self.user)
+        publisher = Publisher()
+        publisher.add(version2, self.user)
+        with patch.object(pre_version_operation, "send") as pre, patch.object(
+            post_version_operation, "send"
+        ) as post:
+            publisher.publish()
+
+        pre = {kwargs["operation"]: kwargs for args, kwargs in pre.call_args_list}
+        post = {kwargs["operation"]: kwargs for args, kwargs in post.call_args_list}
+        for operations in (pre, post):
+            self.assertEqual(set(operations), {OPERATION_PUBLISH, OPERATION_UNPUBLISH})
+            self.assertEqual(operations[OPERATION_UNPUBLISH]["obj"], version1)
+            self.assertEqual(operations[OPERATION_UNPUBLISH]["to_be_published"], version2)
+        self.assertEqual(
+            pre[OPERATION_UNPUBLISH]["token"], post[OPERATION_UNPUBLISH]["token"]
+        )
+        self.assertEqual(post[OPERATION_PUBLISH]["unpublished"], [version1])
+
+    def test_publish_not_draft(self):
+        version = PageVersionFactory()
+        version.publish(self.user)
+        version = Version.objects.get(pk=version.pk)
+        modified = version.modified
+        publisher = Publisher()
+        publisher.add(version, self.user)
+        with self.assertRaises(TransitionNotAllowed):
+            publisher.publish()
+        self.assertEqual(Version.objects.get(pk=version.pk).modified, modified)
+        self.assertEqual(StateTracking.objects.filter(version=version).count(), 1)
+
+    def test_publish_without_signals(self):
+        versions = PageVersionFactory.create_batch(2)
+        publisher = Publisher(signals=False)
+        for version in versions:
+            publisher.add(version, self.user)
+        with patch.object(post_version_operation, "send") as post, patch.object(
+            versions_published, "send"
+        ) as aggregated:
+            publisher.publish()
+        post.assert_not_called()
+        aggregated.assert_called_once_with(
+            sender=ANY, versions=versions, unpublished=[]
+        )
+        for version in versions:
+            self.assertEqual(self.get_state(version), PUBLISHED)
+
+    def test_publish_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(Publisher().publish(), [])
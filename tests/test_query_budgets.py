@@ -0,0 +1,106 @@
+import json
+import re
+from collections import Counter
+from io import StringIO
+
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from djangocms_fil_bootstrap import get_components
+from djangocms_fil_bootstrap.bootstrapper import Bootstrap, sort_components
+from djangocms_fil_bootstrap.components import (
+    Collections,
+    Groups,
+    Pages,
+    Permissions,
+    Users,
+    Workflows,
+)
+from djangocms_fil_bootstrap.generator import generate
+
+
+# Small enough that no insert or lookup is split into batches
+# (SQLite allows 999 query parameters)
+N = 2
+
+
+def summarize(queries):
+    """Count queries by kind and table, e.g. `3x INSERT auth_user`."""
+    kinds = Counter()
+    for query in queries:
+        sql = query["sql"]
+        table = re.search(r'(?:FROM|INTO|UPDATE)\s+"?(\w+)"?', sql, re.IGNORECASE)
+        kinds[sql.split(None, 1)[0].upper(), table.group(1) if table else "?"] += 1
+    return "\n".join(
+        "  {}x {} {}".format(count, kind, table)
+        for (kind, table), count in sorted(kinds.items())
+    )
+
+
+class QueryBudgetTestCase(TestCase):
+    """Bulk mode has to create objects with a number of queries which
+    doesn't depend on the number of objects."""
+
+    def run_component(self, target, size):
+        """Bootstrap a generated source of `size` up to the `target`
+        component, return queries of `target`. Changes are rolled back."""
+        data = generate(users=size, groups=size, pages=size, depth=2, collections=size)
+        with transaction.atomic():
+            bootstrap = Bootstrap(StringIO(json.dumps(data)), bulk=True)
+            for component in sort_components(get_components()):
+                if component is target:
+                    with CaptureQueriesContext(connection) as context:
+                        bootstrap.each(component)
+                    break
+                bootstrap.each(component)
+            transaction.set_rollback(True)
+        return context.captured_queries
+
+    def assertQueryBudget(self, component):
+        # Warm up caches (content types, current site)
+        self.run_component(component, N)
+        small = self.run_component(component, N)
+        large = self.run_component(component, 10 * N)
+        if len(large) > len(small):
+            self.fail(
+                "{} took {} queries for {} items, but {} for {}:\n{}\nvs\n{}".format(
+                    component.__name__,
+                    len(large),
+                    10 * N,
+                    len(small),
+                    N,
+                    summarize(large),
+                    summarize(small),
+                )
+            )
+
+    def test_users(self):
+        self.assertQueryBudget(Users)
+
+    def test_groups(self):
+        self.assertQueryBudget(Groups)
+
+    def test_permissions(self):
+        self.assertQueryBudget(Permissions)
+
+    def test_pages(self):
+        self.assertQueryBudget(Pages)
+
+    def test_workflows(self):
+        self.assertQueryBudget(Workflows)
+
+    def test_collections(self):
+        self.assertQueryBudget(Collections)
+
+    def test_summarize(self):
+        self.assertEqual(
+            summarize(
+                [
+                    {"sql": 'INSERT INTO "auth_user" ("username") VALUES (%s)'},
+                    {"sql": 'INSERT INTO "auth_user" ("username") VALUES (%s)'},
+                    {"sql": 'SELECT "auth_group"."id" FROM "auth_group"'},
+                ]
+            ),
+            "  2x INSERT auth_user\n  1x SELECT auth_group",
+        )
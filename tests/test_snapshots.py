@@ -0,0 +1,160 @@
+import json
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import Group, Permission, User
+from django.db import transaction
+from django.test import TestCase
+
+from djangocms_fil_bootstrap.bootstrapper import Bootstrap
+from djangocms_fil_bootstrap.snapshots import (
+    Snapshot,
+    SnapshotConflict,
+    sort_models,
+)
+from djangocms_fil_bootstrap.test_utils.mixins import (
+    BootstrapTestMixin,
+    bootstrap_once,
+    snapshots,
+)
+
+
+class SnapshotTestCase(TestCase):
+    def test_restore(self):
+        existing = Group.objects.create(name="existing")
+        snapshot = Snapshot()
+        with transaction.atomic():
+            snapshot.start()
+            user = User.objects.create(username="user1")
+            group = Group.objects.create(name="group1")
+            user.groups.add(group, existing)
+            bootstrap = SimpleNamespace(
+                users=SimpleNamespace(data={"user1": user}),
+                groups=SimpleNamespace(data={"group1": group, "other": "value"}),
+            )
+            snapshot.finish(bootstrap, [Mock(field_name="users"), Mock(field_name="groups")])
+            transaction.set_rollback(True)
+        self.assertFalse(User.objects.exists())
+
+        restored = snapshot.restore()
+
+        self.assertEqual(
+            list(Group.objects.values_list("pk", "name").order_by("pk")),
+            [(existing.pk, "existing"), (group.pk, "group1")],
+        )
+        self.assertEqual(User.objects.get().pk, user.pk)
+        self.assertCountEqual(User.objects.get().groups.all(), [group, existing])
+        self.assertEqual(restored.users.data, {"user1": user})
+        self.assertIsNot(restored.users.data["user1"], user)
+        self.assertEqual(restored.groups.data, {"group1": group, "other": "value"})
+        # New objects don't conflict with restored primary keys
+        self.assertGreater(Group.objects.create(name="group2").pk, group.pk)
+
+    def take_snapshot(self):
+        """Return snapshot of a group with permissions and its member,
+        the rows are rolled back."""
+        snapshot = Snapshot()
+        with transaction.atomic():
+            snapshot.start()
+            user = User.objects.create(username="user1")
+            group = Group.objects.create(name="group1")
+            group.permissions.add(*Permission.objects.filter(codename="change_group"))
+            user.groups.add(group)
+            snapshot.finish()
+            transaction.set_rollback(True)
+        return snapshot, user, group
+
+    def test_dump(self):
+        snapshot, user, group = self.take_snapshot()
+        file_ = StringIO()
+        snapshot.dump(file_)
+        data = json.loads(file_.getvalue())
+        tables = [table["model"] for table in data["tables"]]
+        self.assertLess(tables.index("auth.group"), tables.index("auth.group_permissions"))
+        self.assertLess(tables.index("auth.user"), tables.index("auth.user_groups"))
+        permission = Permission.objects.get(codename="change_group")
+        self.assertEqual(
+            data["references"]["auth.permission"],
+            [[permission.pk, ["change_group", "auth", "group"]]],
+        )
+
+    def test_replay(self):
+        snapshot, user, group = self.take_snapshot()
+        file_ = StringIO()
+        snapshot.dump(file_)
+        file_.seek(0)
+        snapshot = Snapshot.load(file_)
+        # Primary key of the group is taken
+        Group.objects.create(pk=group.pk, name="other")
+
+        self.assertEqual(snapshot.replay(), 4)
+
+        replayed = Group.objects.get(name="group1")
+        self.assertNotEqual(replayed.pk, group.pk)
+        self.assertEqual(User.objects.get(username="user1").pk, user.pk)
+        self.assertEqual(list(User.objects.get().groups.all()), [replayed])
+        self.assertEqual(
+            list(replayed.permissions.values_list("codename", flat=True)), ["change_group"]
+        )
+        self.assertFalse(Group.objects.get(name="other").permissions.exists())
+
+    def test_replay_conflict(self):
+        snapshot, user, group = self.take_snapshot()
+        User.objects.create(username="user1")
+
+        with self.assertRaisesMessage(SnapshotConflict, "auth.user exist already (username: user1)"):
+            snapshot.replay()
+
+        self.assertFalse(Group.objects.exists())
+
+    def test_start_after_existing_rows(self):
+        existing = Group.objects.create(name="existing")
+        snapshot, user, group = self.take_snapshot()
+
+        self.assertEqual(
+            [row[1:] for row in snapshot.rows[Group][1]], [("group1",)]
+        )
+        self.assertNotEqual(group.pk, existing.pk)
+
+    def test_load_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            Snapshot.load(StringIO('{"format": 0}'))
+
+    def test_sort_models(self):
+        memberships = User.groups.through
+        self.assertEqual(
+            sort_models([memberships, User, Group]), [User, Group, memberships]
+        )
+
+
+@patch.dict(snapshots, clear=True)
+class BootstrapOnceTestCase(TestCase):
+    def test_bootstrap_once(self):
+        with transaction.atomic():
+            bootstrap = bootstrap_once("roles")
+            publishers = bootstrap.groups["publisher"]
+            transaction.set_rollback(True)
+        self.assertFalse(Group.objects.exists())
+
+        with patch.object(Bootstrap, "__call__") as call:
+            bootstrap = bootstrap_once("roles")
+        call.assert_not_called()
+        self.assertEqual(bootstrap.groups["publisher"], publishers)
+        self.assertEqual(Group.objects.get(pk=publishers.pk).name, "Publishers")
+        self.assertEqual(len(snapshots), 1)
+
+        bootstrap_once("roles", bulk=True)
+        self.assertEqual(len(snapshots), 2)
+
+
+class BootstrapTestMixinTestCase(BootstrapTestMixin, TestCase):
+    bootstrap_source = "roles"
+
+    def test_bootstrap(self):
+        self.assertEqual(
+            Group.objects.get(pk=self.bootstrap.groups["editor"].pk).name, "Editors"
+        )
+        self.assertEqual(
+            set(self.bootstrap.groups.data), {"publisher", "reviewer", "editor"}
+        )
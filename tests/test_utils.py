@@ -1,4 +1,13 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cms.models import PageContent
 
 from djangocms_versioning.constants import ARCHIVED
 from freezegun import freeze_time
@@ -6,8 +15,14 @@ from freezegun import freeze_time
 from djangocms_fil_bootstrap.test_utils.factories import (
     PageContentWithVersionFactory,
     PageVersionFactory,
+    UserFactory,
+)
+from djangocms_fil_bootstrap.utils import (
+    VersionRegistry,
+    bulk_add,
+    bulk_create,
+    get_version,
 )
-from djangocms_fil_bootstrap.utils import get_version
 
 
 class UtilsTestCase(TestCase):
@@ -20,3 +35,100 @@ class UtilsTestCase(TestCase):
             page_content = PageContentWithVersionFactory(version__state=ARCHIVED)
         latest_version = PageVersionFactory(content__page=page_content.page)
         self.assertEqual(get_version(page_content.page), latest_version)
+
+    def test_bulk_create_without_returned_ids(self):
+        User = get_user_model()
+        UserFactory(first_name="Same")
+        manager = User._base_manager
+        insert = manager.bulk_create
+
+        def insert_without_ids(objs):
+            objs = insert(objs)
+            for obj in objs:
+                obj.pk = None
+            return objs
+
+        with patch.object(manager, "bulk_create", insert_without_ids), patch.object(
+            type(connection.features), "can_return_rows_from_bulk_insert", False
+        ):
+            # first_name isn't unique, an existing user has the same one
+            created = bulk_create(
+                User, [User(username="new", first_name="Same")], "first_name"
+            )
+        self.assertEqual(created["Same"].pk, User.objects.get(username="new").pk)
+
+    def test_bulk_add_batches_lookup(self):
+        users = UserFactory.create_batch(3)
+        groups = [Group.objects.create(name=str(i)) for i in range(3)]
+        users[0].groups.add(groups[0])
+        pairs = [(user.pk, group.pk) for user in users for group in groups]
+
+        with patch.object(
+            type(connection.features), "max_query_params", 2
+        ), CaptureQueriesContext(connection) as queries:
+            result = bulk_add(get_user_model().groups.field, pairs)
+
+        self.assertEqual(result, (8, 1))
+        lookups = [query for query in queries if query["sql"].startswith("SELECT")]
+        self.assertEqual(len(lookups), 2)
+        self.assertEqual(
+            set(get_user_model().groups.through.objects.values_list("user_id", "group_id")),
+            set(pairs),
+        )
+
+
+class VersionRegistryTestCase(TestCase):
+    def test_add(self):
+        version = PageVersionFactory()
+        page = version.content.page
+        registry = VersionRegistry()
+        registry.add(page, version)
+        self.assertIn(page, registry)
+        with self.assertNumQueries(0):
+            self.assertEqual(registry.get(page), version)
+
+    def test_get_unregistered(self):
+        version = PageVersionFactory()
+        registry = VersionRegistry()
+        self.assertEqual(registry.get(version.content.page), version)
+
+    def test_prefetch(self):
+        ContentType.objects.get_for_model(PageContent)  # warm up the cache
+        versions = [PageVersionFactory() for i in range(3)]
+        pages = [version.content.page for version in versions]
+        registry = VersionRegistry()
+        with self.assertNumQueries(2):
+            registry.prefetch(pages)
+        with self.assertNumQueries(0):
+            for page, version in zip(pages, versions):
+                self.assertEqual(registry.get(page), version)
+                self.assertEqual(registry.get(page).content, version.content)
+
+    def test_prefetch_batches(self):
+        with freeze_time("2010-10-10"):
+            page_content = PageContentWithVersionFactory(version__state=ARCHIVED)
+        latest_version = PageVersionFactory(content__page=page_content.page)
+        versions = [PageVersionFactory() for i in range(2)]
+        pages = [page_content.page] + [version.content.page for version in versions]
+        registry = VersionRegistry()
+        with patch.object(type(connection.features), "max_query_params", 2):
+            with self.assertNumQueries(4):
+                registry.prefetch(pages)
+        self.assertEqual(
+            [registry.get(page) for page in pages], [latest_version] + versions
+        )
+
+    def test_prefetch_uses_latest_content(self):
+        with freeze_time("2010-10-10"):
+            page_content = PageContentWithVersionFactory(version__state=ARCHIVED)
+        latest_version = PageVersionFactory(content__page=page_content.page)
+        registry = VersionRegistry()
+        registry.prefetch([page_content.page])
+        self.assertEqual(registry.get(page_content.page), latest_version)
+
+    def test_prefetch_skips_registered_pages(self):
+        version = PageVersionFactory()
+        registry = VersionRegistry()
+        registry.add(version.content.page, version)
+        with self.assertNumQueries(0):
+            registry.prefetch([version.content.page])